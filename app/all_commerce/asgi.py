@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'all_commerce.settings')
+# Catalogue endpoints are served by async views
+os.environ.setdefault('ROOT_URLCONF', 'all_commerce.asgi_urls')
 
 application = get_asgi_application()
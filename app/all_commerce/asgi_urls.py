@@ -0,0 +1,13 @@
+"""
+URL configuration of ASGI serving, same as all_commerce/urls.py
+with async catalogue views, see store/async_views.py
+"""
+from django.contrib import admin
+from django.urls import include, path
+
+urlpatterns = [
+    path("user/", include("otp_auth_user.urls")),
+    path("store/", include("store.async_urls")),
+    path("core/", include("core.urls")),
+    path('admin/', admin.site.urls),
+]
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     "phonenumber_field",
     "rest_framework_simplejwt",
@@ -60,7 +61,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'all_commerce.urls'
+ROOT_URLCONF = os.environ.get('ROOT_URLCONF', 'all_commerce.urls')
 
 TEMPLATES = [
     {
@@ -84,14 +85,28 @@ WSGI_APPLICATION = 'all_commerce.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept open between requests for DB_CONN_MAX_AGE seconds.
+# With DB_POOL=1 they are given back to a pool of the worker process at
+# the end of each request instead, see core/db/pool.py
+DB_POOL = bool(int(os.environ.get("DB_POOL", 0)))
+
 DATABASES = {
     'default': {
-        "ENGINE":   "django.db.backends.postgresql",
+        "ENGINE":   "core.db.backends.postgresql_pool" if DB_POOL
+                    else "django.db.backends.postgresql",
         "NAME":     os.environ.get("DB_NAME",     "all_commerce_db"),
         "USER":     os.environ.get("DB_USER",     "amir"),
         "PASSWORD": os.environ.get("DB_PASS",     "amir6670"),
         "HOST":     os.environ.get("DB_HOST",     "127.0.0.1"),
         "PORT":     os.environ.get("PORT",        5432),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 0 if DB_POOL else 60)),
+        "POOL": {
+            "MIN_SIZE":     int(os.environ.get("DB_POOL_MIN_SIZE", 0)),
+            "MAX_SIZE":     int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "TIMEOUT":      float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "MAX_LIFETIME": int(os.environ.get("DB_POOL_MAX_LIFETIME", 60 * 60)),
+            "HEALTH_CHECK_INTERVAL": int(os.environ.get("DB_POOL_HEALTH_CHECK_INTERVAL", 30)),
+        },
         "TEST": {
             "NAME": "test_all_commerce_db"
         }
@@ -157,8 +172,116 @@ SIMPLE_JWT = {
     'UPDATE_LAST_LOGIN': False,
 }
 
+# Store endpoints authenticate users from access token claims, a user is
+# checked for deletion and changed flags every CACHE_TTL seconds by each
+# process, see core/authentication.py
+TOKEN_USER = {
+    "CACHE_TTL": 30,
+    "MAX_ENTRIES": 10000,
+}
+
 # DRF settings
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    'PAGE_SIZE': 50
+    'PAGE_SIZE': 50,
+    # Proxies in front of the app, X-Forwarded-For is ignored with 0.
+    # The uWSGI proxy passes the client address as REMOTE_ADDR,
+    # proxy/default-asgi.conf in X-Forwarded-For and needs 1
+    'NUM_PROXIES': int(os.environ.get("NUM_PROXIES", 0)),
+}
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# locmem is per process, use a shared backend (e.g. FileBasedCache)
+# when running more than one worker
+CACHES = {
+    "default": {
+        "BACKEND":  os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "all-commerce"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 5000)),
+        },
+    },
+    # Verification codes, shared by all processes, the table is made by
+    # "manage.py createcachetable"
+    "otp": {
+        "BACKEND": os.environ.get("OTP_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.environ.get("OTP_CACHE_LOCATION", "otp_challenge_cache"),
+        "OPTIONS": {
+            # A challenge takes two entries
+            "MAX_ENTRIES": int(os.environ.get("OTP_CACHE_MAX_ENTRIES", 100000)),
+        },
+    },
+}
+
+# Phone number verification codes, see core/otp.py, the cache must be
+# shared by all workers since a code may be submitted to another one,
+# the app refuses to start with a LocMemCache in more than one process
+OTP_CHALLENGES = {
+    "CACHE_ALIAS": "otp",
+    "DIGITS": 5,
+    "TIMEOUT": 10 * 60,
+    "MAX_ATTEMPTS": 5,
+}
+
+# Outbound SMS, sent in batches by background threads, see core/sms
+SMS = {
+    "PROVIDER": os.environ.get("SMS_PROVIDER", "core.sms.providers.ConsoleProvider"),
+    "OPTIONS": {},
+    "WORKERS": int(os.environ.get("SMS_WORKERS", 1)),
+    "BATCH_SIZE": 50,
+    # Seconds a batch waits for more messages after its first one
+    "BATCH_WAIT": 0.05,
+    "MAX_ATTEMPTS": 5,
+    # Seconds before the first retry, doubled on every attempt
+    "RETRY_DELAY": 1,
+    "MAX_QUEUE_SIZE": 10000,
+}
+
+# Product lists are rendered from .values() rows instead of model
+# instances and DRF fields, see core/fast_serialization.py
+FAST_LIST_SERIALIZATION = bool(int(os.environ.get("FAST_LIST_SERIALIZATION", 1)))
+
+# Resized copies of product images, made in the background after upload,
+# see store/images.py and store/uploads.py. Formats Pillow can't write are skipped, the first
+# one made is served when a client asks for a size only.
+PRODUCT_IMAGES = {
+    # Longest side in pixels
+    "SIZES": {"thumb": 160, "medium": 640, "large": 1280},
+    "FORMATS": ["webp", "avif"],
+    "QUALITY": 80,
+    # Limits of uploads, checked while they are received
+    "MAX_UPLOAD_SIZE": 10 * 2 ** 20,
+    "MAX_DIMENSION": 8000,
+    "MAX_PIXELS": 40 * 10 ** 6,
+    # Made in the request when 0
+    "WORKERS": int(os.environ.get("PRODUCT_IMAGE_WORKERS", 2)),
+}
+
+# Throttling of OTP and signup endpoints, see core/throttling.py,
+# rates are "requests/period" with period s, m, h or d
+THROTTLING = {
+    "ENABLED": bool(int(os.environ.get("THROTTLING", 1))),
+    "CACHE_ALIAS": "default",
+    "RATES": {
+        # Each request sends an sms
+        "vcode_phone": "5/h",
+        "vcode_ip": "30/h",
+        "vcode_global": "100/m",
+        "token_phone": "10/m",
+        "token_ip": "60/m",
+        "signup_ip": "10/h",
+        "signup_global": "100/m",
+    },
+}
+
+# Threads (and database connections) of each ASGI worker that run
+# queries of async views, see core/async_db.py
+ASYNC_DB_POOL_SIZE = int(os.environ.get("ASYNC_DB_POOL_SIZE", 10))
+
+# Response cache of read only store endpoints, see store/cache.py
+STORE_RESPONSE_CACHE = {
+    "ENABLED": bool(int(os.environ.get("STORE_RESPONSE_CACHE", 1))),
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 60 * 60,
 }
@@ -19,5 +19,6 @@ from django.urls import include, path
 urlpatterns = [
     path("user/", include("otp_auth_user.urls")),
     path("store/", include("store.urls")),
+    path("core/", include("core.urls")),
     path('admin/', admin.site.urls),
 ]
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from django.db.models.signals import post_delete, post_save
+
+        from .authentication import forget_user_state
+        from .checks import check_otp_cache
+
+        # Servers start without running system checks
+        errors = check_otp_cache()
+        if errors:
+            raise ImproperlyConfigured(f"{errors[0].msg} {errors[0].hint}")
+
+        for signal in (post_save, post_delete):
+            signal.connect(forget_user_state,
+                           dispatch_uid=f"forget_user_state_{signal}")
@@ -0,0 +1,66 @@
+"""
+Database access from async views.
+
+The ORM of Django 3.2 is synchronous, so async views run their database
+work in a pool of threads. Every thread keeps its own connection, which
+is reused between calls when CONN_MAX_AGE allows, so the pool size is
+also the number of database connections an ASGI worker opens.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_DB_POOL_SIZE,
+            thread_name_prefix="async-db")
+    return _executor
+
+
+def close_connections():
+    """ Closes the connections every thread of the pool keeps open """
+    executor = get_executor()
+    # Each thread runs one call, it waits at the barrier for the others
+    barrier = threading.Barrier(settings.ASYNC_DB_POOL_SIZE)
+
+    def close():
+        barrier.wait(timeout=10)
+        connections.close_all()
+
+    wait([executor.submit(close)
+          for _ in range(settings.ASYNC_DB_POOL_SIZE)])
+
+
+def _call_with_connection(func, *args, **kwargs):
+    # What request_started and request_finished signals do in sync views
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def database_sync_to_async(func):
+    """
+    Returns a coroutine function that runs func in the database pool,
+    unlike sync_to_async(thread_sensitive=True) calls are not serialized
+    to one thread, so slow queries of a request do not block other ones
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        call = functools.partial(
+            context.run, _call_with_connection, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            get_executor(), call)
+    return wrapper
@@ -0,0 +1,76 @@
+"""
+JWT authentication without a user query per request.
+
+TokenUserAuthentication builds the user of a request from the claims
+of its access token as a TokenUser, other fields of the user are only
+loaded when they are accessed. Tokens of deleted users are rejected and
+the "phone_is_verified" and "is_staff" claims are replaced by current
+values, both are checked against a cache of each process that keeps a
+user for CACHE_TTL seconds. With CACHE_TTL None the claims are trusted.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from otp_auth_user.models import TokenUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+_states = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_user_state(user_id):
+    """ Returns phone_is_verified and is_staff of a user, None if deleted """
+    now = time.monotonic()
+    with _lock:
+        expires, state = _states.get(user_id, (0, None))
+        if expires > now:
+            _states.move_to_end(user_id)
+            return state
+
+    state = TokenUser.objects.filter(pk=user_id).values_list(
+        "phone_is_verified", "is_staff").first()
+    with _lock:
+        _states[user_id] = (now + settings.TOKEN_USER["CACHE_TTL"], state)
+        _states.move_to_end(user_id)
+        while len(_states) > settings.TOKEN_USER["MAX_ENTRIES"]:
+            _states.popitem(last=False)
+    return state
+
+
+def forget_user_state(sender, instance, **kwargs):
+    """ Drops a saved or deleted user, other processes wait for CACHE_TTL """
+    # Connected for every model, users are also saved through proxies
+    if sender._meta.concrete_model is not TokenUser._meta.concrete_model:
+        return
+    with _lock:
+        _states.pop(instance.pk, None)
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    """ Authenticates requests with a TokenUser of the access token """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification"))
+
+        if settings.TOKEN_USER["CACHE_TTL"] is None:
+            state = (validated_token.get("phone_is_verified", False),
+                     validated_token.get("is_staff", False))
+        else:
+            state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"),
+                                       code="user_not_found")
+
+        phone_is_verified, is_staff = state
+        return TokenUser.from_claims(id=user_id,
+                                     phone_is_verified=phone_is_verified,
+                                     is_staff=is_staff)
@@ -0,0 +1,80 @@
+"""
+Load test of a running server with many concurrent, optionally slow, clients.
+
+It compares serving modes, e.g. uWSGI sync workers and an ASGI worker,
+by sending the same requests to each. Slow clients send their request
+headers in pieces, like clients on bad mobile networks do, which keeps
+a sync worker busy but not an async one.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from .runner import percentile
+
+
+async def fetch(host, port, path, slow_delay=0):
+    """ Sends a GET request and returns the response status code """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}",
+                 "Connection: close", "", ""]
+        if slow_delay:
+            for line in lines[:-1]:
+                writer.write(f"{line}\r\n".encode())
+                await writer.drain()
+                await asyncio.sleep(slow_delay)
+        else:
+            writer.write("\r\n".join(lines).encode())
+            await writer.drain()
+
+        status_line = await reader.readline()
+        while await reader.read(65536):
+            pass
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def run_load(url, paths, concurrency=50, requests=500,
+                   slow_clients=0.0, slow_delay=0.05, timeout=30):
+    """
+    Sends "requests" requests spread over paths with "concurrency"
+    clients at a time, "slow_clients" is the fraction of slow clients
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    prefix = parts.path.rstrip("/")
+    latencies, statuses, errors = [], {}, 0
+    queue = asyncio.Queue()
+    for number in range(requests):
+        queue.put_nowait(number)
+
+    async def client():
+        nonlocal errors
+        while not queue.empty():
+            number = queue.get_nowait()
+            slow = number % 100 < slow_clients * 100
+            path = prefix + paths[number % len(paths)]
+            start = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(
+                    fetch(host, port, path, slow_delay if slow else 0), timeout)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = {"requests": requests, "concurrency": concurrency,
+              "slow_clients": slow_clients, "errors": errors,
+              "statuses": statuses,
+              "throughput_rps": round(len(latencies) / elapsed, 1)}
+    if latencies:
+        result.update({f"p{percent}_ms": round(percentile(latencies, percent), 3)
+                       for percent in (50, 95, 99)})
+    return result
@@ -0,0 +1,134 @@
+"""
+Runs benchmark scenarios in-process and compares results with a baseline.
+
+Every request is timed and its queries and response bytes are counted,
+allocations are measured with tracemalloc on one extra request, since
+tracing slows down the timed ones.
+"""
+import contextlib
+import io
+import logging
+import math
+import time
+import tracemalloc
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+# Latency changes smaller than this are noise, in milliseconds
+MIN_LATENCY_CHANGE = 1.0
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Silences prints of views and 4xx request logs, verification codes
+    are dropped instead of being written by the background SMS threads
+    """
+    logger = logging.getLogger("django.request")
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    sms = dict(settings.SMS, PROVIDER="core.sms.providers.NullProvider")
+    try:
+        # Changing SMS flushes the queue, messages queued before are sent
+        with override_settings(SMS=sms), \
+                contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logger.setLevel(level)
+
+
+def percentile(values, percent):
+    """ Nearest rank percentile of values """
+    values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def send(client, scenario, path, data):
+    if scenario.content_type:
+        return client.generic(scenario.method.upper(), path, data or "",
+                              content_type=scenario.content_type)
+    return getattr(client, scenario.method)(path, data, format=scenario.format)
+
+
+def run_scenario(scenario, catalogue, iterations=30, warmup=3):
+    """ Returns latency percentiles, query count and allocations of scenario """
+    client = APIClient()
+    if scenario.user:
+        access = catalogue["tokens"][scenario.user]["access"]
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    latencies, queries, sizes, statuses = [], [], [], Counter()
+
+    def count_query(execute, sql, params, many, context):
+        queries[-1] += 1
+        return execute(sql, params, many, context)
+
+    with quiet():
+        for iteration in range(warmup + iterations):
+            path, data = scenario.prepare(catalogue, iteration)
+            queries.append(0)
+            with connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                response = send(client, scenario, path, data)
+                elapsed = time.perf_counter() - start
+            if iteration < warmup:
+                queries.pop()
+                continue
+            latencies.append(elapsed * 1000)
+            sizes.append(len(response.content))
+            statuses[response.status_code] += 1
+
+        path, data = scenario.prepare(catalogue, warmup + iterations)
+        tracemalloc.start()
+        try:
+            send(client, scenario, path, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "queries": max(queries),
+        "response_kb": round(max(sizes) / 1024, 1),
+        "peak_allocated_kb": round(peak / 1024, 1),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def run_scenarios(scenarios, catalogue, iterations=30, warmup=3):
+    return {scenario.name: run_scenario(scenario, catalogue, iterations, warmup)
+            for scenario in scenarios}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns regressions of results compared to baseline results,
+    any extra query is a regression, p95 latency and allocations
+    regress when they grow more than tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result["queries"] > old["queries"]:
+            regressions.append(
+                f"{name}: queries {old['queries']} -> {result['queries']}")
+        if (result["p95_ms"] > old["p95_ms"] * (1 + tolerance) and
+                result["p95_ms"] - old["p95_ms"] > MIN_LATENCY_CHANGE):
+            regressions.append(
+                f"{name}: p95 {old['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["peak_allocated_kb"] > old["peak_allocated_kb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak allocated {old['peak_allocated_kb']}KB -> "
+                f"{result['peak_allocated_kb']}KB")
+    return regressions
@@ -0,0 +1,178 @@
+"""
+Requests the benchmark drives, one scenario per endpoint and use case.
+
+"path" and "data" of a scenario are either constants or functions of
+(catalogue, iteration), they are prepared before the request is timed,
+so a scenario can create what its request needs, e.g. a wishlist item
+to delete or a verification code to submit.
+"""
+import io
+import json
+
+from core.helpers import VerifyInstancePhoneNumber
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+from store import models
+
+from .seed import sample_phone
+
+
+class Scenario:
+    """ A request of an endpoint made as an anonymous or seeded user """
+
+    def __init__(self, name, method, path, data=None, user=None,
+                 format="json", content_type=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        # "owner", "otp_user" or None for anonymous requests
+        self.user = user
+        self.format = format
+        self.content_type = content_type
+
+    def prepare(self, catalogue, iteration):
+        """ Returns (path, data) of the request """
+        def resolve(value):
+            return value(catalogue, iteration) if callable(value) else value
+        return resolve(self.path), resolve(self.data)
+
+
+def url(name, **kwargs):
+    """ Returns a path function that reverses with catalogue objects pks """
+    def path(catalogue, iteration):
+        return reverse(name, kwargs={key: catalogue[value].pk
+                                     for key, value in kwargs.items()})
+    return path
+
+
+def new_phone(catalogue, iteration):
+    catalogue["next_phone"] += 1
+    return sample_phone(catalogue["next_phone"])
+
+
+def verification_code(catalogue, iteration):
+    """ Requests a new code of the otp user like a client would """
+    user = get_user_model().objects.get(pk=catalogue["otp_user"].pk)
+    return VerifyInstancePhoneNumber(
+        get_user_model(), user).request_verification()
+
+
+def wishlist_item(catalogue, iteration):
+    item = models.WishListItem.objects.create(
+        product=catalogue["product"], user=catalogue["owner"])
+    return reverse("store:wish-list-item-detail", kwargs={"pk": item.pk})
+
+
+def product_image(catalogue, iteration):
+    image = io.BytesIO()
+    Image.new("RGB", (10, 10)).save(image, "PNG")
+    return {"product": catalogue["product"].pk,
+            "image": SimpleUploadedFile("image.png", image.getvalue(),
+                                        content_type="image/png")}
+
+
+def uploaded_image(catalogue, iteration):
+    image = models.ProductImage.objects.create(
+        product=catalogue["product"], image=catalogue["image"])
+    return reverse("store:upload-product-image-detail", kwargs={"pk": image.pk})
+
+
+def bulk_rows(catalogue, iteration):
+    return "\n".join(json.dumps({
+        "name": f"imported {iteration} {i}", "sale_price": 10000,
+        "stock": 10, "discount": 10, "store": catalogue["store"].pk,
+    }) for i in range(20))
+
+
+SCENARIOS = [
+    # store/urls.py
+    Scenario("stores.list", "get", url("store:store-list")),
+    Scenario("stores.list_by_score", "get",
+             lambda c, i: reverse("store:store-list") + "?ordering=-score"),
+    Scenario("stores.list_by_cursor", "get",
+             lambda c, i: reverse("store:store-list") + "?pagination=cursor"),
+    Scenario("stores.nearby", "get",
+             lambda c, i: reverse("store:store-list") +
+             "?near=35.6892,51.3890&radius=10"),
+    Scenario("stores.retrieve", "get", url("store:store-detail", pk="store")),
+    Scenario("stores.owned", "get",
+             lambda c, i: reverse("store:store-list") + "?self=true",
+             user="owner"),
+    Scenario("stores.create", "post", url("store:store-list"),
+             lambda c, i: {"name": f"new store {i}", "address": "street",
+                           "lat": 35.7, "long": 51.4, "city": c["city"].pk,
+                           "store_category": c["store_category"].pk},
+             user="owner"),
+    Scenario("stores.open", "patch", url("store:store-detail", pk="store"),
+             {"is_open": True}, user="owner"),
+    Scenario("stores.rate", "post", url("store:store-rate", pk="store"),
+             lambda c, i: {"score": i % 5 + 1}, user="owner"),
+    Scenario("categories.list", "get", url("store:category-list")),
+    Scenario("categories.tree", "get", url("store:category-tree")),
+    Scenario("categories.retrieve", "get",
+             url("store:category-detail", pk="category")),
+    Scenario("categories.products", "get",
+             url("store:category-products", pk="category")),
+    Scenario("categories.products_of_subtree", "get",
+             lambda c, i: reverse("store:category-products",
+                                  kwargs={"pk": c["category"].pk}) +
+             "?descendants=true"),
+    Scenario("categories.create", "post", url("store:category-list"),
+             lambda c, i: {"name": f"new category {i}",
+                           "store_category": c["store_category"].pk},
+             user="owner"),
+    Scenario("brands.list", "get", url("store:brand-list")),
+    Scenario("brands.retrieve", "get", url("store:brand-detail", pk="brand")),
+    Scenario("products.list", "get", url("store:supermarket-product-list")),
+    Scenario("products.list_compact", "get",
+             lambda c, i: reverse("store:supermarket-product-list") +
+             "?compact=true"),
+    Scenario("products.list_projected", "get",
+             lambda c, i: reverse("store:supermarket-product-list") +
+             "?compact=true&fields=id,name,sale_price,featured_image"
+             "&image_size=thumb"),
+    Scenario("products.search", "get",
+             lambda c, i: reverse("store:supermarket-product-list") +
+             "?search=milk"),
+    Scenario("products.retrieve", "get",
+             url("store:supermarket-product-detail", pk="product")),
+    Scenario("products.rate", "post",
+             url("store:supermarket-product-rate", pk="product"),
+             lambda c, i: {"score": i % 5 + 1}, user="owner"),
+    Scenario("products.create", "post", url("store:supermarket-product-list"),
+             lambda c, i: {"name": f"new product {i}", "sale_price": 10000,
+                           "stock": 10, "discount": 10, "store": c["store"].pk},
+             user="owner"),
+    Scenario("products.bulk_import", "post",
+             url("store:supermarket-product-bulk"), bulk_rows, user="owner",
+             format=None, content_type="application/x-ndjson"),
+    Scenario("products.upload_image", "post",
+             url("store:upload-product-image-list"), product_image,
+             user="owner", format="multipart"),
+    Scenario("products.delete_image", "delete", uploaded_image, user="owner"),
+    Scenario("wishlist.add", "post", url("store:wish-list-item-list"),
+             lambda c, i: {"product": c["product"].pk}, user="owner"),
+    Scenario("wishlist.remove", "delete", wishlist_item, user="owner"),
+    # otp_auth_user/urls.py
+    Scenario("user.signup", "post", url("user:signup"),
+             lambda c, i: {"phone": new_phone(c, i), "full_name": "new user"}),
+    Scenario("user.quick_signup", "post", url("user:quick-signup"),
+             lambda c, i: {"phone": str(c["owner"].phone), "full_name": "owner"}),
+    Scenario("user.request_vcode", "post", url("user:request-vcode"),
+             lambda c, i: {"phone": str(c["otp_user"].phone)}),
+    Scenario("user.obtain_token", "post", url("user:obtain-token"),
+             lambda c, i: {"phone": str(c["otp_user"].phone),
+                           "verification_code": verification_code(c, i)}),
+    Scenario("user.token_refresh", "post", url("user:token-refresh"),
+             lambda c, i: {"refresh": c["tokens"]["owner"]["refresh"]}),
+    Scenario("user.profile", "get", url("user:profile"), user="owner"),
+    Scenario("user.profile_update", "patch", url("user:profile"),
+             lambda c, i: {"full_name": f"owner {i}"}, user="owner"),
+    Scenario("user.verify_phone_number", "post", url("user:verify-phone-number"),
+             lambda c, i: {"verification_code": verification_code(c, i)},
+             user="otp_user"),
+]
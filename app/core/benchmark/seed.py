@@ -0,0 +1,138 @@
+"""
+Seeds a synthetic catalogue for benchmarks.
+
+Rows are inserted with bulk inserts, except categories which keep their
+materialized path in save(). The random generator is seeded, so the same
+sizes give the same catalogue on every run. Every image row points at
+one real file, so variants can be made of it.
+"""
+import io
+import random
+
+from core.helpers import get_tokens_for_user
+from core.models import StoreCategory
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from store import models
+from store.cache import invalidate
+from store.search import build_search_document, update_search_vectors
+
+SIZES = {
+    "small": {"users": 20, "stores": 10, "categories": 20, "brands": 10,
+              "products": 200, "images": 200},
+    "medium": {"users": 200, "stores": 100, "categories": 100, "brands": 50,
+               "products": 5000, "images": 5000},
+    "large": {"users": 2000, "stores": 1000, "categories": 500, "brands": 200,
+              "products": 100000, "images": 100000},
+}
+PRODUCT_WORDS = ["milk", "rice", "tea", "pasta", "cheese", "yogurt", "bread",
+                 "شیر", "برنج", "چای", "ماکارونی", "پنیر", "ماست", "نان"]
+TEHRAN = (35.6892, 51.3890)
+BATCH_SIZE = 1000
+
+
+def sample_phone(number):
+    return f"+98912{number:07d}"
+
+
+def save_sample_image(pixels=1280):
+    """ Saves a PNG in the storage of product images, returns its name """
+    image = io.BytesIO()
+    Image.new("RGB", (pixels, pixels), "white").save(image, "PNG")
+    storage = models.ProductImage._meta.get_field("image").storage
+    return storage.save("uploads/product/benchmark.png",
+                        ContentFile(image.getvalue()))
+
+
+def seed_catalogue(users, stores, categories, brands, products, images, seed=0):
+    """
+    Creates the catalogue and returns a dict of the objects
+    benchmark scenarios need, at least one row of each model is created
+    """
+    rng = random.Random(seed)
+
+    user_objs = []
+    for i in range(max(users, 2)):
+        user = get_user_model()(phone=sample_phone(i), full_name=f"user {i}",
+                                phone_is_verified=True)
+        user.set_unusable_password()
+        user_objs.append(user)
+    user_objs = get_user_model().objects.bulk_create(user_objs, BATCH_SIZE)
+    # The first user owns the first store, the second verifies its phone
+    owner, otp_user = user_objs[0], user_objs[1]
+
+    store_category = StoreCategory.objects.create(name="Supermarket")
+    city = models.City.objects.create(name="Tehran")
+    store_objs = models.Store.objects.bulk_create([
+        models.Store(
+            name=f"store {i}", address=f"street {i}",
+            lat=round(TEHRAN[0] + rng.uniform(-0.2, 0.2), 6),
+            long=round(TEHRAN[1] + rng.uniform(-0.2, 0.2), 6),
+            store_score=round(rng.uniform(0, 5), 1),
+            city=city, store_category=store_category,
+            owner=user_objs[i % len(user_objs)],
+            is_open=rng.random() < 0.7, is_verified=i == 0 or rng.random() < 0.9)
+        for i in range(max(stores, 1))
+    ], BATCH_SIZE)
+
+    category_objs = []
+    for i in range(max(categories, 1)):
+        # About a fifth of categories are roots
+        parent = (rng.choice(category_objs)
+                  if category_objs and rng.random() < 0.8 else None)
+        category_objs.append(models.Category.objects.create(
+            name=f"category {i}", store_category=store_category,
+            parent_category=parent, is_verified=True))
+
+    brand_objs = models.Brand.objects.bulk_create([
+        models.Brand(name_fa=f"برند {i}", name_en=f"brand {i}",
+                     is_verified=True)
+        for i in range(max(brands, 1))
+    ], BATCH_SIZE)
+
+    product_objs = []
+    for i in range(max(products, 1)):
+        brand = rng.choice(brand_objs) if rng.random() < 0.8 else None
+        name = f"{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_WORDS)} {i % 50}"
+        product_objs.append(models.SupermarketProduct(
+            name=name, sale_price=rng.randrange(1000, 500000, 500),
+            stock=rng.randrange(100), discount=rng.choice([None, 5, 10]),
+            product_score=round(rng.uniform(0, 5), 1),
+            is_verified=i == 0 or rng.random() < 0.9,
+            brand=brand, category=category_objs[i % len(category_objs)],
+            store=store_objs[i % len(store_objs)],
+            search_document=build_search_document(name, brand)))
+    for start in range(0, len(product_objs), BATCH_SIZE):
+        models.SupermarketProduct.objects.bulk_create(
+            product_objs[start:start + BATCH_SIZE])
+    update_search_vectors(models.Product.objects.all())
+
+    image = save_sample_image()
+    models.ProductImage.objects.bulk_create([
+        models.ProductImage(product=product_objs[i % len(product_objs)],
+                            image=image,
+                            is_featured=i < len(product_objs))
+        for i in range(images)
+    ], BATCH_SIZE)
+    models.update_featured_images(models.Product.objects.values("pk"))
+
+    # Bulk inserts send no signals
+    invalidate(models.Store, models.Category, models.Brand, models.Product,
+               models.SupermarketProduct, models.ProductImage)
+
+    return {
+        "owner": owner,
+        "otp_user": otp_user,
+        "store": store_objs[0],
+        "store_category": store_category,
+        "city": city,
+        "category": category_objs[0],
+        "brand": brand_objs[0],
+        "product": product_objs[0],
+        "image": image,
+        "next_phone": len(user_objs),
+        "tokens": {"owner": get_tokens_for_user(owner),
+                   "otp_user": get_tokens_for_user(otp_user)},
+    }
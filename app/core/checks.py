@@ -0,0 +1,38 @@
+"""
+Checks of settings that depend on how the app is served.
+
+Django runs system checks with management commands only, so CoreConfig
+also runs check_otp_cache() when the app is loaded and refuses to start
+a server whose processes would not share verification codes.
+"""
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+def worker_processes():
+    """ Processes serving the app, uWSGI workers or ASGI_WORKERS of uvicorn """
+    try:
+        import uwsgi
+    except ImportError:
+        return int(os.environ.get("ASGI_WORKERS", 1))
+    return uwsgi.numproc
+
+
+@register(Tags.caches)
+def check_otp_cache(app_configs=None, **kwargs):
+    alias = settings.OTP_CHALLENGES["CACHE_ALIAS"]
+    processes = worker_processes()
+    if processes > 1 and isinstance(caches[alias], LocMemCache):
+        return [Error(
+            f"Verification codes are kept in the {alias!r} cache, a "
+            f"LocMemCache of one process, but {processes} processes "
+            "serve the app.",
+            hint="Use a cache shared by all processes for "
+                 "OTP_CHALLENGES['CACHE_ALIAS'], e.g. the default "
+                 "DatabaseCache of OTP_CACHE_BACKEND.",
+            id="core.E001")]
+    return []
@@ -0,0 +1,55 @@
+"""
+PostgreSQL backend that takes connections from a pool of the process,
+see core/db/pool.py. Pool options are set in the POOL key of the
+database settings, e.g. {"MAX_SIZE": 10, "TIMEOUT": 10}.
+"""
+import psycopg2.extras
+from django.db.backends.postgresql import base
+
+from core.db.pool import close_pools, get_pool
+
+
+def connect(conn_params, isolation_level=None):
+    """ Opens a connection like the postgresql backend does """
+    connection = base.Database.connect(**conn_params)
+    if isolation_level is not None \
+            and isolation_level != connection.isolation_level:
+        connection.set_session(isolation_level=isolation_level)
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection, loads=lambda x: x)
+    return connection
+
+
+class DatabaseCreation(base.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database in use
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_pool(self, conn_params):
+        key = (self.alias, tuple(sorted(
+            (name, str(value)) for name, value in conn_params.items())))
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        return get_pool(key, lambda: connect(conn_params, isolation_level),
+                        name=self.alias, **self.settings_dict.get("POOL", {}))
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.checkout()
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # A connection closed in an atomic block stays referenced
+                # by this wrapper until rollback, so it is not shared
+                self.pool.checkin(self.connection,
+                                  discard=self.in_atomic_block)
@@ -0,0 +1,248 @@
+"""
+In-process pool of database connections.
+
+Django opens a connection per thread and closes it at the end of each
+request unless CONN_MAX_AGE keeps it open. With the pooled backend,
+see core/db/backends/postgresql_pool, closing gives the connection back
+to a pool of the worker process instead, so requests reuse connections
+and a worker never opens more than MAX_SIZE of them.
+"""
+import os
+import threading
+import time
+
+from psycopg2 import OperationalError
+from psycopg2 import extensions
+
+DEFAULTS = {
+    # Connections opened when the pool is created and kept when idle
+    "MIN_SIZE": 0,
+    # Connections the pool opens at most, others wait for one to be returned
+    "MAX_SIZE": 10,
+    # Seconds to wait for a connection before giving up
+    "TIMEOUT": 10,
+    # Seconds after which a connection is closed instead of reused
+    "MAX_LIFETIME": 60 * 60,
+    # Seconds a connection may be idle before it is checked on checkout
+    "HEALTH_CHECK_INTERVAL": 30,
+}
+
+
+class PoolTimeout(OperationalError):
+    """ No connection was returned to a full pool in time """
+
+
+class PooledConnection:
+    """ A connection of the pool with its timestamps """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of connections opened by connect(), connections are
+    checked out with checkout() and returned with checkin()
+    """
+
+    def __init__(self, connect, name="default", **options):
+        self.connect = connect
+        self.name = name
+        for key, value in DEFAULTS.items():
+            setattr(self, key.lower(), options.get(key, value))
+        self.pid = os.getpid()
+        self.closed = False
+        self.idle = []
+        self.in_use = {}
+        self.opening = 0
+        self.waiting = 0
+        self.lock = threading.Condition()
+        self.counters = dict.fromkeys(
+            ["created", "closed", "checkouts", "timeouts",
+             "health_check_failures"], 0)
+        self.wait_ms_total = self.wait_ms_max = 0.0
+        for _ in range(self.min_size):
+            self.idle.append(self._open())
+
+    @property
+    def size(self):
+        return len(self.idle) + len(self.in_use) + self.opening
+
+    def _open(self):
+        pooled = PooledConnection(self.connect())
+        with self.lock:
+            self.counters["created"] += 1
+        return pooled
+
+    def _close(self, pooled):
+        with self.lock:
+            self.counters["closed"] += 1
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def _check_fork(self):
+        # Connections opened before uWSGI forked its workers belong to the
+        # master, closing them here would end its sessions, so forget them
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.idle, self.in_use, self.opening = [], {}, 0
+
+    def _is_expired(self, pooled):
+        return time.monotonic() - pooled.created > self.max_lifetime
+
+    def _is_usable(self, pooled):
+        """ Checks the connection when it has been idle for a while """
+        if self._is_expired(pooled):
+            return False
+        if time.monotonic() - pooled.last_used < self.health_check_interval \
+                and not pooled.connection.closed:
+            return True
+        try:
+            with pooled.connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pooled.connection.rollback()
+        except Exception:
+            with self.lock:
+                self.counters["health_check_failures"] += 1
+            return False
+        return True
+
+    def checkout(self):
+        """ Returns an idle connection, a new one, or waits for one """
+        start = time.monotonic()
+        with self.lock:
+            self._check_fork()
+            while not self.idle and self.size >= self.max_size:
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No connection of pool \"{self.name}\" was available "
+                        f"within {self.timeout} seconds, {self.max_size} "
+                        f"are in use")
+                self.waiting += 1
+                try:
+                    self.lock.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            pooled = self.idle.pop() if self.idle else None
+            if pooled is None:
+                # Reserve the slot, the connection is opened out of the lock
+                self.opening += 1
+            else:
+                self.in_use[id(pooled.connection)] = pooled
+            self.counters["checkouts"] += 1
+            waited = (time.monotonic() - start) * 1000
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+
+        if pooled is not None and not self._is_usable(pooled):
+            with self.lock:
+                del self.in_use[id(pooled.connection)]
+                self.opening += 1
+            self._close(pooled)
+            pooled = None
+
+        if pooled is None:
+            try:
+                pooled = self._open()
+            finally:
+                with self.lock:
+                    self.opening -= 1
+                    if pooled is None:
+                        self.lock.notify()
+                    else:
+                        self.in_use[id(pooled.connection)] = pooled
+        return pooled.connection
+
+    def checkin(self, connection, discard=False):
+        """
+        Gives a connection back, it is closed instead when it is broken,
+        expired, the pool was closed or discard is True
+        """
+        with self.lock:
+            self._check_fork()
+            pooled = self.in_use.pop(id(connection), None)
+        if pooled is None:
+            # Checked out before a fork
+            return
+        discard = discard or self.closed or self._is_expired(pooled) \
+            or not self._reset(connection)
+        if discard:
+            self._close(pooled)
+        pooled.last_used = time.monotonic()
+        with self.lock:
+            if not discard:
+                self.idle.append(pooled)
+            self.lock.notify()
+
+    def _reset(self, connection):
+        """ Rolls back an open transaction, False if the connection is broken """
+        if connection.closed:
+            return False
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                return False
+        return True
+
+    def close(self):
+        """ Closes idle connections, ones in use are closed when returned """
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        for pooled in idle:
+            self._close(pooled)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "name": self.name,
+                "pid": self.pid,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self.size,
+                "idle": len(self.idle),
+                "in_use": len(self.in_use) + self.opening,
+                "waiting": self.waiting,
+                **self.counters,
+                "wait_ms_avg": round(
+                    self.wait_ms_total / (self.counters["checkouts"] or 1), 3),
+                "wait_ms_max": round(self.wait_ms_max, 3),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, connect, name="default", **options):
+    """ Returns the pool of key, creating it with connect and options """
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(connect, name, **options)
+    return pool
+
+
+def all_pools():
+    return list(_pools.values())
+
+
+def close_pools():
+    """ Closes idle connections of all pools and forgets them """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
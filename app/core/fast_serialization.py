@@ -0,0 +1,216 @@
+"""
+Read-only fast path of ModelSerializer for list responses.
+
+compile_serializer() turns a serializer into a RowPlan, the .values()
+lookups its fields read and a precompiled converter per field. Rows are
+rendered to the same data serializer.data gives for model instances,
+without building instances or the get_attribute()/to_representation()
+calls DRF makes for every field of every row. Nested many serializers
+are loaded with one query per page, like prefetch_related().
+
+Fields that can't be read from a row, e.g. SerializerMethodField,
+properties or serializers that override to_representation() without
+"finish_representation()", leave the serializer without a plan and it
+is rendered by DRF as usual.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Fields whose to_representation() returns database values as they are
+IDENTITY_FIELDS = {serializers.IntegerField, serializers.CharField,
+                   serializers.SlugField, serializers.BooleanField}
+
+
+class Unsupported(Exception):
+    """ A field of the serializer can't be read from .values() rows """
+
+
+def _file_converter(field, model_field):
+    """ What FileField.to_representation() does with a stored file name """
+    if not getattr(field, "use_url", True):
+        return None
+    storage = model_field.storage
+    request = field.context.get("request")
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _converter(field, model_field):
+    if isinstance(field, serializers.FileField):
+        return _file_converter(field, model_field)
+    if type(field) in IDENTITY_FIELDS:
+        return None
+    return field.to_representation
+
+
+def _check_representation(serializer):
+    overridden = (type(serializer).to_representation
+                  is not serializers.Serializer.to_representation)
+    if overridden and not hasattr(serializer, "finish_representation"):
+        raise Unsupported(type(serializer).__name__)
+
+
+class RowPlan:
+    """ Renders .values() rows the way serializer renders model instances """
+
+    def __init__(self, serializer, model, prefix=""):
+        _check_representation(serializer)
+        self.serializer = serializer
+        self.model = model
+        self.pk_key = f"{prefix}pk"
+        self.lookups = [self.pk_key]
+        # (field name, kind, row key, converter or nested plan)
+        self.slots = []
+        # Nested many serializers, (field name, foreign key, plan)
+        self.many = []
+        self.finish_keys = [(name, f"{prefix}{name}") for name in
+                            getattr(serializer, "query_columns", [])]
+        self.lookups.extend(key for _, key in self.finish_keys)
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*" or len(field.source_attrs) != 1:
+                raise Unsupported(name)
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                raise Unsupported(name)
+            key = f"{prefix}{field.source}"
+
+            if isinstance(field, serializers.ListSerializer):
+                if not (model_field.one_to_many
+                        and isinstance(field.child, serializers.ModelSerializer)):
+                    raise Unsupported(name)
+                if (type(field).to_representation
+                        is not serializers.ListSerializer.to_representation):
+                    raise Unsupported(name)
+                plan = RowPlan(field.child, model_field.related_model)
+                foreign_key = model_field.field.name
+                if foreign_key not in plan.lookups:
+                    plan.lookups.append(foreign_key)
+                self.many.append((name, foreign_key, plan))
+                self.slots.append((name, "many", None, None))
+            elif isinstance(field, serializers.ModelSerializer):
+                if not (model_field.many_to_one or model_field.one_to_one):
+                    raise Unsupported(name)
+                plan = RowPlan(field, model_field.related_model, f"{key}__")
+                self.lookups.extend(plan.lookups)
+                self.slots.append((name, "one", f"{key}__pk", plan))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                if field.pk_field is not None or not (
+                        model_field.many_to_one or model_field.one_to_one):
+                    raise Unsupported(name)
+                self.lookups.append(key)
+                self.slots.append((name, "value", key, None))
+            elif model_field.is_relation or not model_field.concrete \
+                    or isinstance(field, serializers.RelatedField):
+                raise Unsupported(name)
+            else:
+                self.lookups.append(key)
+                self.slots.append((name, "value", key,
+                                   _converter(field, model_field)))
+
+        # Lookups of nested plans may repeat those of their parent
+        self.lookups = list(dict.fromkeys(self.lookups))
+
+    def render_row(self, row):
+        data = {}
+        for name, kind, key, convert in self.slots:
+            if kind == "many":
+                data[name] = []
+                continue
+            value = row[key]
+            if value is None:
+                data[name] = None
+            elif kind == "one":
+                data[name] = convert.render_row(row)
+            elif convert is None:
+                data[name] = value
+            else:
+                data[name] = convert(value)
+        if self.finish_keys:
+            data = self.serializer.finish_representation(
+                data, {name: row[key] for name, key in self.finish_keys})
+        return data
+
+    def render(self, rows):
+        """ Returns the list serializer.data would be for rows """
+        rows = list(rows)
+        data = [self.render_row(row) for row in rows]
+        if self.many and rows:
+            pks = [row[self.pk_key] for row in rows]
+            for name, foreign_key, plan in self.many:
+                # Children of all rows are loaded and rendered at once
+                children = list(plan.model._default_manager.filter(**{
+                    f"{foreign_key}__in": pks}).values(*plan.lookups))
+                grouped = {}
+                for child, item in zip(children, plan.render(children)):
+                    grouped.setdefault(child[foreign_key], []).append(item)
+                for row, item in zip(rows, data):
+                    item[name] = grouped.get(row[self.pk_key], [])
+        return data
+
+    def supports(self, queryset):
+        """ False when queryset prefetches a custom queryset of a nested field """
+        return not any(
+            isinstance(lookup, Prefetch) and lookup.queryset is not None
+            for lookup in queryset._prefetch_related_lookups)
+
+    def values(self, queryset):
+        """ queryset as .values() rows of the plan """
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+
+def compile_serializer(serializer, model):
+    """ Returns the RowPlan of a serializer instance, None if it has none """
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return None
+    try:
+        return RowPlan(serializer, model)
+    except Unsupported:
+        return None
+
+
+def list_response(view, queryset, serializer):
+    """
+    Response of view listing queryset with serializer (an instance with
+    context), rendered from rows when FAST_LIST_SERIALIZATION is on and
+    the serializer and paginator of view support it
+    """
+    plan = None
+    paginates_rows = getattr(view.paginator, "paginates_rows", None)
+    if settings.FAST_LIST_SERIALIZATION and (
+            paginates_rows is None or paginates_rows(view.request)):
+        plan = compile_serializer(serializer, queryset.model)
+    if plan is not None and plan.supports(queryset):
+        queryset = plan.values(queryset)
+    else:
+        plan = None
+
+    page = view.paginate_queryset(queryset)
+    items = queryset if page is None else page
+    if plan is not None:
+        data = plan.render(items)
+    else:
+        data = type(serializer)(items, many=True,
+                                context=serializer.context).data
+    if page is None:
+        return Response(data)
+    return view.get_paginated_response(data)
+
+
+class FastListMixin:
+    """ Viewset mixin, renders "list" from .values() rows, see list_response() """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return list_response(self, queryset, self.get_serializer())
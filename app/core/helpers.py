@@ -1,9 +1,13 @@
-import pyotp
+from core.otp import issue_challenge, verify_challenge
+from core.sms import send_sms
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
 def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
+    # Claims of core.authentication.TokenUserAuthentication
+    refresh["phone_is_verified"] = user.phone_is_verified
+    refresh["is_staff"] = user.is_staff
 
     return {
         'refresh': str(refresh),
@@ -11,32 +15,11 @@ def get_tokens_for_user(user):
     }
 
 
-def generate_key(model):
-    """ User otp key generator """
-    key = pyotp.random_base32()
-    if is_unique(model, key):
-        return key
-    generate_key()
-
-
-def generate_totp_for_instance(instance, digits=5, interval=600):
-    return pyotp.TOTP(instance.base32_key, digits=digits, interval=interval)
-
-
-def is_unique(model, key):
-    try:
-        model.objects.get(base32_key=key)
-    except model.DoesNotExist:
-        return True
-    return False
-
-
 class VerifyInstancePhoneNumber:
     """
     Verifies phone number of an instance e.g(User,Store,etc),
     by generating an OTP for it and sends it through sms,
-    object must have this 3 fields:
-    - base32_key
+    object must have this 2 fields:
     - phone
     - phone_is_verified
     """
@@ -48,20 +31,22 @@ class VerifyInstancePhoneNumber:
         self.model = model
 
     def request_verification(self):
-        """ generates a verification code for specific instance """
-        self.inc.base32_key = generate_key(self.model)
-        self.inc.phone_is_verified = False
-        self.inc.save()
-        totp = generate_totp_for_instance(self.inc)
-        print(f"{self.inc.phone}: {totp.now()}")
-        return totp
+        """
+        generates a verification code for specific instance and queues
+        its sms, it is sent in the background
+        """
+        code = issue_challenge(self.inc)
+        send_sms(self.inc.phone, f"Your verification code is {code}")
+        return code
 
     def submit_verification(self, verification_code):
-        """ generates a verification code for specific instance """
-        totp = generate_totp_for_instance(self.inc)
-        if totp.verify(verification_code):
+        """
+        verifies the code of specific instance, the instance is only
+        saved when its phone number was not verified yet
+        """
+        if not verify_challenge(self.inc, str(verification_code)):
+            return False
+        if not self.inc.phone_is_verified:
             self.inc.phone_is_verified = True
-            self.inc.base32_key = ""
-            self.inc.save()
-            return True
-        return False
+            self.inc.save(update_fields=["phone_is_verified"])
+        return True
@@ -0,0 +1,112 @@
+import json
+import platform
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark.runner import compare, run_scenarios
+from core.benchmark.scenarios import SCENARIOS
+from core.benchmark.seed import SIZES, seed_catalogue
+
+
+class Command(BaseCommand):
+    """
+    Django command to benchmark the API endpoints in-process,
+    a synthetic catalogue is seeded in a throwaway database
+    """
+    help = "Benchmarks API endpoints and optionally fails on regressions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", choices=SIZES, default="small",
+                            help="Catalogue size preset")
+        for name in SIZES["small"]:
+            parser.add_argument(f"--{name}", type=int,
+                                help=f"Number of {name}, overrides --size")
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--scenario", action="append", default=[],
+                            help="Only run scenarios starting with this name, "
+                                 "e.g. \"stores\" or \"user.signup\"")
+        parser.add_argument("--no-response-cache", action="store_true",
+                            help="Disable the store response cache")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+        parser.add_argument("--baseline",
+                            help="JSON results to compare with, regressions fail")
+        parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Allowed growth of latency and allocations")
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] if options[name] is not None else size
+                 for name, size in SIZES[options["size"]].items()}
+        scenarios = [scenario for scenario in SCENARIOS
+                     if not options["scenario"] or
+                     scenario.name.startswith(tuple(options["scenario"]))]
+        if not scenarios:
+            raise CommandError("No scenario matches --scenario.")
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)["scenarios"]
+
+        results = self.run(sizes, scenarios, options)
+        report = {
+            "meta": {
+                "sizes": sizes,
+                "iterations": options["iterations"],
+                "response_cache": not options["no_response_cache"],
+                "python": platform.python_version(),
+                "django": django.get_version(),
+            },
+            "scenarios": results,
+        }
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<36} p50 {result['p50_ms']:>8.2f}ms  "
+                f"p95 {result['p95_ms']:>8.2f}ms  p99 {result['p99_ms']:>8.2f}ms  "
+                f"{result['queries']:>3} queries  "
+                f"{result['response_kb']:>7.1f}KB body  "
+                f"{result['peak_allocated_kb']:>8.1f}KB peak  {result['statuses']}")
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options["tolerance"])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions found.")
+            self.stdout.write(self.style.SUCCESS("No regressions found."))
+
+    def run(self, sizes, scenarios, options):
+        """ Seeds a throwaway database and runs scenarios against it """
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        test_settings["NAME"] = f"{connection.settings_dict['NAME']}_benchmark"
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0,
+                                                      autoclobber=True)
+        try:
+            cache_settings = {} if not options["no_response_cache"] else {
+                "STORE_RESPONSE_CACHE": {"ENABLED": False,
+                                         "CACHE_ALIAS": "default", "TIMEOUT": 0}}
+            # Scenarios repeat requests of one client, see core/throttling.py
+            cache_settings["THROTTLING"] = dict(settings.THROTTLING,
+                                                ENABLED=False)
+            # Uploaded images are thrown away too
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root, **cache_settings):
+                self.stdout.write(f"Seeding {sizes}...")
+                catalogue = seed_catalogue(**sizes)
+                return run_scenarios(scenarios, catalogue,
+                                     options["iterations"], options["warmup"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
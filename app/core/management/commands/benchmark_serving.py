@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark.concurrency import run_load
+
+DEFAULT_PATHS = ["/store/stores/", "/store/categories/", "/store/brands/",
+                 "/store/supermarket-products/",
+                 "/store/supermarket-products/?search=milk"]
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare serving modes under concurrency, e.g.
+    --target uwsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001
+    """
+    help = "Load tests running servers with concurrent and slow clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True,
+                            help="NAME=URL of a running server")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help="Path to request, defaults to catalogue lists")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--slow-clients", type=float, default=0.2,
+                            help="Fraction of clients that send slowly")
+        parser.add_argument("--slow-delay", type=float, default=0.05,
+                            help="Seconds between request lines of slow clients")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        targets = {}
+        for target in options["target"]:
+            name, sep, url = target.partition("=")
+            if not sep or not url.startswith("http://"):
+                raise CommandError(f"Target \"{target}\" must be NAME=http://...")
+            targets[name] = url
+
+        results = {}
+        for name, url in targets.items():
+            results[name] = asyncio.run(run_load(
+                url, options["paths"] or DEFAULT_PATHS,
+                concurrency=options["concurrency"],
+                requests=options["requests"],
+                slow_clients=options["slow_clients"],
+                slow_delay=options["slow_delay"]))
+            result = results[name]
+            self.stdout.write(
+                f"{name:<10} {result['throughput_rps']:>8.1f} req/s  "
+                f"p50 {result.get('p50_ms', 0):>8.2f}ms  "
+                f"p95 {result.get('p95_ms', 0):>8.2f}ms  "
+                f"p99 {result.get('p99_ms', 0):>8.2f}ms  "
+                f"{result['errors']} errors  {result['statuses']}")
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(results, output_file, indent=2)
@@ -1,20 +1,72 @@
+import random
 import time
 
-from django.core.management.base import BaseCommand
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
 
 
 class Command(BaseCommand):
-    """ Django command to pause excuation until database is available """
+    """
+    Django command to pause excuation until database is available,
+    it retries with exponential backoff and jitter until --timeout
+    """
+    help = "Waits until the database answers queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--timeout", type=float, default=60,
+                            help="Seconds to wait in total before failing")
+        parser.add_argument("--interval", type=float, default=0.1,
+                            help="Seconds to wait after the first attempt")
+        parser.add_argument("--max-interval", type=float, default=5,
+                            help="Longest wait between attempts")
+        parser.add_argument("--check-migrations", action="store_true",
+                            help="Also wait until all migrations are applied")
+
+    def probe(self, connection, check_migrations=False):
+        """ Returns why the database is not ready, or None when it is """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if check_migrations:
+            executor = MigrationExecutor(connection)
+            plan = executor.migration_plan(
+                executor.loader.graph.leaf_nodes())
+            if plan:
+                return f"{len(plan)} migrations are not applied"
+        return None
 
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
+        connection = connections[options["database"]]
+        deadline = time.monotonic() + options["timeout"]
+        interval = options["interval"]
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
-        self.stdout.write(self.style.SUCCESS("Database available!"))  # noqa: W391
\ No newline at end of file
+                reason = self.probe(connection, options["check_migrations"])
+            except OperationalError as error:
+                message = " ".join(str(error).split())
+                reason = f"Database unavailable ({message})"
+                # The next attempt opens a new connection
+                connection.close()
+            if reason is None:
+                break
+
+            # Full jitter, so restarted containers do not retry in lockstep
+            delay = random.uniform(0, interval)
+            if time.monotonic() + delay > deadline:
+                raise CommandError(f"{reason}, gave up after {attempt} "
+                                   f"attempts in {options['timeout']} seconds")
+            self.stdout.write(f"{reason}, waiting {delay:.2f} seconds...")
+            time.sleep(delay)
+            interval = min(interval * 2, options["max_interval"])
+
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            stats = pool.stats()
+            self.stdout.write(f"Connection pool of {stats['min_size']} to "
+                              f"{stats['max_size']} connections")
+        self.stdout.write(self.style.SUCCESS("Database available!"))
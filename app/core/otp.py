@@ -0,0 +1,61 @@
+"""
+One time password challenges of phone number verification.
+
+Challenges live in the cache instead of the row of the user, so codes
+are requested and submitted without writing to the user table. A
+challenge keeps a keyed hash of its code, not the code, and is removed
+when it is answered, after MAX_ATTEMPTS wrong codes or TIMEOUT seconds.
+"""
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_cache():
+    return caches[settings.OTP_CHALLENGES["CACHE_ALIAS"]]
+
+
+def challenge_key(instance):
+    return f"otp:{instance._meta.label_lower}:{instance.pk}"
+
+
+def hash_code(key, code):
+    return hmac.new(settings.SECRET_KEY.encode(), f"{key}:{code}".encode(),
+                    hashlib.sha256).hexdigest()
+
+
+def issue_challenge(instance):
+    """ Replaces the challenge of instance with a new one, returns its code """
+    options = settings.OTP_CHALLENGES
+    key = challenge_key(instance)
+    code = str(secrets.randbelow(10 ** options["DIGITS"])).zfill(
+        options["DIGITS"])
+    get_cache().set_many({key: hash_code(key, code), f"{key}:attempts": 0},
+                         options["TIMEOUT"])
+    return code
+
+
+def verify_challenge(instance, code):
+    """ Returns True when code answers the challenge of instance """
+    cache = get_cache()
+    key = challenge_key(instance)
+    code_hash = cache.get(key)
+    if code_hash is None:
+        return False
+    try:
+        attempts = cache.incr(f"{key}:attempts")
+    except ValueError:
+        # Expired since it was read
+        return False
+    if attempts > settings.OTP_CHALLENGES["MAX_ATTEMPTS"]:
+        cache.delete_many([key, f"{key}:attempts"])
+        return False
+    if not hmac.compare_digest(code_hash, hash_code(key, code)):
+        return False
+    # Only the request that deletes the challenge answers it
+    answered = cache.delete(key)
+    cache.delete(f"{key}:attempts")
+    return answered
@@ -0,0 +1,164 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _related_model_field(model, name):
+    """ Returns the relation field "name" of model or None """
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _is_single_valued(field):
+    """ Forward FK/OneToOne (or reverse OneToOne) can be joined """
+    return field.many_to_one or field.one_to_one
+
+
+def collect_related_lookups(serializer, model, prefix="", prefetching=False):
+    """
+    Walks fields of serializer and returns (select_related, prefetch_related)
+    lookups needed to render model instances without extra queries.
+    - nested serializers and non-pk related fields on a FK -> select_related
+    - anything many valued (many=True, reverse FK, m2m)    -> prefetch_related
+    - PrimaryKeyRelatedField on a FK needs no lookup, "<fk>_id" is used
+    """
+    select, prefetch = [], []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        many = isinstance(field, (serializers.ListSerializer,
+                                  serializers.ManyRelatedField))
+        if isinstance(field, serializers.ListSerializer):
+            nested = field.child
+        elif isinstance(field, serializers.ManyRelatedField):
+            nested = field.child_relation
+        else:
+            nested = field
+
+        is_model_serializer = isinstance(nested, serializers.ModelSerializer)
+        if not (is_model_serializer or isinstance(nested, serializers.RelatedField)):
+            continue
+
+        # e.g. source="store.owner" traverses "store" then "owner"
+        current_model, path, to_prefetch = model, prefix, prefetching
+        for attr in field.source_attrs:
+            relation = _related_model_field(current_model, attr)
+            if relation is None:
+                break
+            path = f"{path}__{attr}" if path else attr
+            to_prefetch = to_prefetch or not _is_single_valued(relation)
+            current_model = relation.related_model
+        else:
+            pk_only = (not many
+                       and not is_model_serializer
+                       and len(field.source_attrs) == 1
+                       and nested.use_pk_only_optimization())
+            if pk_only:
+                continue
+
+            (prefetch if to_prefetch else select).append(path)
+
+            if is_model_serializer:
+                nested_select, nested_prefetch = collect_related_lookups(
+                    nested, current_model, path, to_prefetch)
+                select.extend(nested_select)
+                prefetch.extend(nested_prefetch)
+
+    return select, prefetch
+
+
+def collect_columns(serializer, model, prefix=""):
+    """
+    Returns "only()" lookups of the columns that serializer renders,
+    with those of joined nested serializers, or None when a field reads
+    a model attribute whose columns can't be told e.g. a property.
+    - reverse and many to many relations need no column, they are prefetched
+    - attributes the model doesn't have are annotations or left out
+    - "query_columns" of serializer are columns it reads besides its fields
+    """
+    columns = [f"{prefix}{name}" for name in
+               [model._meta.pk.name, *getattr(serializer, "query_columns", [])]]
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            return None
+
+        attr = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if hasattr(model, attr):
+                return None
+            continue
+        if not model_field.concrete or model_field.many_to_many:
+            continue
+
+        columns.append(f"{prefix}{model_field.name}")
+        if len(field.source_attrs) > 1:
+            # e.g. source="store.owner", the traversed rows are loaded whole
+            continue
+        if model_field.is_relation and isinstance(
+                field, serializers.ModelSerializer):
+            nested = collect_columns(field, model_field.related_model,
+                                     f"{prefix}{model_field.name}__")
+            if nested is None:
+                return None
+            columns.extend(nested)
+
+    return columns
+
+
+def plan_queryset(queryset, serializer, only_rendered=False):
+    """
+    Applies select_related/prefetch_related that serializer (a class or
+    an instance) needs to queryset, lookups that are already prefetched
+    are kept as they are. With only_rendered, columns that are not
+    rendered are not fetched either.
+    """
+    if isinstance(serializer, type):
+        if not issubclass(serializer, serializers.ModelSerializer):
+            return queryset
+        serializer = serializer()
+    elif not isinstance(serializer, serializers.ModelSerializer):
+        return queryset
+
+    select, prefetch = collect_related_lookups(serializer, queryset.model)
+
+    existing = {
+        lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        for lookup in queryset._prefetch_related_lookups
+    }
+    prefetch = [lookup for lookup in prefetch if lookup not in existing]
+
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only_rendered:
+        columns = collect_columns(serializer, queryset.model)
+        if columns is not None:
+            queryset = queryset.only(*columns)
+    return queryset
+
+
+class QueryPlanningMixin:
+    """
+    Viewset mixin, applies the related lookups that the serializer
+    of the view needs, so listing N objects costs a constant number of queries
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer()
+        # Columns that are not rendered are only left out of projected
+        # reads e.g. "?fields=", see store.serializers.FieldProjectionMixin.
+        # Deferring a few columns costs more than fetching them.
+        return plan_queryset(queryset, serializer, only_rendered=getattr(
+            serializer, "projected", False))
@@ -0,0 +1,52 @@
+"""
+Outbound SMS, messages are queued by send_sms() and sent in the
+background by the provider of the SMS setting, see core/sms/queue.py
+"""
+import atexit
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from .queue import Message, SMSQueue
+
+_queue = None
+_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        with _lock:
+            if _queue is None:
+                options = settings.SMS
+                provider = import_string(options["PROVIDER"])(
+                    **options["OPTIONS"])
+                _queue = SMSQueue(
+                    provider, workers=options["WORKERS"],
+                    batch_size=options["BATCH_SIZE"],
+                    batch_wait=options["BATCH_WAIT"],
+                    max_attempts=options["MAX_ATTEMPTS"],
+                    retry_delay=options["RETRY_DELAY"],
+                    max_size=options["MAX_QUEUE_SIZE"])
+    return _queue
+
+
+def send_sms(phone, text):
+    """ Queues a text message to phone, returns False if it was dropped """
+    return get_queue().put(Message(str(phone), text))
+
+
+def close_queue(**kwargs):
+    global _queue
+    if kwargs.get("setting", "SMS") != "SMS":
+        return
+    with _lock:
+        sms_queue, _queue = _queue, None
+    if sms_queue is not None:
+        sms_queue.close()
+
+
+setting_changed.connect(close_queue)
+atexit.register(close_queue)
@@ -0,0 +1,62 @@
+"""
+SMS providers, a provider sends a batch of messages and returns the
+ones that failed. SMS["PROVIDER"] is the dotted path of the provider
+class and SMS["OPTIONS"] its keyword arguments.
+"""
+import json
+import sys
+import threading
+
+
+class BaseProvider:
+    """ Sends text messages, subclasses implement send_messages """
+
+    def __init__(self, **options):
+        self.options = options
+
+    def send_messages(self, messages):
+        """
+        Sends messages, returns the ones that failed and should be
+        retried, raising an error retries all of them
+        """
+        raise NotImplementedError
+
+
+class ConsoleProvider(BaseProvider):
+    """ Writes messages to stdout, for development """
+    lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with self.lock:
+            for message in messages:
+                sys.stdout.write(f"{message.phone}: {message.text}\n")
+            sys.stdout.flush()
+        return []
+
+
+class NullProvider(BaseProvider):
+    """ Drops messages, for benchmarks """
+
+    def send_messages(self, messages):
+        return []
+
+
+class FileProvider(BaseProvider):
+    """ Appends messages as JSON lines to the file of the "path" option """
+    lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with self.lock, open(self.options["path"], "a") as outbox:
+            for message in messages:
+                outbox.write(json.dumps(
+                    {"phone": message.phone, "text": message.text}) + "\n")
+        return []
+
+
+class MemoryProvider(BaseProvider):
+    """ Keeps sent messages in MemoryProvider.outbox, for tests """
+    outbox = []
+
+    def send_messages(self, messages):
+        self.outbox.extend(messages)
+        return []
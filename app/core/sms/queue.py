@@ -0,0 +1,167 @@
+"""
+Outbound SMS queue.
+
+Messages are sent by background threads of each process, so requests
+return as soon as their message is queued. A thread takes up to
+BATCH_SIZE messages, waiting at most BATCH_WAIT seconds for more after
+the first one, and hands them to the provider at once. Failed messages
+are retried after exponential backoff with jitter and dropped after
+MAX_ATTEMPTS. Queued messages are lost if the process is killed, they
+are flushed when it exits normally.
+"""
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Message:
+    __slots__ = ("phone", "text", "attempts")
+
+    def __init__(self, phone, text):
+        self.phone = phone
+        self.text = text
+        self.attempts = 0
+
+
+class SMSQueue:
+    """ Queue of messages sent in batches by worker threads """
+
+    def __init__(self, provider, workers=1, batch_size=50, batch_wait=0.05,
+                 max_attempts=5, retry_delay=1, max_size=10000):
+        self.provider = provider
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_size = max_size
+        self.pid = None
+        self.lock = threading.Lock()
+        # Notified when a message is sent or dropped
+        self.done = threading.Condition()
+        self.counters = dict.fromkeys(
+            ["queued", "sent", "failed", "dropped", "batches"], 0)
+        self.pending = 0
+
+    def _start(self):
+        # Threads do not survive the fork of uWSGI workers, so they are
+        # started by the process that sends the first message
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.messages = queue.Queue(self.max_size)
+            self.threads = [
+                threading.Thread(target=self._work, name=f"sms-{number}",
+                                 daemon=True)
+                for number in range(self.workers)]
+            for thread in self.threads:
+                thread.start()
+
+    def put(self, message):
+        """ Queues message, returns False when the queue is full """
+        self._start()
+        with self.done:
+            self.pending += 1
+        try:
+            self.messages.put_nowait(message)
+        except queue.Full:
+            logger.error("SMS queue is full, dropped a message to %s",
+                         message.phone)
+            self._finish(dropped=1)
+            return False
+        with self.done:
+            self.counters["queued"] += 1
+        return True
+
+    def _next_batch(self):
+        """ Returns the next batch and whether the worker should stop """
+        message = self.messages.get()
+        if message is None:
+            return [], True
+        batch = [message]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                message = self.messages.get(
+                    timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if message is None:
+                return batch, True
+            batch.append(message)
+        return batch, False
+
+    def _work(self):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if not batch:
+                continue
+            try:
+                failed = list(self.provider.send_messages(batch) or [])
+            except Exception:
+                logger.exception("Sending %d messages failed", len(batch))
+                failed = batch
+            self._finish(sent=len(batch) - len(failed), batches=1)
+            if failed:
+                self._retry(failed)
+
+    def _retry(self, messages):
+        retry = []
+        for message in messages:
+            message.attempts += 1
+            if message.attempts < self.max_attempts:
+                retry.append(message)
+            else:
+                logger.error("Dropped a message to %s after %d attempts",
+                             message.phone, message.attempts)
+        self._finish(dropped=len(messages) - len(retry), failed=len(messages))
+        if retry:
+            attempts = max(message.attempts for message in retry)
+            delay = random.uniform(0, self.retry_delay * 2 ** (attempts - 1))
+            timer = threading.Timer(delay, self._requeue, [retry])
+            timer.daemon = True
+            timer.start()
+
+    def _requeue(self, messages):
+        for message in messages:
+            try:
+                self.messages.put_nowait(message)
+            except queue.Full:
+                logger.error("SMS queue is full, dropped a message to %s",
+                             message.phone)
+                self._finish(dropped=1)
+
+    def _finish(self, sent=0, dropped=0, **counters):
+        with self.done:
+            counters.update(sent=sent, dropped=dropped)
+            for name, count in counters.items():
+                self.counters[name] += count
+            self.pending -= sent + dropped
+            self.done.notify_all()
+
+    def flush(self, timeout=None):
+        """ Waits until queued messages are sent or dropped """
+        with self.done:
+            return self.done.wait_for(lambda: self.pending <= 0, timeout)
+
+    def close(self, timeout=5):
+        """ Flushes the queue and stops the threads of this process """
+        if self.pid != os.getpid():
+            return
+        self.flush(timeout)
+        for _ in self.threads:
+            self.messages.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.pid = None
+
+    def stats(self):
+        with self.done:
+            return dict(self.counters, pending=self.pending)
@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from otp_auth_user.models import TokenUser
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from store.tests import test_models as smpl
+
+from ..helpers import get_tokens_for_user
+
+STORES_URL = reverse("store:store-list")
+
+
+def user_queries(context):
+    return [query["sql"] for query in context.captured_queries
+            if "otp_auth_user_user" in query["sql"]]
+
+
+class TokenUserAuthenticationTests(TestCase):
+
+    def setUp(self) -> None:
+        self.user = smpl.sample_user()
+        self.client = APIClient()
+        token = get_tokens_for_user(self.user)["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_user_is_not_loaded_per_request(self):
+        """ Test the user is only checked once per cache ttl """
+        self.client.get(STORES_URL, {"self": "true"})
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(STORES_URL, {"self": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(context), [])
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(STORES_URL, {"self": "true"})
+        self.user.delete()
+
+        res = self.client.get(STORES_URL, {"self": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_outdated_claims_are_replaced(self):
+        """ Test flags changed after the token was issued are used """
+        self.user.phone_is_verified = True
+        self.user.save()
+
+        res = self.client.post(STORES_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(res.wsgi_request.user.phone_is_verified)
+
+    def test_changes_through_token_users_are_used(self):
+        """ Test saves and deletes of the TokenUser proxy drop the cache """
+        self.client.get(STORES_URL, {"self": "true"})
+        user = TokenUser.objects.get(pk=self.user.pk)
+        user.phone_is_verified = True
+        user.save()
+
+        res = self.client.post(STORES_URL, {})
+
+        self.assertTrue(res.wsgi_request.user.phone_is_verified)
+        user.delete()
+
+        res = self.client.get(STORES_URL, {"self": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_USER={"CACHE_TTL": None, "MAX_ENTRIES": 10})
+    def test_claims_are_trusted_without_ttl(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(STORES_URL, {"self": "true"})
+
+        self.assertEqual(user_queries(context), [])
+
+    def test_other_fields_are_loaded_at_once(self):
+        """ Test deferred fields of a token user are loaded by one query """
+        user = TokenUser.from_claims(id=self.user.id, phone_is_verified=False,
+                                     is_staff=False)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.full_name, self.user.full_name)
+            self.assertEqual(user.phone, self.user.phone)
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from store.images import process_image
+from store.models import ProductImage
+
+from ..benchmark.concurrency import run_load
+from ..benchmark.runner import compare, percentile, run_scenario
+from ..benchmark.scenarios import SCENARIOS, uploaded_image
+from ..benchmark.seed import seed_catalogue
+from ..management.commands.benchmark import Command
+from ..sms import get_queue
+from ..sms.providers import ConsoleProvider
+
+
+class BenchmarkTests(TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+
+    def test_every_scenario_succeeds(self):
+        """ Test scenarios make valid requests on a seeded catalogue """
+        with tempfile.TemporaryDirectory() as media_root, \
+                self.settings(MEDIA_ROOT=media_root):
+            catalogue = seed_catalogue(users=3, stores=2, categories=3,
+                                       brands=2, products=5, images=5)
+            for scenario in SCENARIOS:
+                result = run_scenario(scenario, catalogue,
+                                      iterations=2, warmup=1)
+
+                self.assertEqual(result["iterations"], 2)
+                self.assertTrue(all(code.startswith("2")
+                                    for code in result["statuses"]),
+                                (scenario.name, result["statuses"]))
+
+    def test_seeded_images_have_files(self):
+        """ Test variants are made of seeded and uploaded image rows """
+        with tempfile.TemporaryDirectory() as media_root, \
+                self.settings(MEDIA_ROOT=media_root):
+            catalogue = seed_catalogue(users=3, stores=2, categories=3,
+                                       brands=2, products=2, images=2)
+            uploaded_image(catalogue, 0)
+            for image in ProductImage.objects.all():
+                process_image(image.pk)
+
+        self.assertFalse(ProductImage.objects.filter(variants={}).exists())
+
+    def test_verification_codes_are_not_printed(self):
+        """ Test codes sent by the console provider stay out of results """
+        catalogue = seed_catalogue(users=3, stores=1, categories=1,
+                                   brands=1, products=1, images=0)
+        scenario = next(scenario for scenario in SCENARIOS
+                        if scenario.name == "user.request_vcode")
+        with patch.object(ConsoleProvider, "send_messages",
+                          return_value=[]) as send_messages:
+            run_scenario(scenario, catalogue, iterations=2, warmup=1)
+            get_queue().flush(5)
+
+        send_messages.assert_not_called()
+
+    def test_compare_with_baseline(self):
+        baseline = {"stores.list": {"p95_ms": 10.0, "queries": 2,
+                                    "peak_allocated_kb": 100.0}}
+
+        self.assertEqual(compare({"stores.list": {
+            "p95_ms": 11.0, "queries": 2, "peak_allocated_kb": 110.0}},
+            baseline), [])
+        regressions = compare({"stores.list": {
+            "p95_ms": 20.0, "queries": 3, "peak_allocated_kb": 200.0}},
+            baseline)
+        self.assertEqual(len(regressions), 3)
+
+    def test_command_fails_on_regressions(self):
+        """ Test results are exported as JSON and compared to a baseline """
+        result = {"iterations": 1, "p50_ms": 4.0, "p95_ms": 5.0,
+                  "p99_ms": 5.0, "mean_ms": 4.0, "queries": 3,
+                  "response_kb": 1.0, "peak_allocated_kb": 50.0,
+                  "statuses": {"200": 1}}
+        with tempfile.NamedTemporaryFile("w+", suffix=".json") as baseline, \
+                tempfile.NamedTemporaryFile("w+", suffix=".json") as output, \
+                patch.object(Command, "run",
+                             return_value={"stores.list": result}):
+            json.dump({"scenarios": {"stores.list": dict(result, queries=1)}},
+                      baseline)
+            baseline.flush()
+            with self.assertRaises(CommandError):
+                call_command("benchmark", "--scenario", "stores.list",
+                             "--output", output.name,
+                             "--baseline", baseline.name,
+                             stdout=StringIO(), stderr=StringIO())
+
+            report = json.load(output)
+        self.assertEqual(report["scenarios"], {"stores.list": result})
+        self.assertEqual(report["meta"]["sizes"]["stores"], 10)
+
+
+class LoadTests(SimpleTestCase):
+
+    def test_run_load_with_slow_clients(self):
+        """ Test requests of fast and slow clients are counted """
+        async def handle(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+            writer.close()
+
+        async def load():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await run_load(f"http://127.0.0.1:{port}", ["/a", "/b"],
+                                      concurrency=5, requests=20,
+                                      slow_clients=0.5, slow_delay=0.001)
+
+        result = asyncio.run(load())
+
+        self.assertEqual(result["statuses"], {"200": 20})
+        self.assertEqual(result["errors"], 0)
+        self.assertIn("p99_ms", result)
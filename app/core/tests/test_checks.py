@@ -0,0 +1,34 @@
+from unittest.mock import patch
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from ..checks import check_otp_cache
+
+LOCMEM_OTP_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "otp": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "otp"},
+}
+
+
+class OtpCacheCheckTests(SimpleTestCase):
+
+    @patch.dict("os.environ", {"ASGI_WORKERS": "4"})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_otp_cache(), [])
+
+    @override_settings(CACHES=LOCMEM_OTP_CACHE)
+    def test_process_cache_of_one_worker_passes(self):
+        self.assertEqual(check_otp_cache(), [])
+
+    @override_settings(CACHES=LOCMEM_OTP_CACHE)
+    @patch.dict("os.environ", {"ASGI_WORKERS": "4"})
+    def test_process_cache_of_many_workers_fails(self):
+        """ Test codes kept by one of many processes refuse to start """
+        errors = check_otp_cache()
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+        with self.assertRaises(ImproperlyConfigured):
+            apps.get_app_config("core").ready()
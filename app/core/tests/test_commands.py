@@ -0,0 +1,54 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+
+from ..management.commands.wait_for_db import Command
+
+
+@patch("core.management.commands.wait_for_db.time.sleep")
+class WaitForDbTests(SimpleTestCase):
+
+    def test_wait_for_db_retries_with_backoff(self, sleep):
+        """ Test waiting for db retries with growing delays """
+        with patch.object(Command, "probe",
+                          side_effect=[OperationalError] * 5 + [None]) as probe:
+            call_command("wait_for_db", "--interval", "1",
+                         "--max-interval", "4", stdout=StringIO())
+
+        self.assertEqual(probe.call_count, 6)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        for delay, interval in zip(delays, [1, 2, 4, 4, 4]):
+            self.assertTrue(0 <= delay <= interval)
+
+    def test_wait_for_db_deadline(self, sleep):
+        """ Test waiting for db gives up after the timeout """
+        with patch.object(Command, "probe", side_effect=OperationalError), \
+                patch("core.management.commands.wait_for_db.random.uniform",
+                      return_value=2), \
+                self.assertRaises(CommandError):
+            call_command("wait_for_db", "--timeout", "1", stdout=StringIO())
+
+        sleep.assert_not_called()
+
+
+@patch("core.management.commands.wait_for_db.time.sleep")
+class WaitForMigratedDbTests(TestCase):
+
+    def test_wait_for_db_ready(self, sleep):
+        """ Test waiting for db when db is available """
+        out = StringIO()
+        call_command("wait_for_db", "--check-migrations", stdout=out)
+
+        sleep.assert_not_called()
+        self.assertIn("Database available!", out.getvalue())
+
+    def test_wait_for_migrations(self, sleep):
+        """ Test unapplied migrations count as not ready """
+        with patch("core.management.commands.wait_for_db.MigrationExecutor"
+                   ".migration_plan", return_value=[("migration", False)]), \
+                self.assertRaisesMessage(CommandError, "1 migrations"):
+            call_command("wait_for_db", "--check-migrations",
+                         "--timeout", "0", stdout=StringIO())
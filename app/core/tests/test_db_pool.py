@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..db.backends.postgresql_pool.base import DatabaseWrapper
+from ..db.pool import close_pools
+
+
+def pooled_wrapper(**pool):
+    """ Returns a pooled backend connection to the test database """
+    # Its own application_name keeps it out of the pool of the test run
+    settings_dict = dict(connection.settings_dict, POOL=pool,
+                         ENGINE="core.db.backends.postgresql_pool",
+                         OPTIONS={"application_name": "pool-tests"})
+    return DatabaseWrapper(settings_dict)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    databases = {"default"}
+
+    def tearDown(self):
+        close_pools()
+
+    def test_connection_is_reused(self):
+        wrapper = pooled_wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        raw_connection = wrapper.connection
+        wrapper.close()
+
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+        self.assertIs(wrapper.connection, raw_connection)
+        stats = wrapper.pool.stats()
+        self.assertEqual((stats["created"], stats["checkouts"]), (1, 2))
+        self.assertEqual((stats["in_use"], stats["idle"]), (1, 0))
+        wrapper.close()
+
+    def test_full_pool_times_out(self):
+        first = pooled_wrapper(MAX_SIZE=1, TIMEOUT=0.05)
+        second = pooled_wrapper(MAX_SIZE=1, TIMEOUT=0.05)
+        first.ensure_connection()
+
+        with self.assertRaises(OperationalError):
+            second.ensure_connection()
+        first.close()
+        second.ensure_connection()
+
+        self.assertEqual(first.pool.stats()["timeouts"], 1)
+        second.close()
+
+    def test_broken_connections_are_replaced(self):
+        wrapper = pooled_wrapper(HEALTH_CHECK_INTERVAL=0)
+        wrapper.ensure_connection()
+        pid = wrapper.connection.get_backend_pid()
+        wrapper.close()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [pid])
+
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+        stats = wrapper.pool.stats()
+        self.assertEqual(stats["health_check_failures"], 1)
+        self.assertEqual((stats["created"], stats["closed"]), (2, 1))
+        wrapper.close()
+
+    def test_open_transaction_is_rolled_back(self):
+        wrapper = pooled_wrapper()
+        wrapper.ensure_connection()
+        wrapper.connection.autocommit = False
+        with wrapper.connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        wrapper.close()
+
+        wrapper.ensure_connection()
+
+        self.assertEqual(wrapper.connection.get_transaction_status(), 0)
+        self.assertEqual(wrapper.pool.stats()["created"], 1)
+        wrapper.close()
+
+
+class DatabasePoolsViewTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_pool_stats_for_staff_only(self):
+        url = reverse("core:db-pools")
+        user = get_user_model().objects.create_user(
+            phone="+989123456789", full_name="Amir")
+        self.client.force_authenticate(user)
+
+        self.assertEqual(self.client.get(url).status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        self.client.force_authenticate(user)
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("pools", res.data)
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..sms import close_queue, get_queue, send_sms
+from ..sms.providers import BaseProvider, MemoryProvider
+
+SMS = {
+    "PROVIDER": "core.sms.providers.MemoryProvider",
+    "OPTIONS": {},
+    "WORKERS": 1,
+    "BATCH_SIZE": 10,
+    "BATCH_WAIT": 0.05,
+    "MAX_ATTEMPTS": 3,
+    "RETRY_DELAY": 0.01,
+    "MAX_QUEUE_SIZE": 100,
+}
+
+
+class FlakyProvider(BaseProvider):
+    """ Fails the first attempt of every message """
+    attempts = []
+
+    def send_messages(self, messages):
+        self.attempts.append([message.attempts for message in messages])
+        return [message for message in messages if not message.attempts]
+
+
+class BrokenProvider(BaseProvider):
+
+    def send_messages(self, messages):
+        raise ConnectionError("Provider is down")
+
+
+@override_settings(SMS=SMS)
+class SMSQueueTests(TestCase):
+
+    def setUp(self) -> None:
+        MemoryProvider.outbox.clear()
+        FlakyProvider.attempts.clear()
+
+    def tearDown(self) -> None:
+        close_queue()
+
+    def test_messages_are_sent_in_batches(self):
+        """ Test queued messages are sent together by a worker """
+        for number in range(25):
+            self.assertTrue(send_sms(f"+98912345{number:04d}", "hi"))
+
+        self.assertTrue(get_queue().flush(5))
+        stats = get_queue().stats()
+        self.assertEqual(len(MemoryProvider.outbox), 25)
+        self.assertEqual((stats["sent"], stats["pending"]), (25, 0))
+        self.assertLess(stats["batches"], 25)
+
+    @override_settings(SMS=dict(SMS, PROVIDER="core.tests.test_sms.FlakyProvider"))
+    def test_failed_messages_are_retried(self):
+        send_sms("+989123456789", "hi")
+
+        self.assertTrue(get_queue().flush(5))
+        self.assertEqual(FlakyProvider.attempts, [[0], [1]])
+        self.assertEqual(get_queue().stats()["failed"], 1)
+
+    @override_settings(SMS=dict(SMS, PROVIDER="core.tests.test_sms.BrokenProvider"))
+    def test_messages_are_dropped_after_max_attempts(self):
+        with self.assertLogs("core.sms.queue", "ERROR"):
+            send_sms("+989123456789", "hi")
+            self.assertTrue(get_queue().flush(5))
+
+        stats = get_queue().stats()
+        self.assertEqual((stats["failed"], stats["dropped"]), (3, 1))
+
+    def test_request_vcode_queues_sms(self):
+        """ Test the verification code is sent through the queue """
+        user = get_user_model().objects.create_user(
+            phone="+989123456789", full_name="Amir")
+
+        res = APIClient().post(reverse("user:request-vcode"),
+                               {"phone": user.phone})
+        get_queue().flush(5)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(MemoryProvider.outbox[0].phone, "+989123456789")
+        self.assertIn("verification code", MemoryProvider.outbox[0].text)
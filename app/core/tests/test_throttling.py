@@ -0,0 +1,143 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from ..throttling import SlidingWindowThrottle, parse_rate
+
+REQUEST_VCODE_URL = reverse("user:request-vcode")
+SIGNUP_URL = reverse("user:signup")
+
+THROTTLING = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "RATES": {"vcode_phone": "2/m", "vcode_ip": "3/m",
+              "signup_global": "1/h"},
+}
+
+
+@override_settings(THROTTLING=THROTTLING)
+class ThrottlingTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.phones = ["+989123456789", "+989123456780"]
+        for phone in self.phones:
+            get_user_model().objects.create_user(phone=phone, full_name="a")
+
+    def request_vcode(self, phone, **extra):
+        return self.client.post(REQUEST_VCODE_URL, {"phone": phone}, **extra)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("5/h"), (5, 3600))
+        self.assertEqual(parse_rate("100/min"), (100, 60))
+
+    def test_phone_bucket(self):
+        """ Test a phone number gets no more codes than its limit """
+        with patch("core.throttling.time.time", return_value=1000000.0):
+            for _ in range(2):
+                self.assertEqual(self.request_vcode(self.phones[0]).status_code,
+                                 status.HTTP_200_OK)
+
+            with self.assertNumQueries(0):
+                res = self.request_vcode(self.phones[0])
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # 20s to the next window and 30s more for half of this one to fade
+        self.assertEqual(res["Retry-After"], "50")
+
+    def test_phone_formats_share_bucket(self):
+        """ Test a number is throttled however it is written """
+        for phone in ["+98-912-345-6789", "+98(912)3456789"]:
+            self.request_vcode(phone, REMOTE_ADDR=f"10.0.0.{len(phone)}")
+
+        res = self.request_vcode("+98.912.345.6789", REMOTE_ADDR="10.0.1.1")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_is_ignored(self):
+        """ Test clients can't pick their address without a trusted proxy """
+        codes = [self.request_vcode(
+            phone, HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code
+            for i, phone in enumerate(self.phones * 2)]
+
+        self.assertEqual(codes[3], status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_ip_bucket(self):
+        """ Test a client is throttled across phone numbers """
+        codes = [self.request_vcode(phone).status_code
+                 for phone in self.phones * 2]
+
+        self.assertEqual(codes[3], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.request_vcode(
+            self.phones[1], REMOTE_ADDR="10.0.0.2").status_code,
+            status.HTTP_200_OK)
+
+    def test_rejected_requests_are_not_counted(self):
+        """ Test requests rejected by one limit don't count in the others """
+        for _ in range(4):
+            self.request_vcode(self.phones[0])
+
+        self.assertEqual(self.request_vcode(self.phones[1]).status_code,
+                         status.HTTP_200_OK)
+
+    def test_limit_recovers(self):
+        """ Test requests are allowed again as the previous window fades """
+        now = 1000000.0
+        with patch("core.throttling.time.time", side_effect=lambda: now):
+            for _ in range(3):
+                self.request_vcode(self.phones[0])
+            now += 50
+
+            res = self.request_vcode(self.phones[0])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(THROTTLING=dict(THROTTLING, RATES={"burst_ip": "5/h"}))
+    def test_concurrent_requests_are_counted(self):
+        """ Test a burst of concurrent requests can't pass the limit together """
+        view = type("View", (), {"throttle_scope": "burst"})()
+        barrier = threading.Barrier(20)
+        allowed = []
+        backend = type(caches["default"])
+        get_many = backend.get_many
+
+        def slow_get_many(*args, **kwargs):
+            values = get_many(*args, **kwargs)
+            # The reply of a shared cache is on its way
+            time.sleep(0.01)
+            return values
+
+        def request():
+            throttled = Request(APIRequestFactory().post("/"))
+            barrier.wait()
+            allowed.append(SlidingWindowThrottle().allow_request(throttled, view))
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        with patch.object(backend, "get_many", slow_get_many):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(allowed.count(True), 5)
+
+    def test_global_bucket(self):
+        """ Test signups of all clients share the global bucket """
+        self.client.post(SIGNUP_URL, {"phone": "+989123456781",
+                                      "full_name": "b"})
+
+        res = self.client.post(SIGNUP_URL, {"phone": "+989123456782",
+                                            "full_name": "c"},
+                               REMOTE_ADDR="10.0.0.2")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
@@ -0,0 +1,134 @@
+"""
+Throttling of the OTP and signup endpoints.
+
+A view sets throttle_scope, e.g. "vcode", and every rate of
+THROTTLING["RATES"] named "<scope>_<kind>" limits requests per client
+of that kind: "phone" is the E.164 phone number of the request body,
+"ip" the client address and "global" all clients together. A "N/period"
+rate allows N requests in any period, it is a sliding window estimated
+from the counters of the current and the previous fixed window, and a
+request counts in every limit or is rejected with Retry-After.
+
+Counters are taken with cache.incr(), so concurrent requests can't
+pass a limit together as long as incr() of the cache backend is atomic
+(locmem, memcached and redis are, the file and database caches aren't).
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from phonenumber_field.phonenumber import to_python
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """ Returns capacity and period in seconds of a "N/period" rate """
+    capacity, period = rate.split("/")
+    return int(capacity), PERIODS[period[0]]
+
+
+def retry_after(capacity, period, elapsed, previous, current):
+    """
+    Seconds until a request passes a limit of capacity per period, with
+    previous and current requests counted in the windows elapsed in
+    """
+    if capacity < 1:
+        return period - elapsed
+    room = capacity - current - 1
+    if room >= 0:
+        # When the previous window has faded out enough
+        return period * (1 - room / previous) - elapsed
+    # In the next window, when the current one has faded out enough
+    faded = max(0, period * (1 - (capacity - 1) / current)) if current else 0
+    return period - elapsed + faded
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """ Throttles requests by the rates of the throttle_scope of views """
+    wait_seconds = None
+
+    def phone_ident(self, request):
+        data = request.data if hasattr(request.data, "get") else {}
+        phone = to_python(str(data.get("phone") or ""))
+        # Invalid numbers are rejected by the serializer, no sms is sent
+        if phone is None or not phone.is_valid():
+            return None
+        return phone.as_e164
+
+    def ip_ident(self, request):
+        # Trusts X-Forwarded-For as far as REST_FRAMEWORK["NUM_PROXIES"]
+        return self.get_ident(request)
+
+    def global_ident(self, request):
+        return "all"
+
+    def get_buckets(self, request, view):
+        """ Returns capacity and period of the limits of request by key """
+        scope = getattr(view, "throttle_scope", None)
+        buckets = {}
+        for name, rate in settings.THROTTLING["RATES"].items():
+            bucket_scope, _, kind = name.rpartition("_")
+            if bucket_scope != scope or rate is None:
+                continue
+            get_ident = getattr(self, f"{kind}_ident", None)
+            if get_ident is None:
+                raise ImproperlyConfigured(
+                    f"Throttle rate \"{name}\" is of an unknown kind \"{kind}\"")
+            ident = get_ident(request)
+            if ident is not None:
+                buckets[f"throttle:{name}:{ident}"] = parse_rate(rate)
+        return buckets
+
+    def count(self, cache, key, timeout):
+        """ Adds a request to the counter of key, returns its new value """
+        try:
+            return cache.incr(key)
+        except ValueError:
+            if cache.add(key, 1, timeout):
+                return 1
+            # Added by a concurrent request
+            return cache.incr(key)
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLING["ENABLED"]:
+            return True
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+
+        cache = caches[settings.THROTTLING["CACHE_ALIAS"]]
+        now = time.time()
+        windows = {}
+        for key, (capacity, period) in buckets.items():
+            window, elapsed = divmod(now, period)
+            windows[key] = (f"{key}:{int(window)}",
+                            f"{key}:{int(window) - 1}", elapsed)
+        previous_counts = cache.get_many(
+            [previous for _, previous, _ in windows.values()])
+
+        counted, waits = [], []
+        for key, (capacity, period) in buckets.items():
+            current, previous, elapsed = windows[key]
+            # A counter is the previous one during the next window
+            current_count = self.count(cache, current, 2 * period)
+            counted.append(current)
+            previous_count = previous_counts.get(previous, 0)
+            weight = (period - elapsed) / period
+            if previous_count * weight + current_count > capacity:
+                waits.append(retry_after(capacity, period, elapsed,
+                                         previous_count, current_count - 1))
+
+        if waits:
+            # Rejected requests are not counted
+            for current in counted:
+                cache.decr(current)
+            self.wait_seconds = max(waits)
+            return False
+        return True
+
+    def wait(self):
+        return math.ceil(self.wait_seconds) if self.wait_seconds else None
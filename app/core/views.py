@@ -0,0 +1,19 @@
+import os
+
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.db.pool import all_pools
+
+
+class DatabasePoolsView(APIView):
+    """
+    Database connection pool metrics of the worker process that serves
+    the request, each uWSGI worker has its own pools
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({"pid": os.getpid(),
+                         "pools": [pool.stats() for pool in all_pools()]})
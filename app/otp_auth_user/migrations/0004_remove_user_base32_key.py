@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 12:02
+
+import pyotp
+from django.db import migrations, models
+
+
+def random_keys(apps, schema_editor):
+    # Blank keys would collide, so every user gets a random one
+    User = apps.get_model("otp_auth_user", "User")
+    for user in User.objects.filter(base32_key=None):
+        user.base32_key = pyotp.random_base32(length=32)
+        user.save(update_fields=["base32_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp_auth_user', '0002_rename_is_verified_user_phone_is_verified'),
+    ]
+
+    operations = [
+        # Nullable, so the column can be added back when reversed
+        migrations.AlterField(
+            model_name='user',
+            name='base32_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, random_keys),
+        migrations.RemoveField(
+            model_name='user',
+            name='base32_key',
+        ),
+    ]
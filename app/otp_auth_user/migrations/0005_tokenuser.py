@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 12:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp_auth_user', '0004_remove_user_base32_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('otp_auth_user.user',),
+        ),
+    ]
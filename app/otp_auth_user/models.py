@@ -1,6 +1,4 @@
 import pyotp
-from core.helpers import generate_key
-from django.contrib.auth import get_user_model
 from django.contrib.auth.models import (AbstractBaseUser, AnonymousUser,
                                         BaseUserManager, PermissionsMixin)
 from django.db import models
@@ -20,7 +18,6 @@ class UserManager(BaseUserManager):
         user = self.model(
             phone=phone,
             full_name=full_name,
-            base32_key=generate_key(get_user_model()),
             **extra_fields
         )
 
@@ -49,7 +46,6 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     phone_is_verified = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
-    base32_key = models.CharField(max_length=255, unique=True, blank=True)
 
     objects = UserManager()
 
@@ -57,3 +53,26 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self):
         return self.full_name
+
+
+class TokenUser(User):
+    """
+    User of an access token, built without a query from its claims, see
+    core/authentication.py. Its other fields are deferred and all of
+    them are loaded by one query when one of them is accessed.
+    """
+    CLAIMS = ["id", "phone_is_verified", "is_staff"]
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, **claims):
+        return cls.from_db(None, cls.CLAIMS,
+                           [claims[name] for name in cls.CLAIMS])
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred_fields = self.get_deferred_fields()
+        if fields and set(fields) <= deferred_fields:
+            fields = deferred_fields
+        super().refresh_from_db(using, fields)
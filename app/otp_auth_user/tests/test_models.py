@@ -1,6 +1,9 @@
+from core.helpers import VerifyInstancePhoneNumber
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 
 def sample_user(phone="+989123456789", full_name="testname"):
@@ -16,7 +19,6 @@ class UserModelTests(TestCase):
         full_name = "testname"
         user = sample_user(phone, full_name)
 
-        self.assertTrue(bool(user.base32_key))
         self.assertEqual(user.phone, phone)
 
     def test_create_user_invalid_phone_number(self):
@@ -41,3 +43,20 @@ class UserModelTests(TestCase):
 
         self.assertTrue(user.is_superuser)
         self.assertTrue(user.is_staff)
+
+    def test_verification_saves_user_once(self):
+        """ Test only a change of phone_is_verified writes the user """
+        user = sample_user()
+        verify_phone = VerifyInstancePhoneNumber(get_user_model(), user)
+
+        for writes in [1, 0]:
+            with CaptureQueriesContext(connection) as context:
+                code = verify_phone.request_verification()
+                self.assertTrue(verify_phone.submit_verification(code))
+            # Challenges are kept in a cache table
+            self.assertEqual(len([
+                query for query in context.captured_queries
+                if '"otp_auth_user_user"' in query["sql"]]), writes)
+
+        user.refresh_from_db()
+        self.assertTrue(user.phone_is_verified)
@@ -1,6 +1,9 @@
-from core.helpers import generate_totp_for_instance
+from core.helpers import VerifyInstancePhoneNumber
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -19,9 +22,16 @@ def sample_user(phone="+989123456789", full_name="testname"):
                                                 full_name=full_name)
 
 
+def request_vcode(user):
+    """ Requests a verification code and returns it like the sms would """
+    return VerifyInstancePhoneNumber(
+        get_user_model(), user).request_verification()
+
+
 class PublicUserApiTests(TestCase):
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
 
     def test_signup_user(self):
@@ -53,6 +63,48 @@ class PublicUserApiTests(TestCase):
         res = self.client.post(REQUEST_VCODE_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_request_and_submit_vcode_queries(self):
+        """ Test codes of a verified user do not write to the user table """
+        user = sample_user()
+        user.phone_is_verified = True
+        user.save()
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(REQUEST_VCODE_URL, {"phone": user.phone})
+            res = self.client.post(TOKEN_URL, {
+                "phone": user.phone, "verification_code": request_vcode(user)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Challenges are kept in a cache table
+        queries = [query["sql"] for query in context.captured_queries
+                   if '"otp_auth_user_user"' in query["sql"]]
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all(sql.startswith("SELECT") for sql in queries))
+
+    def test_vcode_is_used_once(self):
+        """ Test a verification code can not be submitted twice """
+        user = sample_user()
+        payload = {"phone": user.phone, "verification_code": request_vcode(user)}
+
+        self.assertEqual(self.client.post(TOKEN_URL, payload).status_code,
+                         status.HTTP_200_OK)
+        self.assertEqual(self.client.post(TOKEN_URL, payload).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_vcode_attempts_are_limited(self):
+        """ Test the code is dropped after too many wrong codes """
+        user = sample_user()
+        vcode = request_vcode(user)
+        wrong_code = str((int(vcode) + 1) % 100000).zfill(5)
+        for _ in range(5):
+            self.client.post(TOKEN_URL, {"phone": user.phone,
+                                         "verification_code": wrong_code})
+
+        res = self.client.post(TOKEN_URL, {"phone": user.phone,
+                                           "verification_code": vcode})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_request_vcode_for_non_existing_user(self):
         """ Test request vcode for non existing user """
         payload = {
@@ -64,7 +116,7 @@ class PublicUserApiTests(TestCase):
     def test_signin_a_user(self):
         """ Test signin a user with recived verification code through sms """
         user = sample_user()
-        vcode = generate_totp_for_instance(user).now()
+        vcode = request_vcode(user)
 
         payload = {
             "phone": user.phone,
@@ -79,7 +131,7 @@ class PublicUserApiTests(TestCase):
     def test_signin_user_invalid_vcode(self):
         """ Test sign in a user with invalid verifciation code """
         user = sample_user()
-        vcode = generate_totp_for_instance(user).now()
+        vcode = request_vcode(user)
 
         payload = {
             "phone": user.phone,
@@ -95,6 +147,7 @@ class PublicUserApiTests(TestCase):
 class PrivateUserApiTests(TestCase):
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
         self.user = sample_user()
         self.client.force_authenticate(user=self.user)
@@ -148,7 +201,7 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.data["phone"], payload["phone"])
         self.assertFalse(self.user.phone_is_verified)
         
-        vcode = generate_totp_for_instance(self.user).now()
+        vcode = request_vcode(self.user)
         payload = {
             "verification_code": vcode
         }
@@ -161,7 +214,7 @@ class PrivateUserApiTests(TestCase):
 
     def test_refresh_token(self):
         """ Test recieve a new access and refresh for current refresh token  """
-        vcode = generate_totp_for_instance(self.user).now()
+        vcode = request_vcode(self.user)
      
         payload = {
             "phone": self.user.phone,
@@ -1,4 +1,5 @@
 from core.helpers import VerifyInstancePhoneNumber, get_tokens_for_user
+from core.throttling import SlidingWindowThrottle
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from rest_framework import status
@@ -18,6 +19,8 @@ class CreateAndSigninUser(ListCreateAPIView):
     """
     serializer_class = UserSerializer
     queryset = get_user_model().objects.all()
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "signup"
 
     def create(self, request, *args, **kwargs):
         try:
@@ -49,12 +52,16 @@ class CreateAndSigninUser(ListCreateAPIView):
 class SignupUserView(CreateAPIView):
     """ Signup/create a new user in system """
     serializer_class = UserSerializer
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "signup"
 
 
 class RequestVCodeView(CreateAPIView):
     """ Generates an verification code, saves it in users model
         and sends it through sms """
     serializer_class = RequestVCodeSerializer
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "vcode"
 
     def create(self, request):
         """ Check if user is exists then send a verification code """
@@ -72,6 +79,8 @@ class RequestVCodeView(CreateAPIView):
 class ObtainToken(CreateAPIView):
     """ Obtain a new jwt token for user """
     serializer_class = SigninUserSerializer
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "token"
 
     def create(self, request):
         phone = request.data["phone"]
@@ -103,14 +112,15 @@ class UserProfileView(RetrieveUpdateDestroyAPIView):
     def partial_update(self, request, *args, **kwargs):
         user = request.user
         data = request.data
-        if "phone" in data:
-            if data["phone"] != user.phone:
-                verify_phone = VerifyInstancePhoneNumber(
-                    get_user_model(), user)
-                verify_phone.request_verification()
-            else:
-                pass
-        return super().partial_update(request, *args, **kwargs)
+        phone_changed = "phone" in data and data["phone"] != user.phone
+        if phone_changed:
+            # Saved by the update, the new number must be verified
+            user.phone_is_verified = False
+        response = super().partial_update(request, *args, **kwargs)
+        if phone_changed:
+            verify_phone = VerifyInstancePhoneNumber(get_user_model(), user)
+            verify_phone.request_verification()
+        return response
 
 
 class VerifyNewPhoneNumberView(CreateAPIView):
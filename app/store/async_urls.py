@@ -0,0 +1,5 @@
+from .async_views import async_urlpatterns
+from .urls import router
+
+app_name = "store"
+urlpatterns = async_urlpatterns(router.urls)
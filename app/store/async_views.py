@@ -0,0 +1,55 @@
+"""
+Async versions of the catalogue endpoints for ASGI serving.
+
+The DRF viewsets stay the single implementation, an async view runs the
+viewset in the database pool for safe methods, so one ASGI worker serves
+many concurrent requests while their queries run. Other methods run
+thread sensitive like sync views do under ASGI.
+"""
+from asgiref.sync import sync_to_async
+from core.async_db import database_sync_to_async
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+# Viewsets of read heavy endpoints
+ASYNC_VIEWSETS = ["StoreViewSet", "CategoryViewSet", "BrandViewSet",
+                  "SupermarketProductViewSet"]
+
+
+def rendered(view):
+    """ DRF responses are rendered lazily, render in the same thread """
+    def render_view(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+    return render_view
+
+
+def async_view(view):
+    """ Returns an async view that runs the sync view "view" """
+    read = database_sync_to_async(rendered(view))
+    write = sync_to_async(rendered(view), thread_sensitive=True)
+
+    async def wrapper(request, *args, **kwargs):
+        run = read if request.method in SAFE_METHODS else write
+        return await run(request, *args, **kwargs)
+
+    # DRF views are csrf exempt
+    wrapper.csrf_exempt = getattr(view, "csrf_exempt", False)
+    wrapper.cls = getattr(view, "cls", None)
+    wrapper.initkwargs = getattr(view, "initkwargs", None)
+    wrapper.actions = getattr(view, "actions", None)
+    return wrapper
+
+
+def async_urlpatterns(urlpatterns):
+    """ Returns urlpatterns with views of ASYNC_VIEWSETS made async """
+    patterns = []
+    for pattern in urlpatterns:
+        viewset = getattr(pattern.callback, "cls", None)
+        if viewset is not None and viewset.__name__ in ASYNC_VIEWSETS:
+            pattern = URLPattern(pattern.pattern, async_view(pattern.callback),
+                                 pattern.default_args, pattern.name)
+        patterns.append(pattern)
+    return patterns
@@ -0,0 +1,201 @@
+"""
+Bulk import of supermarket products from CSV or JSON Lines input.
+
+Input is read as a stream of lines and processed in chunks, every chunk
+is validated without per row queries, related ids and store ownership
+are checked with one query per chunk and valid rows are written with
+bulk inserts.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import models
+from .cache import invalidate
+from .search import build_search_document, update_search_vectors
+from .serializers import SupermarketProductSerializer
+
+FORMATS = ("csv", "jsonl")
+OWNER_ERROR = "only stores that user owns"
+
+
+def iter_lines(stream):
+    """
+    Decodes lines of a binary or text stream,
+    lines that are not UTF-8 are yielded as None
+    """
+    for index, line in enumerate(stream):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError:
+                yield None
+                continue
+        # Excel adds a BOM to UTF-8 CSV files
+        yield line.lstrip("\ufeff") if index == 0 else line
+
+
+class UnreadableInput(Exception):
+    """ The rest of a CSV input can't be read """
+
+
+def iter_csv_lines(lines):
+    for line in lines:
+        if line is None:
+            raise UnreadableInput("line is not valid UTF-8")
+        yield line
+
+
+def iter_records(stream, input_format):
+    """
+    Yields (row number, record) of every row, record is a dict
+    or an error message if the row could not be parsed
+    """
+    if input_format not in FORMATS:
+        raise ValueError(f"Unknown input format '{input_format}'.")
+
+    lines = iter_lines(stream)
+    if input_format == "csv":
+        number = 0
+        try:
+            for number, row in enumerate(
+                    csv.DictReader(iter_csv_lines(lines)), start=1):
+                # Empty cells are missing values
+                yield number, {key: value for key, value in row.items()
+                               if key and value not in ("", None)}
+        except (UnreadableInput, csv.Error) as error:
+            # Rows of a CSV may span lines, nothing after an
+            # unreadable one can be trusted
+            yield number + 1, (f"Invalid CSV ({error}), this and the "
+                               "following rows are not imported.")
+        return
+
+    number = 0
+    for line in lines:
+        if line is not None and not line.strip():
+            continue
+        number += 1
+        if line is None:
+            yield number, "Line is not valid UTF-8."
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, "Invalid JSON."
+            continue
+        if not isinstance(record, dict):
+            yield number, "Each line must be a JSON object."
+            continue
+        yield number, record
+
+
+class BulkSupermarketProductSerializer(SupermarketProductSerializer):
+    """
+    Validates a product row without any query,
+    related objects are checked once per chunk by BulkProductImporter
+    """
+    brand = serializers.IntegerField(required=False, allow_null=True)
+    category = serializers.IntegerField(required=False, allow_null=True)
+    store = serializers.IntegerField()
+
+
+class BulkProductImporter:
+    """
+    Imports supermarket products of stores that user owns,
+    returns a report of created rows and errors of failed rows
+    """
+    serializer_class = BulkSupermarketProductSerializer
+
+    def __init__(self, user, chunk_size=500):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.created = 0
+        self.errors = []
+
+    def run(self, records):
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+
+        if self.created:
+            # bulk inserts send no signals
+            invalidate(models.Product, models.SupermarketProduct)
+        return {"created": self.created, "errors": self.errors}
+
+    def add_error(self, number, errors):
+        if isinstance(errors, str):
+            errors = {"non_field_errors": [errors]}
+        self.errors.append({"row": number, "errors": errors})
+
+    def validate_chunk(self, chunk):
+        """ Returns (row number, validated data) of valid rows """
+        rows = []
+        for number, record in chunk:
+            if isinstance(record, str):
+                self.add_error(number, record)
+                continue
+            serializer = self.serializer_class(data=record)
+            if not serializer.is_valid():
+                self.add_error(number, serializer.errors)
+                continue
+            rows.append((number, serializer.validated_data))
+
+        if not rows:
+            return rows, {}
+
+        def ids_of(key):
+            return {data[key] for _, data in rows if data.get(key) is not None}
+
+        owned_stores = set(models.Store.objects.filter(
+            id__in=ids_of("store"), owner=self.user).values_list("id", flat=True))
+        category_ids = set(models.Category.objects.filter(
+            id__in=ids_of("category")).values_list("id", flat=True))
+        brands = models.Brand.objects.in_bulk(ids_of("brand"))
+
+        valid_rows = []
+        for number, data in rows:
+            errors = {}
+            if data["store"] not in owned_stores:
+                errors["store"] = [OWNER_ERROR]
+            if data.get("category") is not None and data["category"] not in category_ids:
+                errors["category"] = [
+                    f"Invalid pk \"{data['category']}\" - object does not exist."]
+            if data.get("brand") is not None and data["brand"] not in brands:
+                errors["brand"] = [
+                    f"Invalid pk \"{data['brand']}\" - object does not exist."]
+            if errors:
+                self.add_error(number, errors)
+            else:
+                valid_rows.append((number, data))
+        return valid_rows, brands
+
+    def build_product(self, data, brands):
+        data = dict(data)
+        brand_id = data.pop("brand", None)
+        product = models.SupermarketProduct(
+            brand_id=brand_id,
+            category_id=data.pop("category", None),
+            store_id=data.pop("store"),
+            **data
+        )
+        product.search_document = build_search_document(
+            product.name, brands.get(brand_id))
+        return product
+
+    def import_chunk(self, chunk):
+        rows, brands = self.validate_chunk(chunk)
+        if not rows:
+            return
+
+        products = [self.build_product(data, brands) for _, data in rows]
+        with transaction.atomic():
+            models.SupermarketProduct.objects.bulk_create(products)
+            update_search_vectors(models.Product.objects.filter(
+                pk__in=[product.pk for product in products]))
+        self.created += len(products)
@@ -0,0 +1,114 @@
+"""
+Response cache for read-only catalogue endpoints.
+
+Every model has a "generation" token in the cache, a cached response key
+contains the generations of all models that the view depends on.
+Saving or deleting any of those models replaces its generation when
+the transaction commits (see store.signals), so stale entries are never read again and are
+evicted by the cache backend.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_cache():
+    return caches[settings.STORE_RESPONSE_CACHE["CACHE_ALIAS"]]
+
+
+def generation_key(model):
+    return f"store:generation:{model._meta.label_lower}"
+
+
+def get_generations(models):
+    """ Returns current generation token of each model """
+    cache = get_cache()
+    keys = [generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+
+    for key in keys:
+        if key not in generations:
+            # A lost generation must never come back with an old value,
+            # so a new random token is used rather than a counter
+            cache.add(key, uuid.uuid4().hex, None)
+            generations[key] = cache.get(key)
+
+    return [generations[key] for key in keys]
+
+
+def invalidate(*models):
+    """
+    Invalidates every cached response that depends on models once the
+    current transaction commits, must be called after changes that send
+    no signals e.g. QuerySet.update()
+    """
+    def replace_generations():
+        get_cache().set_many({generation_key(model): uuid.uuid4().hex
+                              for model in models}, None)
+
+    # A request between a new generation and the commit would read the
+    # old rows and cache them under the new generation
+    transaction.on_commit(replace_generations)
+
+
+def response_cache_key(view, request, dependencies):
+    query = sorted(request.query_params.lists())
+    raw_key = repr((
+        view.basename,
+        view.action,
+        sorted(view.kwargs.items()),
+        query,
+        get_generations(dependencies),
+    ))
+    digest = hashlib.md5(raw_key.encode()).hexdigest()
+    return f"store:response:{view.basename}:{digest}"
+
+
+def cache_response(method):
+    """
+    Caches response of a viewset method for anonymous GET requests,
+    view must define "cache_dependencies"
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        cache_settings = settings.STORE_RESPONSE_CACHE
+        if (not cache_settings["ENABLED"]
+                or request.method != "GET"
+                or request.user.is_authenticated):
+            return method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_cache_key(self, request, self.cache_dependencies)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, cache_settings["TIMEOUT"])
+        return response
+
+    return wrapper
+
+
+class CachedResponseMixin:
+    """
+    Caches "list" and "retrieve" responses of anonymous users,
+    "cache_dependencies" is the list of models that the responses are built from
+    """
+    cache_dependencies = ()
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,141 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .geo import bounding_box, haversine_expression
+from .pagination import ListPagination, key_ordering
+from .search import search_products
+
+
+class OrderingFilter(filters.OrderingFilter):
+    """
+    Ordering filter that maps public ordering names to model fields
+    with view "ordering_aliases", e.g. {"score": "store_score"}.
+    NULL sorts as the smallest value, like in keyset pagination.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(*[
+            self.get_order_expression(queryset.model, term)
+            for term in ordering])
+
+    def get_order_expression(self, model, term):
+        name = term.lstrip("-")
+        try:
+            null = model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return term
+        return key_ordering(F(name), term.startswith("-"), null)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        aliases = getattr(view, "ordering_aliases", {})
+        if not ordering or not aliases:
+            return ordering
+
+        return [
+            ("-" if term.startswith("-") else "") +
+            aliases.get(term.lstrip("-"), term.lstrip("-"))
+            for term in ordering
+        ]
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Full-text search of products by name and brand names,
+    results are ranked, see store/search.py
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "")
+        return search_products(queryset, text)
+
+
+class NearbyFilter(filters.BaseFilterBackend):
+    """
+    "?near=lat,long&radius=km" lists open stores around the point,
+    nearest first, with their "distance" in kilometers.
+    Other orderings and cursor pagination would replace "nearest first",
+    so they are rejected with "near".
+    """
+    near_param = "near"
+    radius_param = "radius"
+    default_radius = 5
+    max_radius = 50
+
+    def get_point(self, request):
+        """ Returns (lat, long, radius) or None if no point is passed """
+        near = request.query_params.get(self.near_param)
+        if not near:
+            return None
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise ValidationError({api_settings.ORDERING_PARAM:
+                                   f"Can not be used with {self.near_param}."})
+        if ListPagination().uses_keyset(request):
+            raise ValidationError({ListPagination.mode_query_param:
+                                   f"Cursor pagination can not be used with "
+                                   f"{self.near_param}."})
+
+        try:
+            lat, long = (float(value) for value in near.split(","))
+        except ValueError:
+            raise ValidationError(
+                {self.near_param: "Must be in \"lat,long\" format."})
+        if not (-90 <= lat <= 90 and -180 <= long <= 180):
+            raise ValidationError(
+                {self.near_param: "Latitude or longitude is out of range."})
+
+        try:
+            radius = float(request.query_params.get(
+                self.radius_param, self.default_radius))
+        except ValueError:
+            raise ValidationError({self.radius_param: "Must be a number."})
+        if not 0 < radius <= self.max_radius:
+            raise ValidationError(
+                {self.radius_param: f"Must be between 0 and {self.max_radius} km."})
+
+        return lat, long, radius
+
+    def filter_queryset(self, request, queryset, view):
+        point = self.get_point(request)
+        if point is None:
+            return queryset
+        lat, long, radius = point
+
+        # Bounding box uses the (lat, long) index,
+        # exact distance is only computed for stores inside it
+        min_lat, max_lat, long_ranges = bounding_box(lat, long, radius)
+        in_long_range = Q()
+        for long_range in long_ranges:
+            in_long_range |= Q(long__range=long_range)
+
+        return queryset.filter(
+            in_long_range, is_open=True, lat__range=(min_lat, max_lat)
+        ).annotate(
+            distance=haversine_expression(lat, long)
+        ).filter(distance__lte=radius).order_by("distance", "pk")
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.near_param,
+                "required": False,
+                "in": "query",
+                "description": "Latitude and longitude, e.g. \"35.6892,51.3890\", "
+                               "lists nearest first and can not be combined "
+                               "with ordering or cursor pagination.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.radius_param,
+                "required": False,
+                "in": "query",
+                "description": f"Search radius in km, default is {self.default_radius}.",
+                "schema": {"type": "number"},
+            },
+        ]
@@ -0,0 +1,60 @@
+"""
+Geo helpers for querying stores by location without PostGIS.
+
+A bounding box around the point narrows the rows down using the
+(lat, long) index, exact haversine distance is only computed
+for rows inside the box.
+"""
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import (ASin, Cast, Cos, Least, Power,
+                                        Radians, Sin, Sqrt)
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def bounding_box(lat, long, radius_km):
+    """
+    Returns (min_lat, max_lat, long_ranges) of the smallest box that contains
+    the circle around the point, long_ranges has two ranges if the box
+    crosses the 180th meridian
+    """
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    min_lat = lat - math.degrees(angular_radius)
+    max_lat = lat + math.degrees(angular_radius)
+
+    if min_lat <= -90 or max_lat >= 90:
+        # A pole is inside the circle, every longitude is
+        return max(min_lat, -90), min(max_lat, 90), [(-180, 180)]
+
+    delta_long = math.degrees(math.asin(
+        math.sin(angular_radius) / math.cos(math.radians(lat))))
+    min_long, max_long = long - delta_long, long + delta_long
+
+    if min_long < -180:
+        return min_lat, max_lat, [(min_long + 360, 180), (-180, max_long)]
+    if max_long > 180:
+        return min_lat, max_lat, [(min_long, 180), (-180, max_long - 360)]
+    return min_lat, max_lat, [(min_long, max_long)]
+
+
+def haversine(lat1, long1, lat2, long2):
+    """ Returns great circle distance of two points in kilometers """
+    lat1, long1, lat2, long2 = map(math.radians, (lat1, long1, lat2, long2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((long2 - long1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1, math.sqrt(a)))
+
+
+def haversine_expression(lat, long, lat_field="lat", long_field="long"):
+    """ Database expression of distance from the point in kilometers """
+    row_lat = Radians(Cast(F(lat_field), FloatField()))
+    row_long = Radians(Cast(F(long_field), FloatField()))
+    point_lat = Value(math.radians(lat))
+    point_long = Value(math.radians(long))
+
+    a = (Power(Sin((row_lat - point_lat) / 2), 2) +
+         Value(math.cos(math.radians(lat))) * Cos(row_lat) *
+         Power(Sin((row_long - point_long) / 2), 2))
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Value(1.0), Sqrt(a)))
@@ -0,0 +1,185 @@
+"""
+Resized variants of product images.
+
+Uploads are saved as they are and answered right away, the variants in
+PRODUCT_IMAGES["SIZES"] and ["FORMATS"] are made after the transaction
+commits by a pool of threads (see schedule_variants()) and their storage
+names are kept in ProductImage.variants as {size: {format: name}}.
+Serializers then hand out the variant a client asks for, e.g.
+"?image_size=thumb&image_format=webp".
+"""
+import atexit
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from PIL import Image, ImageOps, features
+
+from .cache import invalidate
+from .models import ProductImage
+
+logger = logging.getLogger(__name__)
+
+# Pillow format names and features.check() names of variant formats
+FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "avif": ("AVIF", "avif"),
+    "jpeg": ("JPEG", None),
+}
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def supported_formats():
+    """ Variant formats of the setting that this Pillow can write """
+    supported = []
+    for name in settings.PRODUCT_IMAGES["FORMATS"]:
+        pillow_format, feature = FORMATS[name]
+        if feature is None or features.check(feature):
+            supported.append(name)
+    return supported
+
+
+def _prepare(image, largest):
+    # JPEGs are decoded straight at a smaller scale when possible
+    image.draft("RGB", (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    return image
+
+
+def _encode(image, name):
+    pillow_format = FORMATS[name][0]
+    if pillow_format == "JPEG" and image.mode == "RGBA":
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, pillow_format,
+               quality=settings.PRODUCT_IMAGES["QUALITY"])
+    return output.getvalue()
+
+
+def make_variants(field_file):
+    """
+    Saves every size and format of the image in field_file next to it,
+    returns their storage names as {size: {format: name}}
+    """
+    sizes = sorted(settings.PRODUCT_IMAGES["SIZES"].items(),
+                   key=lambda item: item[1], reverse=True)
+    formats = supported_formats()
+    storage = field_file.storage
+    base = os.path.splitext(field_file.name)[0]
+
+    with field_file.open("rb"), Image.open(field_file) as original:
+        image = _prepare(original, sizes[0][1])
+        variants = {}
+        # Largest first, each size is scaled down from the previous one
+        for size, pixels in sizes:
+            image = image.copy()
+            image.thumbnail((pixels, pixels), Image.LANCZOS)
+            variants[size] = {
+                name: storage.save(f"{base}_{size}.{name}",
+                                   ContentFile(_encode(image, name)))
+                for name in formats
+            }
+    return variants
+
+
+def process_image(image_id):
+    """ Makes the variants of a ProductImage and saves their names on it """
+    try:
+        product_image = ProductImage.objects.only("image").get(pk=image_id)
+    except ProductImage.DoesNotExist:
+        return
+    # Files are named by their content, another row may share this one
+    variants = ProductImage.objects.filter(
+        image=product_image.image.name).exclude(pk=image_id).exclude(
+        variants={}).values_list("variants", flat=True).first()
+    try:
+        variants = variants or make_variants(product_image.image)
+    except Exception:
+        logger.exception("Making variants of product image %s failed",
+                         image_id)
+        return
+
+    # The image may have been replaced in the meantime
+    ProductImage.objects.filter(
+        pk=image_id, image=product_image.image.name).update(variants=variants)
+    # Updates send no signals
+    invalidate(ProductImage)
+
+
+def variant_name(variants, size, image_format=None):
+    """
+    Storage name of a variant in ProductImage.variants, in image_format or
+    else the first format of the setting it was made in, None when there
+    is no such variant
+    """
+    formats = variants.get(size, {})
+    if image_format:
+        return formats.get(image_format)
+    for name in settings.PRODUCT_IMAGES["FORMATS"]:
+        if name in formats:
+            return formats[name]
+    return None
+
+
+def _run(image_id):
+    try:
+        process_image(image_id)
+    finally:
+        # Workers are idle most of the time, they keep no connection
+        connections.close_all()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    with _lock:
+        # A forked worker process starts its own threads
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PRODUCT_IMAGES["WORKERS"],
+                thread_name_prefix="product-images")
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def schedule_variants(image_id):
+    """
+    Makes the variants of a ProductImage once the current transaction
+    commits, in the request itself when PRODUCT_IMAGES["WORKERS"] is 0
+    """
+    def submit():
+        if settings.PRODUCT_IMAGES["WORKERS"]:
+            get_executor().submit(_run, image_id)
+        else:
+            process_image(image_id)
+
+    transaction.on_commit(submit)
+
+
+def close_executor(**kwargs):
+    """ Waits for scheduled images and stops the workers """
+    global _executor
+    # Workers save files under MEDIA_ROOT, they must be done before it changes
+    if kwargs.get("setting", "PRODUCT_IMAGES") not in ("PRODUCT_IMAGES",
+                                                       "MEDIA_ROOT"):
+        return
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None and _executor_pid == os.getpid():
+        executor.shutdown(wait=True)
+
+
+setting_changed.connect(close_executor)
+atexit.register(close_executor)
+
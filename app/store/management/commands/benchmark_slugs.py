@@ -0,0 +1,61 @@
+import time
+
+from autoslug.fields import AutoSlugField
+from autoslug.settings import slugify
+from autoslug.utils import generate_unique_slug
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from store.models import Product, Store
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare per row slug generation of django-autoslug
+    with batched slug allocation, rows are rolled back
+    """
+    help = "Benchmarks unique slug generation of products"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--names", type=int, default=10,
+                            help="Number of distinct product names")
+
+    def handle(self, *args, **options):
+        store = Store.objects.first()
+        if store is None:
+            raise CommandError("At least one store is needed to add products to.")
+
+        names = [f"Benchmark milk {i % options['names']}"
+                 for i in range(options["rows"])]
+        for label, insert in [("autoslug", self.insert_with_autoslug),
+                              ("batch", self.insert_in_batch)]:
+            products = [Product(name=name, sale_price=1, stock=1, store=store)
+                        for name in names]
+            queries = []
+
+            def count_query(execute, sql, *args):
+                queries.append(sql)
+                return execute(sql, *args)
+
+            with transaction.atomic(), connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                insert(products)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"{label}: {len(products)} rows, {len(queries)} queries, "
+                f"{elapsed:.3f}s")
+
+    def insert_with_autoslug(self, products):
+        """ What AutoSlugField(unique=True) does, a query per candidate slug """
+        field = AutoSlugField(populate_from="name", unique=True)
+        field.set_attributes_from_name("slug")
+        field.model = Product
+        for product in products:
+            product.slug = generate_unique_slug(
+                field, product, slugify(product.name), Product._base_manager)
+            Product._base_manager.bulk_create([product])
+
+    def insert_in_batch(self, products):
+        Product.objects.bulk_create(products)
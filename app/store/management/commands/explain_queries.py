@@ -0,0 +1,172 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.urls import resolve, reverse
+from rest_framework.test import APIRequestFactory
+
+from store import models
+
+
+def first_pk(queryset):
+    """ Rows that exist give realistic plans, missing ones still plan """
+    return queryset.values_list("pk", flat=True).first() or 1
+
+
+def hot_requests():
+    """
+    Returns (url name, url kwargs, query parameters, index names) of hot
+    endpoints, the plans of a request must use all of its indexes, a tuple
+    of names is any one of them
+    """
+    category = {"pk": first_pk(models.Category.objects.filter(is_verified=True))}
+    product = {"pk": first_pk(
+        models.SupermarketProduct.objects.filter(is_verified=True))}
+    cursor = {"pagination": "cursor"}
+    return [
+        ("store:store-list", {}, {}, ["store_store_verified_score_idx"]),
+        ("store:store-list", {}, {"ordering": "-score"},
+         ["store_store_verified_score_idx"]),
+        ("store:store-list", {}, {**cursor, "ordering": "-score"},
+         ["store_store_verified_score_idx"]),
+        ("store:store-list", {}, {**cursor, "ordering": "name"},
+         ["store_store_verified_name_idx"]),
+        ("store:store-list", {}, {"near": "35.6892,51.3890", "radius": 10},
+         ["store_store_open_location_idx"]),
+        ("store:category-list", {}, {}, ["store_category_verified_idx"]),
+        # The whole tree is read, no index is expected
+        ("store:category-tree", {}, {}, []),
+        ("store:category-detail", category, {},
+         ["store_category_pkey", "store_category_verified_idx"]),
+        # Products of a category are not ordered, the foreign key serves too
+        ("store:category-products", category, {},
+         [("store_product_verified_cat_idx",
+           "store_product_category_id_574bae65")]),
+        ("store:brand-list", {}, {}, ["store_brand_verified_idx"]),
+        ("store:supermarket-product-list", {}, {}, ["store_product_pkey"]),
+        ("store:supermarket-product-list", {}, {**cursor, "ordering": "name"},
+         ["store_product_verified_nm_idx"]),
+        ("store:supermarket-product-list", {}, {"search": "milk"},
+         ["store_product_search_gin"]),
+        ("store:supermarket-product-detail", product, {},
+         ["store_product_pkey"]),
+    ]
+
+
+def representative_queries():
+    """ (label, queryset, index names) of queries not made by a GET endpoint """
+    return [
+        ("wishlist item of user", models.WishListItem.objects.filter(
+            user_id=1, product_id=1), ["store_wishlist_user_prod_idx"]),
+    ]
+
+
+def iter_plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+class Command(BaseCommand):
+    """
+    Django command to EXPLAIN the queries of hot endpoints and report
+    sequential scans and expected indexes that are not used. Sequential
+    scans are disabled, so any left means no index can serve the query,
+    and a query that falls back to another index, e.g. a full scan of the
+    primary key, is caught by its expected index names
+    """
+    help = ("Explains queries of the store endpoints and flags sequential "
+            "scans and unused indexes")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true",
+                            help="Print the whole plan of every query")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Only PostgreSQL plans are supported.")
+
+        # (label, index names, [(sql, params)])
+        audits = []
+        for label, queryset, indexes in representative_queries():
+            audits.append((label, indexes,
+                           [queryset.query.sql_with_params()]))
+        for url_name, kwargs, params, indexes in hot_requests():
+            label = reverse(url_name, kwargs=kwargs)
+            if params:
+                label += "?" + "&".join(f"{key}={value}"
+                                        for key, value in params.items())
+            audits.append((label, indexes,
+                           self.capture_queries(url_name, kwargs, params)))
+
+        flagged = 0
+        for label, indexes, queries in audits:
+            used = set()
+            problems = []
+            for sql, params in queries:
+                plan = self.explain(sql, params)
+                nodes = list(iter_plan_nodes(plan))
+                used.update(node["Index Name"] for node in nodes
+                            if "Index Name" in node)
+                scans = [node["Relation Name"] for node in nodes
+                         if node["Node Type"] == "Seq Scan"]
+                if scans:
+                    problems.append(
+                        f"sequential scan on {', '.join(scans)}\n    {sql}")
+                if options["verbose_plans"]:
+                    self.stdout.write(json.dumps(plan, indent=2))
+            missing = [" or ".join(names) for names in
+                       (name if isinstance(name, tuple) else (name,)
+                        for name in indexes)
+                       if used.isdisjoint(names)]
+            if missing:
+                problems.append(f"{', '.join(missing)} not used, plans use "
+                                f"{', '.join(sorted(used)) or 'no index'}")
+
+            if problems:
+                flagged += 1
+                for problem in problems:
+                    self.stdout.write(self.style.ERROR(f"{label}: {problem}"))
+            else:
+                self.stdout.write(f"{label}: {', '.join(sorted(used))}")
+
+        if flagged:
+            raise CommandError(
+                f"{flagged} of {len(audits)} audited queries use sequential "
+                "scans or miss their indexes.")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(audits)} audited queries use their indexes."))
+
+    def capture_queries(self, url_name, kwargs, params):
+        """ Returns (sql, params) of SELECT queries of an anonymous request """
+        captured = []
+
+        def capture(execute, sql, sql_params, many, context):
+            if sql.lstrip().upper().startswith("SELECT"):
+                captured.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        path = reverse(url_name, kwargs=kwargs)
+        request = APIRequestFactory().get(path, params)
+        request.user = AnonymousUser()
+        match = resolve(path)
+        # Links to next pages are built from the host of the request
+        with override_settings(ALLOWED_HOSTS=["testserver"],
+                               STORE_RESPONSE_CACHE={
+                                   "ENABLED": False, "CACHE_ALIAS": "default",
+                                   "TIMEOUT": 0}), \
+                connection.execute_wrapper(capture):
+            match.func(request, *match.args, **match.kwargs)
+        return captured
+
+    def explain(self, sql, params):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            result = cursor.fetchone()[0]
+            transaction.set_rollback(True)
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result[0]["Plan"]
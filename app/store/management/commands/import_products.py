@@ -0,0 +1,44 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from store.bulk_import import FORMATS, BulkProductImporter, iter_records
+
+
+class Command(BaseCommand):
+    """ Django command to import supermarket products from a CSV or JSON Lines file """
+    help = "Imports supermarket products of stores that the user owns"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, \"-\" reads stdin")
+        parser.add_argument("--user", required=True,
+                            help="Phone number of the stores owner")
+        parser.add_argument("--format", choices=FORMATS, dest="input_format",
+                            help="Input format, default is the file extension")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["input_format"] or path.rsplit(".", 1)[-1].lower()
+        if input_format not in FORMATS:
+            raise CommandError("Input format must be passed with --format.")
+
+        try:
+            user = get_user_model().objects.get(phone=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User \"{options['user']}\" does not exist.")
+
+        importer = BulkProductImporter(user, chunk_size=options["chunk_size"])
+        if path == "-":
+            report = importer.run(iter_records(sys.stdin.buffer, input_format))
+        else:
+            with open(path, "rb") as stream:
+                report = importer.run(iter_records(stream, input_format))
+
+        for error in report["errors"]:
+            self.stderr.write(
+                f"Row {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} products imported, {len(report['errors'])} rows failed."))
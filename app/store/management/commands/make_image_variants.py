@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from store import models
+from store.images import process_image
+
+
+class Command(BaseCommand):
+    """ Django command to make resized variants of product images """
+    help = "Makes variants of product images uploaded before they existed or of every image with --all"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true",
+                            help="Remake variants of images that have them")
+
+    def handle(self, *args, **options):
+        images = models.ProductImage.objects.exclude(image="")
+        if not options["all"]:
+            images = images.filter(variants={})
+
+        made = 0
+        for image_id in images.values_list("id", flat=True).iterator():
+            process_image(image_id)
+            made += 1
+        self.stdout.write(self.style.SUCCESS(f"{made} images processed."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from store import models
+from store.cache import invalidate
+from store.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    """ Django command to repair drifted rating aggregates of stores and products """
+    help = "Recomputes rating sum, count and score of rows that drifted from their ratings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for rating_model in [models.StoreRating, models.ProductRating]:
+            repaired = reconcile_ratings(rating_model, options["batch_size"])
+            rated_model = rating_model._meta.get_field(
+                rating_model.rated_field).related_model
+            if repaired:
+                # Updates send no signals
+                invalidate(rated_model)
+            self.stdout.write(
+                f"{rated_model._meta.verbose_name_plural}: {repaired} repaired")
+        self.stdout.write(self.style.SUCCESS("Ratings are reconciled."))
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+def build_category_paths(apps, schema_editor):
+    """ Sets materialized path of existing categories, parents first """
+    Category = apps.get_model("store", "Category")
+    paths = {}
+    level = list(Category.objects.filter(parent_category=None))
+    while level:
+        for category in level:
+            category.path = f"{paths.get(category.parent_category_id, '')}{category.pk}/"
+            paths[category.pk] = category.path
+        Category.objects.bulk_update(level, ["path"])
+        level = list(Category.objects.filter(
+            parent_category__in=[category.pk for category in level]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_wishlistitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.2 on 2026-10-18 11:08
+
+import re
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# A copy of store.search.normalize() as it was when this migration was
+# written, later changes to that module must not change this migration
+PERSIAN_CHARACTERS = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "ٱ": "ا", "آ": "ا",
+    "ؤ": "و",
+    **{persian: str(i) for i, persian in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{arabic: str(i) for i, arabic in enumerate("٠١٢٣٤٥٦٧٨٩")},
+    "\u200c": None,
+    "\u0640": None,
+})
+DIACRITICS = re.compile(r"[\u064b-\u065f\u0670]")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text):
+    text = DIACRITICS.sub("", text.translate(PERSIAN_CHARACTERS))
+    return WHITESPACE.sub(" ", text).strip().lower()
+
+
+def build_search_documents(apps, schema_editor):
+    """ Builds search document and vector of existing products """
+    Product = apps.get_model("store", "Product")
+    products = list(Product.objects.select_related("brand"))
+    for product in products:
+        parts = [product.name]
+        if product.brand is not None:
+            parts.extend([product.brand.name_fa, product.brand.name_en])
+        product.search_document = normalize(
+            " ".join(part for part in parts if part))
+    Product.objects.bulk_update(products, ["search_document"], batch_size=1000)
+    if schema_editor.connection.vendor == "postgresql":
+        Product.objects.update(
+            search_vector=django.contrib.postgres.search.SearchVector(
+                "search_document", config="simple"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='store_product_search_gin'),
+        ),
+        # Rows are updated after the schema changes, Postgres can't alter a
+        # table with pending trigger events of its deferred foreign keys
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
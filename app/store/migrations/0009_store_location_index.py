@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_product_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(condition=models.Q(('is_open', True), ('is_verified', True)), fields=['lat', 'long'], name='store_store_open_location_idx'),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 3.2 on 2026-10-18 11:14
+
+import re
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils.text import slugify
+
+# A copy of store.slugs and store.search.normalize() as they were when
+# this migration was written, later changes to those modules must not
+# change this migration
+PERSIAN_CHARACTERS = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "ٱ": "ا", "آ": "ا",
+    "ؤ": "و",
+    **{persian: str(i) for i, persian in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{arabic: str(i) for i, arabic in enumerate("٠١٢٣٤٥٦٧٨٩")},
+    "\u200c": None,
+    "\u0640": None,
+})
+DIACRITICS = re.compile(r"[\u064b-\u065f\u0670]")
+WHITESPACE = re.compile(r"\s+")
+
+SEPARATOR = "-"
+DEFAULT_SLUG = "product"
+SUFFIX_LENGTH = 6
+
+PERSIAN_LETTERS = {
+    "ا": "a", "ب": "b", "پ": "p", "ت": "t", "ث": "s", "ج": "j", "چ": "ch",
+    "ح": "h", "خ": "kh", "د": "d", "ذ": "z", "ر": "r", "ز": "z", "ژ": "zh",
+    "س": "s", "ش": "sh", "ص": "s", "ض": "z", "ط": "t", "ظ": "z", "ع": "",
+    "غ": "gh", "ف": "f", "ق": "gh", "ک": "k", "گ": "g", "ل": "l", "م": "m",
+    "ن": "n", "ه": "h", "ء": "",
+}
+PERSIAN_SEMIVOWELS = {"و": ("v", "u"), "ی": ("y", "i")}
+
+
+def normalize(text):
+    text = DIACRITICS.sub("", text.translate(PERSIAN_CHARACTERS))
+    return WHITESPACE.sub(" ", text).strip().lower()
+
+
+def transliterate(text):
+    words = []
+    for word in normalize(text).split(" "):
+        letters = []
+        for i, letter in enumerate(word):
+            if letter in PERSIAN_SEMIVOWELS:
+                letters.append(PERSIAN_SEMIVOWELS[letter][0 if i == 0 else 1])
+            else:
+                letters.append(PERSIAN_LETTERS.get(letter, letter))
+        words.append("".join(letters))
+    return " ".join(words)
+
+
+def slugify_name(name, max_length):
+    slug = slugify(transliterate(name))[:max_length - SUFFIX_LENGTH]
+    return slug.strip(SEPARATOR) or DEFAULT_SLUG
+
+
+def allocate_slugs(queryset, names):
+    if not names:
+        return []
+    max_length = queryset.model._meta.get_field("slug").max_length
+    bases = [slugify_name(name, max_length) for name in names]
+
+    lookups = Q(slug__in=set(bases))
+    for base in set(bases):
+        lookups |= Q(slug__startswith=base + SEPARATOR)
+    taken = set(queryset.filter(lookups).values_list("slug", flat=True))
+
+    slugs = []
+    next_numbers = {}
+    for base in bases:
+        number = next_numbers.get(base, 1)
+        slug = base
+        while slug in taken:
+            number += 1
+            slug = f"{base}{SEPARATOR}{number}"
+        next_numbers[base] = number
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def allocate_missing_slugs(apps, schema_editor):
+    """
+    Persian names used to get an empty slug and slugs were not unique,
+    the first product keeps a shared slug, the others get new ones
+    """
+    Product = apps.get_model("store", "Product")
+    products = []
+    seen = set()
+    for product in Product.objects.order_by("id").only("id", "name", "slug"):
+        if not product.slug or product.slug in seen:
+            products.append(product)
+        seen.add(product.slug)
+    slugs = allocate_slugs(Product.objects.all(),
+                           [product.name for product in products])
+    for product, slug in zip(products, slugs):
+        product.slug = slug
+    Product.objects.bulk_update(products, ["slug"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_store_location_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(allocate_missing_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='slug',
+            field=models.SlugField(blank=True, default='', editable=False, unique=True),
+        ),
+    ]
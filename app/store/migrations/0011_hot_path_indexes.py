@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 11:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0010_product_slug_field'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wishlistitem',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='brand',
+            index=models.Index(condition=models.Q(is_verified=True), fields=['name_fa'], name='store_brand_verified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(is_verified=True), fields=['parent_category', 'id'], name='store_category_verified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(is_verified=True), fields=['category', 'id'], name='store_product_verified_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(is_verified=True), fields=['-product_score', 'id'], name='store_product_verified_scr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(condition=models.Q(is_verified=True), fields=['-store_score', 'id'], name='store_store_verified_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlistitem',
+            index=models.Index(fields=['user', 'product'], name='store_wishlist_user_prod_idx'),
+        ),
+    ]
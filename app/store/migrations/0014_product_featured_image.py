@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 12:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def set_featured_images(apps, schema_editor):
+    """ Keeps the first featured image of each product and points to it """
+    Product = apps.get_model("store", "Product")
+    ProductImage = apps.get_model("store", "ProductImage")
+    first_featured = ProductImage.objects.filter(
+        product=OuterRef("product"), is_featured=True).order_by("id").values("pk")[:1]
+    ProductImage.objects.filter(is_featured=True).exclude(
+        pk=Subquery(first_featured)).update(is_featured=False)
+
+    first_image = ProductImage.objects.filter(
+        product=OuterRef("pk")).order_by("-is_featured", "id").values("pk")[:1]
+    Product.objects.update(featured_image=Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_productimage_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='featured_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.productimage'),
+        ),
+        migrations.RunPython(set_featured_images, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='productimage',
+            constraint=models.UniqueConstraint(condition=models.Q(is_featured=True), fields=('product',), name='store_productimage_one_featured'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 12:44
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_product_featured_image'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='store_product_verified_scr_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='store',
+            name='store_store_verified_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('product_score'), nulls_first=True), django.db.models.expressions.F('id'), condition=models.Q(is_verified=True), name='store_product_verified_scr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(is_verified=True), fields=['name', 'id'], name='store_product_verified_nm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('store_score'), nulls_first=True), django.db.models.expressions.F('id'), condition=models.Q(is_verified=True), name='store_store_verified_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(condition=models.Q(is_verified=True), fields=['name', 'id'], name='store_store_verified_name_idx'),
+        ),
+    ]
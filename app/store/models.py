@@ -1,18 +1,26 @@
 import os
-import uuid
 
 from django.conf import settings
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Substr
 from django_jalali.db import models as jmodels
-from autoslug.fields import AutoSlugField
+
+from .search import build_search_document, update_search_vectors
+from .slugs import save_with_slugs
+from .uploads import file_checksum
 
 
 def product_image_file_path(instance, filename):
-    """ Generate file path for new recipe image """
-    ext = filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
+    """ Generate file path for new product image from its content """
+    ext = filename.split(".")[-1].lower()
+    checksum = file_checksum(instance.image.file)
+    filename = f"{checksum}.{ext}"
 
-    return os.path.join("uploads/product/", filename)
+    return os.path.join("uploads/product/", checksum[:2], filename)
 
 
 class Store(models.Model):
@@ -22,8 +30,12 @@ class Store(models.Model):
     address = models.CharField(max_length=255)
     long = models.DecimalField(max_digits=8, decimal_places=6)
     lat = models.DecimalField(max_digits=8, decimal_places=6)
+    # Average of ratings, kept up to date with rating_sum and
+    # rating_count when ratings change, see store/ratings.py
     store_score = models.DecimalField(
         max_digits=2, decimal_places=1, null=True, default=None, blank=True)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
 
     city = models.ForeignKey("City", on_delete=models.CASCADE)
     store_category = models.ForeignKey(
@@ -41,6 +53,22 @@ class Store(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Bounding box pre-filter of nearby stores
+            models.Index(fields=["lat", "long"],
+                         name="store_store_open_location_idx",
+                         condition=models.Q(is_open=True, is_verified=True)),
+            # Verified stores ordered by score or name, in both directions,
+            # see KeysetPagination in store/pagination.py
+            models.Index(F("store_score").asc(nulls_first=True), F("id"),
+                         name="store_store_verified_score_idx",
+                         condition=models.Q(is_verified=True)),
+            models.Index(fields=["name", "id"],
+                         name="store_store_verified_name_idx",
+                         condition=models.Q(is_verified=True)),
+        ]
+
 
 class City(models.Model):
     """ City database model in the system """
@@ -53,10 +81,41 @@ class City(models.Model):
         verbose_name_plural = "Cities"
 
 
+class CategoryQuerySet(models.QuerySet):
+
+    def descendants(self, category, include_self=True):
+        """ Returns categories of the subtree of category """
+        queryset = self.filter(path__startswith=category.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=category.pk)
+        return queryset
+
+    def tree(self):
+        """
+        Returns root categories of the queryset, each category has
+        its subcategories in "tree_children", all made with one query.
+        subcategories whose parent is not in queryset are left out
+        """
+        categories = list(self.order_by("name"))
+        nodes = {category.pk: category for category in categories}
+        roots = []
+        for category in categories:
+            category.tree_children = []
+        for category in categories:
+            if category.parent_category_id is None:
+                roots.append(category)
+            elif category.parent_category_id in nodes:
+                nodes[category.parent_category_id].tree_children.append(
+                    category)
+        return roots
+
+
 class Category(models.Model):
     """ 
     Category database model in the system.
-    if "parent_category" is passed then this is a subcategory
+    if "parent_category" is passed then this is a subcategory.
+    "path" is the materialized path of ids from the root e.g "1/4/9/",
+    so a whole subtree can be fetched with one "path LIKE '1/4/%'" query.
     """
     name = models.CharField(max_length=255, unique=True)
     is_verified = models.BooleanField(default=False)
@@ -66,14 +125,49 @@ class Category(models.Model):
         "self", on_delete=models.CASCADE, null=True, blank=True, related_name="sub_categories")
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    path = models.CharField(max_length=255, db_index=True,
+                            editable=False, default="")
     created = jmodels.jDateField(auto_now_add=True)
     updated = jmodels.jDateField(auto_now=True)
 
+    objects = CategoryQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """ Saves the category and keeps path of it and its subtree updated """
+        parent_path = ""
+        if self.parent_category_id:
+            # Read from database, a loaded parent instance may be outdated
+            parent_path = Category.objects.filter(
+                pk=self.parent_category_id).values_list("path", flat=True).get()
+        if self.path and parent_path.startswith(self.path):
+            raise ValueError(
+                "A category can not be moved under itself or its subcategories.")
+
+        old_path = self.path
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = f"{parent_path}{self.pk}/"
+            if self.path == old_path:
+                return
+
+            Category.objects.filter(pk=self.pk).update(path=self.path)
+            if old_path:
+                # Moved, replace old path prefix of all descendants
+                Category.objects.filter(path__startswith=old_path).exclude(
+                    pk=self.pk).update(path=Concat(
+                        Value(self.path), Substr("path", len(old_path) + 1)))
+
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name_plural = "Categories"
+        indexes = [
+            # Verified root categories and subcategories of a category
+            models.Index(fields=["parent_category", "id"],
+                         name="store_category_verified_idx",
+                         condition=models.Q(is_verified=True)),
+        ]
 
 
 class Brand(models.Model):
@@ -88,22 +182,100 @@ class Brand(models.Model):
     created = jmodels.jDateField(auto_now_add=True)
     updated = jmodels.jDateField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Search documents of products are only rebuilt when names change
+        instance.saved_names = (instance.__dict__.get("name_fa"),
+                                instance.__dict__.get("name_en"))
+        return instance
+
     def save(self, *args, **kwargs):
         self.name_en = self.name_en.lower()
-        return super().save(*args, **kwargs)
+        renamed = (not self._state.adding and getattr(
+            self, "saved_names", None) != (self.name_fa, self.name_en))
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if renamed:
+                self.update_product_search_documents()
+        self.saved_names = (self.name_fa, self.name_en)
+
+    def update_product_search_documents(self):
+        """ Products are searched by brand names too """
+        products = list(Product.objects.filter(brand=self).only("id", "name"))
+        for product in products:
+            product.search_document = build_search_document(
+                product.name, self)
+        Product.objects.bulk_update(products, ["search_document"])
+        update_search_vectors(Product.objects.filter(brand=self))
 
     def __str__(self):
         return self.name_fa
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["name_fa"], name="store_brand_verified_idx",
+                         condition=models.Q(is_verified=True)),
+        ]
+
+
+class ProductQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        """
+        Allocates slugs of all products with one query and inserts them,
+        unlike bulk_create() of Django it supports child models of Product
+        by inserting the parent Product rows first and then the child rows
+        """
+        objs = list(objs)
+        return save_with_slugs(
+            Product._base_manager.using(self.db), objs,
+            lambda: self._bulk_create(objs, batch_size, ignore_conflicts))
+
+    def _bulk_create(self, objs, batch_size, ignore_conflicts):
+        if not self.model._meta.parents:
+            return super().bulk_create(objs, batch_size, ignore_conflicts)
+        if ignore_conflicts:
+            raise ValueError(
+                "ignore_conflicts is not supported for child models of Product.")
+
+        parent_fields = [field for field in Product._meta.concrete_fields
+                         if not field.primary_key]
+        parents = [
+            Product(**{field.attname: getattr(obj, field.attname)
+                       for field in parent_fields})
+            for obj in objs
+        ]
+        Product.objects.using(self.db).bulk_create(parents, batch_size)
+
+        for obj, parent in zip(objs, parents):
+            for field in Product._meta.concrete_fields:
+                setattr(obj, field.attname, getattr(parent, field.attname))
+            setattr(obj, self.model._meta.pk.attname, parent.pk)
+            obj._state.adding = False
+            obj._state.db = self.db
+
+        child_fields = self.model._meta.local_concrete_fields
+        batch_size = batch_size or len(objs)
+        for start in range(0, len(objs), batch_size):
+            self._insert(objs[start:start + batch_size], fields=child_fields)
+        return objs
+
 
 class Product(models.Model):
-    """ Product database model in the system """
+    """
+    Product database model in the system.
+    "slug" is allocated from the name once, see store/slugs.py
+    """
     name = models.CharField(max_length=255)
     purchased_price = models.IntegerField(null=True, blank=True)
     sale_price = models.IntegerField()
     stock = models.PositiveIntegerField()
+    # Average of ratings, see Store.store_score
     product_score = models.DecimalField(
         max_digits=2, decimal_places=1, null=True, default=None, blank=True)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
     discount = models.IntegerField(null=True, blank=True)
     is_verified = models.BooleanField(default=False)
     brand = models.ForeignKey(
@@ -111,18 +283,59 @@ class Product(models.Model):
     category = models.ForeignKey(
         "Category", on_delete=models.SET_NULL, null=True, blank=True, related_name="products")
     store = models.ForeignKey("Store", on_delete=models.CASCADE)
-    slug = AutoSlugField(populate_from="name", default="")
+    slug = models.SlugField(default="", blank=True, editable=False,
+                            unique=True)
+    # Featured image, or the first one when none is, kept up to date
+    # by update_featured_images() so lists need no query of all images
+    featured_image = models.ForeignKey(
+        "ProductImage", on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name="+")
+    # Normalized name and brand names, see store/search.py
+    search_document = models.TextField(blank=True, default="", editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
     created = jmodels.jDateField(auto_now_add=True)
     updated = jmodels.jDateField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.search_document = build_search_document(self.name, self.brand)
+
+        def save():
+            super(Product, self).save(*args, **kwargs)
+            update_search_vectors(Product.objects.filter(pk=self.pk))
+
+        save_with_slugs(Product._base_manager.using(kwargs.get("using")),
+                        [self], save)
+
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"],
+                     name="store_product_search_gin"),
+            # Verified products of a category
+            models.Index(fields=["category", "id"],
+                         name="store_product_verified_cat_idx",
+                         condition=models.Q(is_verified=True)),
+            # Verified products ordered by score or name
+            models.Index(F("product_score").asc(nulls_first=True), F("id"),
+                         name="store_product_verified_scr_idx",
+                         condition=models.Q(is_verified=True)),
+            models.Index(fields=["name", "id"],
+                         name="store_product_verified_nm_idx",
+                         condition=models.Q(is_verified=True)),
+        ]
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(
         "Product", on_delete=models.CASCADE, related_name="product_images")
     image = models.ImageField(upload_to=product_image_file_path)
+    # Storage names of resized copies as {size: {format: name}},
+    # filled in the background after upload, see store/images.py
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     is_featured = models.BooleanField(default=False)
     created = jmodels.jDateField(auto_now_add=True)
     updated = jmodels.jDateField(auto_now=True)
@@ -130,6 +343,48 @@ class ProductImage(models.Model):
     def __str__(self):
         return self.product.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Variants are only remade when another image is saved
+        instance.saved_image = instance.__dict__.get("image")
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.image and not self.image._committed:
+            name = self.image.field.generate_filename(self, self.image.name)
+            if self.image.storage.exists(name):
+                # The same image was uploaded before, its file is shared
+                self.image.name = name
+                self.image._committed = True
+        with transaction.atomic(using=kwargs.get("using")):
+            if self.is_featured:
+                # A product has one featured image
+                ProductImage.objects.filter(
+                    product=self.product_id, is_featured=True).exclude(
+                    pk=self.pk).update(is_featured=False)
+            # Signals update the featured image of the product in this
+            # transaction too, see store/signals.py
+            super().save(*args, **kwargs)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"], condition=models.Q(is_featured=True),
+                name="store_productimage_one_featured"),
+        ]
+
+
+def update_featured_images(product_ids):
+    """
+    Points products at their featured image, or their first image when
+    none is featured, must be called after images are added or removed
+    """
+    first_image = ProductImage.objects.filter(
+        product=OuterRef("pk")).order_by("-is_featured", "id").values("pk")[:1]
+    Product.objects.filter(pk__in=product_ids).update(
+        featured_image=Subquery(first_image))
+
 
 class SupermarketProduct(Product):
     """ Super market product database model in the system """
@@ -138,13 +393,74 @@ class SupermarketProduct(Product):
     in_bulk = models.BooleanField(default=False)
 
 
+class Rating(models.Model):
+    """
+    Rating of a user from 1 to 5, subclasses set "rated_field", the
+    foreign key of the rated object, and "score_field", the score column
+    of the rated object
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE)
+    score = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(5)])
+    created = jmodels.jDateField(auto_now_add=True)
+    updated = jmodels.jDateField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Score in database, rating changes are applied as a difference
+        instance.saved_score = instance.__dict__.get("score")
+        return instance
+
+
+class StoreRating(Rating):
+    """ Rating of a store """
+    store = models.ForeignKey(
+        "Store", on_delete=models.CASCADE, related_name="ratings")
+
+    rated_field = "store"
+    score_field = "store_score"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["store", "user"],
+                                    name="store_storerating_unique_user"),
+        ]
+
+
+class ProductRating(Rating):
+    """ Rating of a product """
+    product = models.ForeignKey(
+        "Product", on_delete=models.CASCADE, related_name="ratings")
+
+    rated_field = "product"
+    score_field = "product_score"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "user"],
+                                    name="store_productrating_unique_user"),
+        ]
+
+
 class WishListItem(models.Model):
     """ Wish list database model in the system """
     product = models.ForeignKey("Product", on_delete=models.CASCADE)
+    # Indexed by "user" first in Meta.indexes
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
-                             on_delete=models.CASCADE)
+                             on_delete=models.CASCADE, db_index=False)
 
     def __str__(self):
         return self.product.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "product"],
+                         name="store_wishlist_user_prod_idx"),
+        ]
+
     
\ No newline at end of file
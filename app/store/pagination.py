@@ -0,0 +1,317 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import BooleanField, Expression, Func, Q, Value
+from django.db.models.expressions import Col
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def key_ordering(expression, descending=False, null=False):
+    """
+    Ordering of a sort key, NULL sorts as the smallest value so an
+    index on "(key NULLS FIRST, id)" serves both directions
+    """
+    if descending:
+        return expression.desc(nulls_last=True) if null else expression.desc()
+    return expression.asc(nulls_first=True) if null else expression.asc()
+
+
+class ModelColumn(Expression):
+    """
+    Column of field in the table of the model it is declared on. Django
+    reads an inherited primary key from the parent link of the child
+    table, e.g. "id" of SupermarketProduct is its "product_ptr_id", which
+    an index of the parent table can't serve.
+    """
+
+    def __init__(self, field):
+        super().__init__(output_field=field)
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None,
+                           summarize=False, for_save=False):
+        # self.field is the output field
+        alias = query.join_parent_model(query.get_meta(), self.field.model,
+                                        query.get_initial_alias(), {})
+        return Col(alias, self.field)
+
+
+class RowComparison(Func):
+    """
+    SQL row comparison, e.g. "(name, id) > ('Milk', 42)", an index on
+    (name, id) serves it as one range where "name > 'Milk' OR
+    (name = 'Milk' AND id > 42)" is not
+    """
+    output_field = BooleanField()
+    operators = {"gt": ">", "lt": "<"}
+
+    def __init__(self, lookup, expressions, values):
+        self.operator = self.operators[lookup]
+        super().__init__(*expressions, *values)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        half = len(sqls) // 2
+        return (f"({', '.join(sqls[:half])}) {self.operator} "
+                f"({', '.join(sqls[half:])})"), params
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination.
+    Every page starts right after the sort key of the last row of the
+    previous page, e.g. "WHERE (name, id) > ('Milk', 42)", instead of
+    "OFFSET n", so deep pages cost the same as the first one.
+    No COUNT(*) query is made, clients follow "next"/"previous" links
+    that carry an opaque cursor.
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    ordering_query_param = api_settings.ORDERING_PARAM
+    default_ordering = "id"
+    # Sort keys that every queryset supports, views can add more
+    # with "ordering_aliases", e.g. {"score": "store_score"}
+    ordering_fields = {"id": "id", "name": "name"}
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            ordering, value, pk, reverse = self.get_ordering(request), None, None, False
+        else:
+            ordering, value, pk, reverse = cursor
+
+        fields = self.get_ordering_fields(queryset, view)
+        descending = ordering.startswith("-")
+        alias = ordering.lstrip("-")
+        if alias not in fields:
+            if cursor is not None:
+                raise NotFound(self.invalid_cursor_message)
+            descending, alias = False, self.default_ordering
+        model_field = fields[alias]
+        self.ordering = f"-{alias}" if descending else alias
+        self.key = model_field.attname
+        # Sort keys that are not unique are made unique by the primary key
+        # of their table, e.g. "id" of Product for names of SupermarketProduct
+        if model_field.primary_key or (model_field.unique and not model_field.null):
+            tie_breaker = None
+        else:
+            tie_breaker = model_field.model._meta.pk
+        self.tie_breaker = tie_breaker.attname if tie_breaker else None
+        if cursor is not None and value is not None:
+            try:
+                value = model_field.to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        # Walking backwards is walking forwards on the reversed ordering
+        ascending = descending == reverse
+        lookup = "gt" if ascending else "lt"
+        columns = [ModelColumn(model_field)]
+        if tie_breaker:
+            columns.append(ModelColumn(tie_breaker))
+        order_by = [key_ordering(column, not ascending, column.field.null)
+                    for column in columns]
+
+        # Rows are read in segments, each is one range of the index of
+        # the ordering. Nullable keys have their NULL rows in a segment of
+        # their own, a row comparison never matches them.
+        if cursor is None:
+            seek = []
+        else:
+            values = [value, pk] if tie_breaker else [value]
+            seek = [RowComparison(lookup, columns, [
+                Value(item, output_field=column.field)
+                for column, item in zip(columns, values)])]
+            if model_field.primary_key and model_field.model is not queryset.model:
+                # A child table shares primary keys of its parent, both are
+                # bounded so a merge join scans neither from its start
+                seek.append(Q(**{f"pk__{lookup}": value}))
+        if not model_field.null:
+            segments = [seek]
+        else:
+            null = Q(**{f"{self.key}__isnull": True})
+            not_null = Q(**{f"{self.key}__isnull": False})
+            if cursor is None:
+                segments = [[null], [not_null]] if ascending \
+                    else [[not_null], [null]]
+            elif value is None:
+                after = RowComparison(lookup, columns[1:], [
+                    Value(pk, output_field=tie_breaker)])
+                segments = [[null, after]] + ([[not_null]] if ascending else [])
+            else:
+                segments = [seek] + ([] if ascending else [[null]])
+
+        # Fetch one extra row to know whether there is a following page
+        results = []
+        for conditions in segments:
+            limit = self.page_size + 1 - len(results)
+            if limit <= 0:
+                break
+            results.extend(
+                queryset.filter(*conditions).order_by(*order_by)[:limit])
+        has_following = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = cursor is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request):
+        """ Returns the first ordering term passed by client """
+        params = request.query_params.get(self.ordering_query_param, "")
+        terms = [term.strip() for term in params.split(",") if term.strip()]
+        return terms[0] if terms else self.default_ordering
+
+    def get_ordering_fields(self, queryset, view):
+        """
+        Returns a mapping of ordering alias -> model field
+        for fields that exist on the queryset model
+        """
+        aliases = dict(self.ordering_fields)
+        aliases.update(getattr(view, "ordering_aliases", {}))
+
+        fields = {}
+        for alias, field_name in aliases.items():
+            try:
+                fields[alias] = queryset.model._meta.get_field(field_name)
+            except FieldDoesNotExist:
+                continue
+        return fields
+
+    def decode_cursor(self, request):
+        """ Returns (ordering, key value, pk, reverse) or None """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            return (str(tokens["o"]), tokens["k"], int(tokens["p"]),
+                    bool(tokens.get("r", False)))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse=False):
+        tokens = {
+            "o": self.ordering,
+            "k": getattr(instance, self.key),
+            "p": getattr(instance, self.tie_breaker or self.key),
+        }
+        if reverse:
+            tokens["r"] = 1
+
+        encoded = urlsafe_b64encode(json.dumps(
+            tokens, cls=DjangoJSONEncoder, separators=(",", ":")).encode()).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class ListPagination(BasePagination):
+    """
+    Limit/offset pagination by default, switches to keyset pagination
+    when "?pagination=cursor" or a "cursor" is passed.
+    e.g. /store/stores/?pagination=cursor&ordering=-score
+    """
+    mode_query_param = "pagination"
+    limit_offset_class = LimitOffsetPagination
+    keyset_class = KeysetPagination
+
+    def uses_keyset(self, request):
+        return (request.query_params.get(self.mode_query_param) == "cursor"
+                or bool(request.query_params.get(self.keyset_class.cursor_query_param)))
+
+    def paginates_rows(self, request):
+        """ Keyset cursors are read from model instances, not .values() rows """
+        return not self.uses_keyset(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.uses_keyset(request):
+            self.paginator = self.keyset_class()
+        else:
+            self.paginator = self.limit_offset_class()
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.limit_offset_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.limit_offset_class().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Pass \"cursor\" to use keyset pagination.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            {
+                "name": self.keyset_class.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -9,7 +9,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return obj.owner == request.user
+        return obj.owner_id == request.user.id
 
 
 class IsStoreOwnerToUpdate(permissions.BasePermission):
@@ -18,7 +18,6 @@ class IsStoreOwnerToUpdate(permissions.BasePermission):
         """ Check if the current user is the owner of store """
 
         if request.method == "PATCH" or request.method == "PUT":
-            print(obj.store.owner == request.user)
-            return obj.store.owner == request.user
+            return obj.store.owner_id == request.user.id
 
         return True
@@ -0,0 +1,74 @@
+"""
+Running aggregates of store and product ratings.
+
+Rated rows keep "rating_sum" and "rating_count" of their ratings and the
+average as their score column. A rating change only adds to the running
+sum and count of its row in one UPDATE, ratings are never aggregated
+again, so the score is a plain indexed column to order by.
+"reconcile_ratings" repairs rows that drifted, e.g. after raw SQL.
+"""
+from django.db.models import (Count, DecimalField, F, FloatField,
+                              IntegerField, OuterRef, Q, Subquery, Sum, Value)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def score_expression(rating_sum, rating_count):
+    """ Average of ratings, NULL if there is no rating """
+    return Cast(rating_sum, FloatField()) / NullIf(rating_count, Value(0))
+
+
+def apply_rating_change(queryset, score_field, score_delta, count_delta):
+    """
+    Adds to running sum and count of rated rows in queryset
+    and updates their score in the same UPDATE
+    """
+    rating_sum = F("rating_sum") + score_delta
+    rating_count = F("rating_count") + count_delta
+    return queryset.update(
+        rating_sum=rating_sum, rating_count=rating_count,
+        **{score_field: score_expression(rating_sum, rating_count)})
+
+
+def reconcile_ratings(rating_model, batch_size=1000):
+    """
+    Recomputes aggregates of rated rows whose sum, count or score
+    do not match their ratings, returns number of repaired rows
+    """
+    rated_field = rating_model.rated_field
+    score_field = rating_model.score_field
+    rated_model = rating_model._meta.get_field(rated_field).related_model
+
+    ratings = rating_model.objects.filter(
+        **{rated_field: OuterRef("pk")}).order_by().values(rated_field)
+    actual_sum = Coalesce(Subquery(
+        ratings.annotate(total=Sum("score")).values("total"),
+        output_field=IntegerField()), 0)
+    actual_count = Coalesce(Subquery(
+        ratings.annotate(total=Count("pk")).values("total"),
+        output_field=IntegerField()), 0)
+    score_field_instance = rated_model._meta.get_field(score_field)
+    expected_score = Cast(
+        score_expression(F("actual_sum"), F("actual_count")),
+        DecimalField(max_digits=score_field_instance.max_digits,
+                     decimal_places=score_field_instance.decimal_places))
+
+    drifted = rated_model._base_manager.annotate(
+        actual_sum=actual_sum, actual_count=actual_count,
+        expected_score=expected_score,
+    ).filter(
+        ~Q(rating_sum=F("actual_sum")) |
+        ~Q(rating_count=F("actual_count")) |
+        Q(actual_count=0, **{f"{score_field}__isnull": False}) |
+        Q(actual_count__gt=0, **{f"{score_field}__isnull": True}) |
+        (Q(actual_count__gt=0) & ~Q(**{score_field: F("expected_score")}))
+    ).values_list("pk", flat=True)
+
+    repaired = 0
+    drifted_ids = list(drifted)
+    for start in range(0, len(drifted_ids), batch_size):
+        repaired += rated_model._base_manager.filter(
+            pk__in=drifted_ids[start:start + batch_size]
+        ).update(
+            rating_sum=actual_sum, rating_count=actual_count,
+            **{score_field: score_expression(actual_sum, actual_count)})
+    return repaired
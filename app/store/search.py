@@ -0,0 +1,88 @@
+"""
+Product full-text search.
+
+Every product keeps a normalized "search_document" (its name and brand
+names) and on PostgreSQL a "search_vector" built from it, which is
+indexed with GIN. On other databases search falls back to
+"search_document" substring matching.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F
+
+# Postgres has no Persian dictionary, "simple" only lower cases the words,
+# Persian specific normalization is done by "normalize"
+SEARCH_CONFIG = "simple"
+
+PERSIAN_CHARACTERS = str.maketrans({
+    # Arabic letters that are typed instead of Persian ones
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "ٱ": "ا", "آ": "ا",
+    "ؤ": "و",
+    # Persian and Arabic digits
+    **{persian: str(i) for i, persian in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{arabic: str(i) for i, arabic in enumerate("٠١٢٣٤٥٦٧٨٩")},
+    # Zero width non-joiner, "می‌خواهم" and "میخواهم" are the same word
+    "\u200c": None,
+    # Tatweel, e.g. "شـیر"
+    "\u0640": None,
+})
+# Harakat (diacritics) and superscript alef
+DIACRITICS = re.compile(r"[\u064b-\u065f\u0670]")
+WHITESPACE = re.compile(r"\s+")
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """ Returns text normalized for indexing and searching """
+    text = DIACRITICS.sub("", text.translate(PERSIAN_CHARACTERS))
+    return WHITESPACE.sub(" ", text).strip().lower()
+
+
+def build_search_document(name, brand=None):
+    """ Returns the normalized text a product is searched by """
+    parts = [name]
+    if brand is not None:
+        parts.extend([brand.name_fa, brand.name_en])
+    return normalize(" ".join(part for part in parts if part))
+
+
+def supports_full_text_search(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def update_search_vectors(queryset):
+    """
+    Rebuilds search vectors of products in queryset from
+    their search documents with one UPDATE
+    """
+    if not supports_full_text_search(queryset):
+        return 0
+    return queryset.update(
+        search_vector=SearchVector("search_document", config=SEARCH_CONFIG))
+
+
+def search_products(queryset, text):
+    """
+    Filters queryset by all words of text, words match as prefixes,
+    results are ordered by rank on PostgreSQL
+    """
+    words = WORD.findall(normalize(text))
+    if not words:
+        return queryset
+
+    if not supports_full_text_search(queryset):
+        for word in words:
+            queryset = queryset.filter(search_document__icontains=word)
+        return queryset
+
+    # Words only contain letters, digits and "_",
+    # so they are safe to be used in a raw tsquery
+    query = SearchQuery(" & ".join(f"{word}:*" for word in words),
+                        config=SEARCH_CONFIG, search_type="raw")
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F("search_vector"), query)).order_by("-search_rank", "pk")
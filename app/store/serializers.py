@@ -1,15 +1,57 @@
 from rest_framework import serializers
 
 from . import models
-
-
-class StoreSerializer(serializers.ModelSerializer):
+from .images import variant_name
+
+
+class FieldProjectionMixin:
+    """
+    Renders only the fields listed in the "fields" query parameter or all
+    but those in "exclude", e.g. "?fields=id,name,sale_price", on reads.
+    Only top-level serializers are projected, nested ones are rendered
+    whole. Views with QueryPlanningMixin fetch only the columns of the
+    rendered fields of a projected serializer.
+    """
+
+    @property
+    def projected(self):
+        request = self.context.get("request")
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return (request is not None and request.method == "GET"
+                and parent is None
+                and ("fields" in request.query_params
+                     or "exclude" in request.query_params))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.projected:
+            return fields
+
+        request = self.context["request"]
+        only = request.query_params.get("fields")
+        if only:
+            names = set(only.split(","))
+            fields = {name: field for name, field in fields.items()
+                      if name in names}
+        exclude = request.query_params.get("exclude")
+        if exclude:
+            names = set(exclude.split(","))
+            fields = {name: field for name, field in fields.items()
+                      if name not in names}
+        return fields
+
+
+class StoreSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     store_score = serializers.DecimalField(
         max_digits=2, decimal_places=1, min_value=0, max_value=5, read_only=True)
+    # Only set when stores are listed with "near", in km
+    distance = serializers.FloatField(read_only=True)
 
     class Meta:
         model = models.Store
-        fields = "__all__"
+        exclude = ["rating_sum"]
         read_only_fields = ["id", "is_verified", "owner"]
 
 
@@ -31,6 +73,20 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "is_verified", "owner"]
 
 
+class CategoryTreeSerializer(serializers.ModelSerializer):
+    """ Serializes a category and all of its subcategories recursively """
+    sub_categories = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Category
+        fields = ["id", "name", "store_category",
+                  "parent_category", "sub_categories"]
+
+    def get_sub_categories(self, obj):
+        return CategoryTreeSerializer(
+            obj.tree_children, many=True, context=self.context).data
+
+
 class BrandSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -40,13 +96,38 @@ class BrandSerializer(serializers.ModelSerializer):
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    # Read by finish_representation(), see core.query_planning.collect_columns
+    query_columns = ["variants"]
+
     class Meta:
         model = models.ProductImage
-        fields = "__all__"
+        exclude = ["variants"]
         read_only_fields = ["id"]
 
-
-class ProductSerializer(serializers.ModelSerializer):
+    def to_representation(self, instance):
+        return self.finish_representation(
+            super().to_representation(instance),
+            {name: getattr(instance, name) for name in self.query_columns})
+
+    def finish_representation(self, data, values):
+        """
+        "image" is the variant of "image_size" and "image_format" query
+        parameters when there is one, see store/images.py.
+        values are the "query_columns" of the image, it is also called
+        for rows in core/fast_serialization.py
+        """
+        request = self.context.get("request")
+        size = request and request.query_params.get("image_size")
+        if size:
+            name = variant_name(values["variants"], size,
+                                request.query_params.get("image_format"))
+            if name:
+                data["image"] = request.build_absolute_uri(
+                    self.Meta.model.image.field.storage.url(name))
+        return data
+
+
+class ProductSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     discount = serializers.IntegerField(min_value=1, max_value=100)
     product_score = serializers.DecimalField(
         max_digits=2, decimal_places=1, min_value=0, max_value=5, read_only=True)
@@ -54,7 +135,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Product
-        fields = "__all__"
+        exclude = ["search_document", "search_vector", "rating_sum"]
 
     # def create(self, validated_data):
     #     print("Validated data--", validated_data)
@@ -68,14 +149,31 @@ class ProductSerializer(serializers.ModelSerializer):
     #             product=product_item_obj, **product_image)
 
 
+class ProductCompactSerializer(FieldProjectionMixin, serializers.ModelSerializer):
+    """ Product in a list with only its featured image, see "compact=true" """
+    product_score = serializers.DecimalField(
+        max_digits=2, decimal_places=1, read_only=True)
+    featured_image = ProductImageSerializer(read_only=True)
+
+    class Meta:
+        model = models.Product
+        fields = ["id", "name", "slug", "sale_price", "discount",
+                  "product_score", "store", "featured_image"]
+
+
 class SupermarketProductSerializer(ProductSerializer):
 
     class Meta:
         model = models.SupermarketProduct
-        fields = "__all__"
+        exclude = ["search_document", "search_vector", "rating_sum"]
         read_only_fields = ["id", "is_verified", "product_score"]
 
 
+class RatingSerializer(serializers.Serializer):
+    """ Score a user rates a store or product with """
+    score = serializers.IntegerField(min_value=1, max_value=5)
+
+
 class WishlistItemSerializer(serializers.ModelSerializer):
 
     class Meta:
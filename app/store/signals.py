@@ -0,0 +1,82 @@
+from django.db.models.signals import post_delete, post_save
+
+from . import models
+from .cache import invalidate
+from .images import schedule_variants
+from .ratings import apply_rating_change
+
+CATALOGUE_MODELS = [
+    models.Store,
+    models.Category,
+    models.Brand,
+    models.Product,
+    models.SupermarketProduct,
+    models.ProductImage,
+]
+
+
+def invalidate_catalogue_cache(sender, **kwargs):
+    """ Invalidates cached responses that depend on sender """
+    # A SupermarketProduct row is also a Product row
+    invalidate(sender, *sender._meta.get_parent_list())
+
+
+for model in CATALOGUE_MODELS:
+    post_save.connect(invalidate_catalogue_cache, sender=model,
+                      dispatch_uid=f"invalidate_cache_on_save_{model.__name__}")
+    post_delete.connect(invalidate_catalogue_cache, sender=model,
+                        dispatch_uid=f"invalidate_cache_on_delete_{model.__name__}")
+
+
+def update_rating_aggregates(sender, instance, created=False, **kwargs):
+    """ Applies the rating change to running aggregates of the rated row """
+    saved_score = getattr(instance, "saved_score", None)
+    if kwargs["signal"] is post_delete:
+        score_delta, count_delta = -saved_score, -1
+    elif created:
+        score_delta, count_delta = instance.score, 1
+    else:
+        score_delta, count_delta = instance.score - saved_score, 0
+    instance.saved_score = instance.score
+
+    if score_delta or count_delta:
+        rated_field = sender._meta.get_field(sender.rated_field)
+        rated_model = rated_field.related_model
+        apply_rating_change(
+            rated_model._base_manager.filter(
+                pk=getattr(instance, rated_field.attname)),
+            sender.score_field, score_delta, count_delta)
+        # Updates send no signals
+        invalidate(rated_model)
+
+
+for model in [models.StoreRating, models.ProductRating]:
+    post_save.connect(update_rating_aggregates, sender=model,
+                      dispatch_uid=f"update_aggregates_on_save_{model.__name__}")
+    post_delete.connect(update_rating_aggregates, sender=model,
+                        dispatch_uid=f"update_aggregates_on_delete_{model.__name__}")
+
+
+def make_image_variants(sender, instance, created, **kwargs):
+    """ Makes resized variants of new and replaced product images """
+    saved_image = getattr(instance, "saved_image", None)
+    if instance.image and (created or instance.image.name != saved_image):
+        schedule_variants(instance.pk)
+    instance.saved_image = instance.image.name
+
+
+post_save.connect(make_image_variants, sender=models.ProductImage,
+                  dispatch_uid="make_image_variants")
+
+
+def update_featured_image(sender, instance, **kwargs):
+    """ Points the product of an added, changed or removed image at its featured one """
+    models.update_featured_images([instance.product_id])
+    # Updates send no signals
+    invalidate(models.Product, models.SupermarketProduct)
+
+
+post_save.connect(update_featured_image, sender=models.ProductImage,
+                  dispatch_uid="update_featured_image_on_save")
+post_delete.connect(update_featured_image, sender=models.ProductImage,
+                    dispatch_uid="update_featured_image_on_delete")
@@ -0,0 +1,103 @@
+"""
+Unique product slugs allocated in batches.
+
+Slugs are made from product names, Persian names are transliterated to
+Latin letters first. Slugs that are already taken by any of the names
+are read with one query ("milk" matches "milk" and "milk-<anything>"),
+then free slugs ("milk", "milk-2", "milk-3", ...) are handed out in
+memory, so saving many products with the same name does not take
+a query per candidate slug. Slugs are unique in the database, a save
+that lost a slug to a concurrent one allocates again, see save_with_slugs().
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .search import normalize
+
+SEPARATOR = "-"
+DEFAULT_SLUG = "product"
+# Room kept for the number suffix, e.g. "-99999"
+SUFFIX_LENGTH = 6
+# Saves of products allocated slugs that other saves took first
+MAX_ATTEMPTS = 3
+
+PERSIAN_LETTERS = {
+    "ا": "a", "ب": "b", "پ": "p", "ت": "t", "ث": "s", "ج": "j", "چ": "ch",
+    "ح": "h", "خ": "kh", "د": "d", "ذ": "z", "ر": "r", "ز": "z", "ژ": "zh",
+    "س": "s", "ش": "sh", "ص": "s", "ض": "z", "ط": "t", "ظ": "z", "ع": "",
+    "غ": "gh", "ف": "f", "ق": "gh", "ک": "k", "گ": "g", "ل": "l", "م": "m",
+    "ن": "n", "ه": "h", "ء": "",
+}
+# Letters that are consonants at the start of a word and vowels elsewhere
+PERSIAN_SEMIVOWELS = {"و": ("v", "u"), "ی": ("y", "i")}
+
+
+def transliterate(text):
+    """ Returns normalized text with Persian letters written in Latin """
+    words = []
+    for word in normalize(text).split(" "):
+        letters = []
+        for i, letter in enumerate(word):
+            if letter in PERSIAN_SEMIVOWELS:
+                letters.append(PERSIAN_SEMIVOWELS[letter][0 if i == 0 else 1])
+            else:
+                letters.append(PERSIAN_LETTERS.get(letter, letter))
+        words.append("".join(letters))
+    return " ".join(words)
+
+
+def slugify_name(name, max_length=50):
+    """ Returns the base slug of name, short enough to add a number to it """
+    slug = slugify(transliterate(name))[:max_length - SUFFIX_LENGTH]
+    return slug.strip(SEPARATOR) or DEFAULT_SLUG
+
+
+def allocate_slugs(queryset, names, field_name="slug"):
+    """
+    Returns a unique slug for every name in order,
+    slugs of rows in queryset are taken
+    """
+    if not names:
+        return []
+    max_length = queryset.model._meta.get_field(field_name).max_length
+    bases = [slugify_name(name, max_length) for name in names]
+
+    lookups = Q(**{f"{field_name}__in": set(bases)})
+    for base in set(bases):
+        lookups |= Q(**{f"{field_name}__startswith": base + SEPARATOR})
+    taken = set(queryset.filter(lookups).values_list(field_name, flat=True))
+
+    slugs = []
+    next_numbers = {}
+    for base in bases:
+        number = next_numbers.get(base, 1)
+        slug = base
+        while slug in taken:
+            number += 1
+            slug = f"{base}{SEPARATOR}{number}"
+        next_numbers[base] = number
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def save_with_slugs(queryset, objs, save, field_name="slug"):
+    """
+    Allocates slugs of objs that have none and calls save() in a
+    transaction, returns what it returns. When save() fails because a
+    concurrent save took one of the slugs, new ones are allocated
+    """
+    unslugged = [obj for obj in objs if not getattr(obj, field_name)]
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        slugs = allocate_slugs(queryset, [obj.name for obj in unslugged],
+                               field_name)
+        for obj, slug in zip(unslugged, slugs):
+            setattr(obj, field_name, slug)
+        try:
+            with transaction.atomic(using=queryset.db):
+                return save()
+        except IntegrityError:
+            taken = queryset.filter(**{f"{field_name}__in": slugs}).exists()
+            if attempt == MAX_ATTEMPTS or not taken:
+                raise
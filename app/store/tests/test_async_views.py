@@ -0,0 +1,64 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import resolve
+from rest_framework import status
+
+from core.async_db import close_connections
+
+from .. import models
+from . import test_models as smpl
+
+
+@override_settings(ROOT_URLCONF="all_commerce.asgi_urls")
+class AsyncViewsTests(TransactionTestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = AsyncClient()
+        self.user = smpl.sample_user()
+        self.store_category = smpl.sample_store_category()
+        self.store = smpl.sample_store(self.user, self.store_category,
+                                       smpl.sample_city(), is_verified=True)
+        models.SupermarketProduct.objects.create(
+            name="Milk", sale_price=1000, stock=1, discount=10,
+            store=self.store, is_verified=True)
+
+    def tearDown(self) -> None:
+        # Persistent connections of pool threads would keep the test
+        # database in use
+        close_connections()
+
+    def test_catalogue_views_are_async(self):
+        for path in ["/store/stores/", "/store/categories/",
+                     "/store/brands/", "/store/supermarket-products/"]:
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(path).func))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            resolve("/user/signup/").func))
+
+    def test_concurrent_reads(self):
+        """ Test concurrent requests are served by async views """
+        async def get_all():
+            return await asyncio.gather(
+                self.client.get("/store/stores/"),
+                self.client.get("/store/supermarket-products/",
+                                {"search": "milk"}),
+                self.client.get(f"/store/stores/{self.store.id}/"))
+
+        stores, products, store = async_to_sync(get_all)()
+
+        self.assertEqual(stores.status_code, status.HTTP_200_OK)
+        self.assertEqual(stores.json()["results"][0]["name"], "Nike")
+        self.assertEqual(products.json()["results"][0]["name"], "Milk")
+        self.assertEqual(store.json()["id"], self.store.id)
+
+    def test_write_through_async_view(self):
+        async def post():
+            return await self.client.post("/store/categories/", {
+                "name": "Dairy", "store_category": self.store_category.id})
+
+        res = async_to_sync(post)()
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
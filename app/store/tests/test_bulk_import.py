@@ -0,0 +1,187 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from ..search import search_products
+from . import test_models as smpl
+
+BULK_URL = reverse("store:supermarket-product-bulk")
+
+
+class BulkImportTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = smpl.sample_user(phone_is_verified=True)
+        self.client.force_authenticate(self.user)
+        self.store_category = smpl.sample_store_category()
+        self.city = smpl.sample_city()
+        self.store = smpl.sample_store(
+            self.user, self.store_category, self.city, is_verified=True)
+        self.other_store = smpl.sample_store(
+            smpl.sample_user(phone="+989123456788"), self.store_category,
+            self.city, is_verified=True)
+        self.category = smpl.sample_category(self.store_category, "Food")
+        self.brand = smpl.sample_brand(name_fa="زرماکارون",
+                                       name_en="Zar Makaron")
+
+    def product_row(self, **kwargs):
+        row = {
+            "name": "ماکارونی",
+            "sale_price": 10000,
+            "stock": 20,
+            "discount": 10,
+            "brand": self.brand.id,
+            "category": self.category.id,
+            "store": self.store.id,
+        }
+        row.update(kwargs)
+        return row
+
+    def jsonl(self, rows):
+        return "\n".join(json.dumps(row) for row in rows).encode()
+
+    def test_import_jsonl_body(self):
+        """ Test importing products from a JSON Lines request body """
+        rows = [self.product_row(name=f"Milk {i}", in_bulk=True)
+                for i in range(5)]
+
+        res = self.client.generic("POST", BULK_URL, self.jsonl(rows),
+                                  content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {"created": 5, "errors": []})
+        product = models.SupermarketProduct.objects.get(name="Milk 3")
+        self.assertTrue(product.in_bulk)
+        self.assertFalse(product.is_verified)
+        self.assertEqual(product.slug, "milk-3")
+        self.assertEqual(product.store, self.store)
+
+    def test_import_csv_file(self):
+        """ Test importing products from an uploaded CSV file """
+        content = ("name,sale_price,stock,discount,store,brand,weight_in_grams\n"
+                   f"Rice,50000,10,5,{self.store.id},,1000\n"
+                   f"Tea,30000,10,5,{self.store.id},{self.brand.id},\n")
+        upload = SimpleUploadedFile("products.csv", content.encode(),
+                                    content_type="text/csv")
+
+        res = self.client.post(BULK_URL, {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(models.SupermarketProduct.objects.get(
+            name="Rice").weight_in_grams, 1000)
+
+    def test_errors_are_reported_per_row(self):
+        """ Test invalid rows are reported and valid ones are imported """
+        body = b"\n".join([
+            self.jsonl([self.product_row(name="Valid")]),
+            self.jsonl([self.product_row(store=self.other_store.id)]),
+            self.jsonl([self.product_row(sale_price="cheap")]),
+            self.jsonl([self.product_row(brand=0)]),
+            b"{not json",
+        ])
+
+        res = self.client.generic("POST", BULK_URL, body,
+                                  content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 1)
+        errors = {error["row"]: error["errors"] for error in res.data["errors"]}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5])
+        self.assertIn("store", errors[2])
+        self.assertIn("sale_price", errors[3])
+        self.assertIn("brand", errors[4])
+        self.assertIn("non_field_errors", errors[5])
+
+    def test_undecodable_lines_are_reported(self):
+        """ Test lines that are not UTF-8 fail alone in JSON Lines """
+        body = b"\n".join([
+            self.jsonl([self.product_row(name="Milk")]),
+            self.jsonl([self.product_row(name="Cafe")]).replace(b"Cafe", b"Caf\xe9"),
+            self.jsonl([self.product_row(name="Tea")]),
+        ])
+
+        res = self.client.generic("POST", BULK_URL, body,
+                                  content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["errors"], [{"row": 2, "errors": {
+            "non_field_errors": ["Line is not valid UTF-8."]}}])
+
+    def test_unreadable_csv_is_reported(self):
+        """ Test a CSV stops at an unreadable row and keeps earlier rows """
+        header = "name,sale_price,stock,discount,store\n"
+        for bad_row in ["Café,1,1,0,{}\n".encode("latin-1"),
+                        f"{'x' * 200000},1,1,0,{{}}\n".encode()]:
+            content = (header + f"Rice,50000,10,5,{self.store.id}\n").encode() \
+                + bad_row.replace(b"{}", str(self.store.id).encode()) \
+                + f"Tea,30000,10,5,{self.store.id}\n".encode()
+            upload = SimpleUploadedFile("products.csv", content,
+                                        content_type="text/csv")
+
+            res = self.client.post(BULK_URL, {"file": upload},
+                                   format="multipart")
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(res.data["created"], 1)
+            self.assertEqual(res.data["errors"][0]["row"], 2)
+            self.assertIn("Invalid CSV", res.data["errors"][0]["errors"][
+                "non_field_errors"][0])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """ Test a chunk is imported with a constant number of queries """
+        def count_queries(number_of_rows):
+            body = self.jsonl([self.product_row(name=f"P {i}")
+                               for i in range(number_of_rows)])
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.generic("POST", BULK_URL, body,
+                                    content_type="application/x-ndjson")
+            return len(ctx.captured_queries)
+
+        self.assertEqual(count_queries(2), count_queries(50))
+
+    def test_imported_products_are_searchable(self):
+        body = self.jsonl([self.product_row(name="Spaghetti")])
+        self.client.generic("POST", BULK_URL, body,
+                            content_type="application/x-ndjson")
+
+        products = search_products(models.SupermarketProduct.objects.all(),
+                                   "zar spag")
+
+        self.assertEqual([product.name for product in products], ["Spaghetti"])
+
+    def test_unauthenticated_import(self):
+        self.client.force_authenticate(None)
+
+        res = self.client.generic("POST", BULK_URL, b"",
+                                  content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_import_products_command(self):
+        """ Test importing products with management command """
+        with tempfile.NamedTemporaryFile(suffix=".jsonl") as ntf:
+            ntf.write(self.jsonl([self.product_row(name="Milk"),
+                                  self.product_row(store=self.other_store.id)]))
+            ntf.flush()
+            out, err = StringIO(), StringIO()
+
+            call_command("import_products", ntf.name, "--user", str(self.user.phone),
+                         "--chunk-size", "1", stdout=out, stderr=err)
+
+        self.assertIn("1 products imported, 1 rows failed.", out.getvalue())
+        self.assertIn("Row 2", err.getvalue())
+        self.assertTrue(models.SupermarketProduct.objects.filter(
+            name="Milk").exists())
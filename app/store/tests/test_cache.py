@@ -0,0 +1,142 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from ..cache import invalidate
+from . import test_models as smpl
+
+STORES_LIST_URL = reverse("store:store-list")
+BRAND_LIST_URL = reverse("store:brand-list")
+SUPERMARKET_PRODUCT_LIST_URL = reverse("store:supermarket-product-list")
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = smpl.sample_user()
+        self.city = smpl.sample_city()
+        self.store_category = smpl.sample_store_category()
+        self.store = smpl.sample_store(
+            self.user, self.store_category, self.city, is_verified=True)
+        self.category = smpl.sample_category(
+            self.store_category, is_verified=True)
+
+    def test_anonymous_list_is_cached(self):
+        """ Test the second identical request runs no query """
+        self.client.get(STORES_LIST_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(STORES_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+
+    def test_query_params_are_part_of_key(self):
+        """ Test different search terms are cached separately """
+        self.client.get(STORES_LIST_URL, {"search": "Nike"})
+
+        res = self.client.get(STORES_LIST_URL, {"search": "Adidas"})
+
+        self.assertEqual(res.data["count"], 0)
+
+    def test_save_invalidates_cached_list(self):
+        """ Test saving a model invalidates responses built from it """
+        self.client.get(STORES_LIST_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.store.name = "Adidas"
+            self.store.save()
+
+        res = self.client.get(STORES_LIST_URL)
+
+        self.assertEqual(res.data["results"][0]["name"], "Adidas")
+
+    def test_cache_is_invalidated_on_commit(self):
+        """ Test a request before a write commits can't cache it as fresh """
+        self.client.get(STORES_LIST_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.store.name = "Adidas"
+            self.store.save()
+            # Other connections still read the old rows
+            with self.assertNumQueries(0):
+                self.client.get(STORES_LIST_URL)
+
+        res = self.client.get(STORES_LIST_URL)
+        self.assertEqual(res.data["results"][0]["name"], "Adidas")
+
+    def test_delete_invalidates_cached_retrieve(self):
+        """ Test deleting a model invalidates its detail response """
+        url = reverse("store:store-detail", args=[self.store.id])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.store.delete()
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unrelated_model_keeps_cache(self):
+        """ Test saving a brand does not invalidate stores list """
+        self.client.get(STORES_LIST_URL)
+        smpl.sample_brand(is_verified=True)
+
+        with self.assertNumQueries(0):
+            self.client.get(STORES_LIST_URL)
+
+    def test_product_image_invalidates_products(self):
+        """ Test adding an image invalidates product listings """
+        product = smpl.sample_supermarket_product(
+            self.category, self.store, is_verified=True)
+        self.client.get(SUPERMARKET_PRODUCT_LIST_URL)
+        products_url = reverse("store:category-products",
+                               args=[self.category.id])
+        self.client.get(products_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.ProductImage.objects.create(
+                product=product, image="uploads/product/sample.jpg")
+
+        res = self.client.get(SUPERMARKET_PRODUCT_LIST_URL)
+        self.assertEqual(len(res.data["results"][0]["product_images"]), 1)
+        res = self.client.get(products_url)
+        self.assertEqual(len(res.data["results"][0]["product_images"]), 1)
+
+    def test_invalidate_after_queryset_update(self):
+        """ Test explicit invalidation after an update without signals """
+        self.client.get(BRAND_LIST_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Brand.objects.create(name_fa="نایک", is_verified=True)
+        self.client.get(BRAND_LIST_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Brand.objects.update(is_verified=False)
+            invalidate(models.Brand)
+
+        res = self.client.get(BRAND_LIST_URL)
+        self.assertEqual(res.data["count"], 0)
+
+    def test_authenticated_requests_are_not_cached(self):
+        """ Test responses of authenticated users are never cached """
+        self.client.force_authenticate(self.user)
+        self.client.get(STORES_LIST_URL, {"self": "true"})
+        models.Store.objects.update(name="Adidas")
+
+        res = self.client.get(STORES_LIST_URL, {"self": "true"})
+
+        self.assertEqual(res.data["results"][0]["name"], "Adidas")
+
+    @override_settings(STORE_RESPONSE_CACHE={
+        "ENABLED": False, "CACHE_ALIAS": "default", "TIMEOUT": 60})
+    def test_disabled_cache(self):
+        """ Test nothing is cached when the cache is disabled """
+        self.client.get(STORES_LIST_URL)
+        models.Store.objects.update(name="Adidas")
+
+        res = self.client.get(STORES_LIST_URL)
+
+        self.assertEqual(res.data["results"][0]["name"], "Adidas")
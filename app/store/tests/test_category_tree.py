@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from . import test_models as smpl
+
+CATEGORY_TREE_URL = reverse("store:category-tree")
+
+
+class CategoryTreeModelTests(TestCase):
+
+    def setUp(self) -> None:
+        self.store_category = smpl.sample_store_category()
+        self.root = smpl.sample_category(self.store_category, name="Food")
+        self.child = smpl.sample_sub_category(
+            self.root, self.store_category, name="Dairy")
+        self.grandchild = smpl.sample_sub_category(
+            self.child, self.store_category, name="Milk")
+
+    def test_path_is_set_on_create(self):
+        """ Test materialized path contains ids from root """
+        self.assertEqual(self.root.path, f"{self.root.id}/")
+        self.assertEqual(self.grandchild.path,
+                         f"{self.root.id}/{self.child.id}/{self.grandchild.id}/")
+
+    def test_move_updates_subtree_paths(self):
+        """ Test moving a category updates paths of its subcategories """
+        new_root = smpl.sample_category(self.store_category, name="Drinks")
+
+        self.child.parent_category = new_root
+        self.child.save()
+        self.grandchild.refresh_from_db()
+
+        self.assertEqual(self.grandchild.path,
+                         f"{new_root.id}/{self.child.id}/{self.grandchild.id}/")
+        self.assertQuerysetEqual(
+            models.Category.objects.descendants(self.root), [self.root])
+
+    def test_move_under_own_subcategory(self):
+        """ Test a category can not become a child of its descendant """
+        self.root.parent_category = self.grandchild
+
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+    def test_descendants(self):
+        """ Test fetching the subtree of a category """
+        descendants = models.Category.objects.descendants(
+            self.child, include_self=False)
+
+        self.assertQuerysetEqual(descendants, [self.grandchild])
+
+
+class CategoryTreeApiTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.store_category = smpl.sample_store_category()
+        self.root = smpl.sample_category(
+            self.store_category, name="Food", is_verified=True)
+        self.child = smpl.sample_sub_category(
+            self.root, self.store_category, name="Dairy", is_verified=True)
+        self.grandchild = smpl.sample_sub_category(
+            self.child, self.store_category, name="Milk", is_verified=True)
+        smpl.sample_sub_category(
+            self.child, self.store_category, name="Cheese", is_verified=False)
+
+    def test_full_tree(self):
+        """ Test the full tree of verified categories with one query """
+        with self.assertNumQueries(1):
+            res = self.client.get(CATEGORY_TREE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        child = res.data[0]["sub_categories"][0]
+        self.assertEqual(child["name"], self.child.name)
+        self.assertEqual([category["name"] for category in child["sub_categories"]],
+                         [self.grandchild.name])
+
+    def test_products_of_descendants(self):
+        """ Test listing products of a category and all of its subcategories """
+        store = smpl.sample_store(smpl.sample_user(), self.store_category,
+                                  smpl.sample_city(), is_verified=True)
+        for category in [self.root, self.child, self.grandchild]:
+            smpl.sample_supermarket_product(
+                category, store, name=category.name, is_verified=True)
+        url = reverse("store:category-products", args=[self.child.id])
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+        res = self.client.get(url, {"descendants": "true"})
+        self.assertEqual(sorted(product["name"] for product in res.data["results"]),
+                         [self.child.name, self.grandchild.name])
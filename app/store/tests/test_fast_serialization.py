@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.fast_serialization import compile_serializer
+
+from .. import models, serializers
+from . import test_models as smpl
+
+PRODUCTS_URL = reverse("store:supermarket-product-list")
+
+
+@override_settings(STORE_RESPONSE_CACHE={"ENABLED": False,
+                                         "CACHE_ALIAS": "default", "TIMEOUT": 0})
+class FastListSerializationTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        store_category = smpl.sample_store_category()
+        self.category = smpl.sample_category(store_category, name="Dairy",
+                                             is_verified=True)
+        store = smpl.sample_store(smpl.sample_user(), store_category,
+                                  smpl.sample_city(), is_verified=True)
+        brand = smpl.sample_brand(is_verified=True)
+        for i, name in enumerate(["Milk", "شیر", "Cheese", "Eggs"]):
+            product = models.SupermarketProduct.objects.create(
+                name=name, sale_price=1000 * (i + 1), stock=i, store=store,
+                category=self.category, brand=brand if i % 2 else None,
+                discount=10 if i % 2 else None,
+                product_score=Decimal("4.5") if i else None,
+                is_verified=True)
+            for featured in range(i % 3):
+                models.ProductImage.objects.create(
+                    product=product, is_featured=bool(featured),
+                    image=f"uploads/product/{i}-{featured}.png",
+                    variants={"thumb": {"webp": f"uploads/product/{i}.webp"}})
+
+    def assertSameContent(self, url, params=None):
+        """ Test the fast path renders the same bytes as DRF """
+        res = self.client.get(url, params)
+        with self.settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+
+    def test_products_list(self):
+        self.assertSameContent(PRODUCTS_URL)
+        self.assertSameContent(PRODUCTS_URL, {"limit": 2, "offset": 1,
+                                              "ordering": "-score"})
+        self.assertSameContent(PRODUCTS_URL, {"search": "milk"})
+
+    def test_projected_and_compact_products_list(self):
+        self.assertSameContent(PRODUCTS_URL, {"compact": "true",
+                                              "image_size": "thumb"})
+        self.assertSameContent(PRODUCTS_URL, {"fields": "id,name,product_images",
+                                              "image_size": "thumb"})
+        self.assertSameContent(PRODUCTS_URL, {"exclude": "product_images"})
+
+    def test_category_products(self):
+        self.assertSameContent(
+            reverse("store:category-products", args=[self.category.id]),
+            {"descendants": "true"})
+
+    def test_cursor_pages_fall_back(self):
+        self.assertSameContent(PRODUCTS_URL, {"pagination": "cursor"})
+
+    def test_images_are_loaded_in_one_query(self):
+        with self.assertNumQueries(3):
+            self.client.get(PRODUCTS_URL)
+
+    def test_product_serializers_are_compiled(self):
+        for serializer_class in [serializers.SupermarketProductSerializer,
+                                 serializers.ProductCompactSerializer]:
+            self.assertIsNotNone(compile_serializer(
+                serializer_class(), models.SupermarketProduct))
+
+    def test_method_fields_are_not_compiled(self):
+        self.assertIsNone(compile_serializer(
+            serializers.CategoryTreeSerializer(), models.Category))
@@ -0,0 +1,233 @@
+import hashlib
+import io
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from ..images import supported_formats
+from . import test_models as smpl
+
+PRODUCT_IMAGE_UPLOAD_URL = reverse("store:upload-product-image-list")
+
+
+def variant_jobs(callbacks):
+    """ Callbacks of schedule_variants(), others invalidate cached responses """
+    return [callback for callback in callbacks
+            if callback.__qualname__.startswith("schedule_variants")]
+
+
+def sample_image_file(size=(800, 400), name="image.png"):
+    image = io.BytesIO()
+    Image.new("RGBA", size, (255, 0, 0, 128)).save(image, "PNG")
+    return SimpleUploadedFile(name, image.getvalue(), content_type="image/png")
+
+
+class ProductImageVariantsTests(TestCase):
+
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root.name,
+            PRODUCT_IMAGES=dict(settings.PRODUCT_IMAGES, WORKERS=0))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = smpl.sample_user()
+        self.client.force_authenticate(self.user)
+        store = smpl.sample_store(self.user, smpl.sample_store_category(),
+                                  smpl.sample_city())
+        self.product = models.SupermarketProduct.objects.create(
+            name="Milk", sale_price=1000, stock=1, discount=10,
+            store=store, is_verified=True)
+
+    def upload(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            res = self.client.post(PRODUCT_IMAGE_UPLOAD_URL, {
+                "product": self.product.id, "image": sample_image_file()},
+                format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(variant_jobs(callbacks)), 1)
+        return models.ProductImage.objects.get(id=res.data["id"])
+
+    def test_variants_are_made_after_upload(self):
+        product_image = self.upload()
+
+        self.assertEqual(set(product_image.variants),
+                         set(settings.PRODUCT_IMAGES["SIZES"]))
+        thumb = product_image.variants["thumb"]
+        self.assertEqual(set(thumb), set(supported_formats()))
+        with product_image.image.storage.open(thumb["webp"]) as thumb_file, \
+                Image.open(thumb_file) as image:
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (160, 80))
+
+    def test_requested_size_is_serialized(self):
+        """ Test only the variant a client asks for is returned """
+        product_image = self.upload()
+        url = reverse("store:supermarket-product-detail",
+                      args=[self.product.id])
+
+        res = self.client.get(url, {"image_size": "thumb",
+                                    "image_format": "webp"})
+        original = self.client.get(url, {"image_size": "huge"})
+
+        image = res.data["product_images"][0]
+        self.assertTrue(image["image"].endswith(
+            product_image.variants["thumb"]["webp"]))
+        self.assertNotIn("variants", image)
+        self.assertTrue(original.data["product_images"][0]["image"].endswith(
+            product_image.image.name))
+
+    def test_variants_are_only_remade_for_new_images(self):
+        product_image = self.upload()
+        product_image = models.ProductImage.objects.get(id=product_image.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            product_image.is_featured = True
+            product_image.save()
+        self.assertEqual(variant_jobs(callbacks), [])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            product_image.image = sample_image_file(size=(400, 400))
+            product_image.save()
+        product_image.refresh_from_db()
+        self.assertEqual(len(variant_jobs(callbacks)), 1)
+        self.assertIn(product_image.image.name.rsplit(".", 1)[0],
+                      product_image.variants["thumb"]["webp"])
+
+
+class StreamingImageUploadTests(TestCase):
+
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root.name,
+            PRODUCT_IMAGES=dict(settings.PRODUCT_IMAGES, WORKERS=0,
+                                MAX_UPLOAD_SIZE=200 * 2 ** 10,
+                                MAX_DIMENSION=1000))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = smpl.sample_user()
+        self.client.force_authenticate(self.user)
+        store = smpl.sample_store(self.user, smpl.sample_store_category(),
+                                  smpl.sample_city())
+        category = smpl.sample_category(store.store_category)
+        self.products = [smpl.sample_product(category, store, name=name)
+                         for name in ["Nike", "Adidas"]]
+
+    def upload(self, product, image_file):
+        return self.client.post(PRODUCT_IMAGE_UPLOAD_URL, {
+            "product": product.id, "image": image_file}, format="multipart")
+
+    def test_same_image_is_stored_once(self):
+        """ Test duplicate uploads share one content addressed file """
+        content = sample_image_file().read()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.upload(self.products[0], SimpleUploadedFile(
+                "a.png", content, content_type="image/png"))
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.upload(self.products[1], SimpleUploadedFile(
+                "b.png", content, content_type="image/png"))
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        images = models.ProductImage.objects.order_by("id")
+        checksum = hashlib.sha256(content).hexdigest()
+        self.assertEqual(images[0].image.name,
+                         f"uploads/product/{checksum[:2]}/{checksum}.png")
+        self.assertEqual(images[1].image.name, images[0].image.name)
+        self.assertEqual(images[1].variants, images[0].variants)
+        self.assertNotEqual(first.data["id"], second.data["id"])
+
+    def test_large_upload_is_rejected(self):
+        res = self.upload(self.products[0], SimpleUploadedFile(
+            "image.png", b"\0" * (300 * 2 ** 10), content_type="image/png"))
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(models.ProductImage.objects.exists())
+
+    def test_large_dimensions_are_rejected(self):
+        """ Test dimensions are checked from the header of the image """
+        res = self.upload(self.products[0],
+                          sample_image_file(size=(2000, 10)))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("2000x10", res.data["image"][0])
+
+
+class FeaturedImageTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.store = smpl.sample_store(smpl.sample_user(),
+                                       smpl.sample_store_category(),
+                                       smpl.sample_city())
+        self.product = self.sample_product("Milk")
+
+    def sample_product(self, name):
+        return models.SupermarketProduct.objects.create(
+            name=name, sale_price=1000, stock=1, discount=10,
+            store=self.store, is_verified=True)
+
+    def sample_image(self, product=None, is_featured=False):
+        return models.ProductImage.objects.create(
+            product=product or self.product, is_featured=is_featured,
+            image="uploads/product/image.png")
+
+    def featured_image_id(self):
+        self.product.refresh_from_db()
+        return self.product.featured_image_id
+
+    def test_one_image_is_featured(self):
+        first = self.sample_image()
+        self.assertEqual(self.featured_image_id(), first.id)
+
+        featured = self.sample_image(is_featured=True)
+        self.assertEqual(self.featured_image_id(), featured.id)
+
+        other = self.sample_image(is_featured=True)
+        featured.refresh_from_db()
+        self.assertFalse(featured.is_featured)
+        self.assertEqual(self.featured_image_id(), other.id)
+
+    def test_removed_featured_image_is_replaced(self):
+        first = self.sample_image()
+        featured = self.sample_image(is_featured=True)
+
+        featured.delete()
+        self.assertEqual(self.featured_image_id(), first.id)
+        first.delete()
+        self.assertIsNone(self.featured_image_id())
+
+    def test_compact_list_joins_featured_image(self):
+        """ Test a compact list costs the same queries for any number of images """
+        for name in ["Bread", "Cheese", "Eggs"]:
+            product = self.sample_product(name)
+            self.sample_image(product)
+            self.sample_image(product, is_featured=True)
+        url = reverse("store:supermarket-product-list")
+
+        with self.assertNumQueries(2):
+            res = self.client.get(url, {"compact": "true",
+                                        "image_size": "thumb"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        products = {product["name"]: product for product in res.data["results"]}
+        self.assertNotIn("product_images", products["Bread"])
+        self.assertTrue(products["Bread"]["featured_image"]["is_featured"])
+        self.assertIsNone(products["Milk"]["featured_image"])
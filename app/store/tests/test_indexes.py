@@ -0,0 +1,90 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from .. import models
+from ..search import build_search_document, update_search_vectors
+from . import test_models as smpl
+
+
+class ExplainQueriesTests(TestCase):
+
+    def setUp(self) -> None:
+        store_category = smpl.sample_store_category()
+        store = smpl.sample_store(smpl.sample_user(), store_category,
+                                  smpl.sample_city(), is_verified=True)
+        models.Store.objects.update(is_open=True, lat=35.69, long=51.39)
+        category = smpl.sample_category(store_category, "Dairy",
+                                        is_verified=True)
+        smpl.sample_sub_category(category, store_category, "Milk",
+                                 is_verified=True)
+        brand = smpl.sample_brand(name_fa="میهن", name_en="mihan",
+                                  is_verified=True)
+        models.SupermarketProduct.objects.create(
+            name="Milk", sale_price=1000, stock=1, store=store,
+            category=category, brand=brand, is_verified=True)
+        self.store, self.category = store, category
+
+    def seed(self, count=2000):
+        """
+        Planners pick any index of a near empty table, plans are only
+        those of production with enough analyzed rows
+        """
+        models.Store.objects.bulk_create(
+            models.Store(name=f"Store {i}", address="Tehran",
+                         lat=30 + i % 10, long=50 + i % 10,
+                         store_score=i % 50 / 10 or None,
+                         city=self.store.city,
+                         store_category=self.store.store_category,
+                         owner=self.store.owner, is_open=i % 2 == 0,
+                         is_verified=i % 10 != 0)
+            for i in range(count))
+        models.SupermarketProduct.objects.bulk_create(
+            models.SupermarketProduct(
+                name=f"Product {i}", sale_price=1000, stock=1,
+                store=self.store,
+                category=self.category if i % 10 == 0 else None,
+                product_score=i % 50 / 10 or None, is_verified=i % 10 != 0,
+                search_document=build_search_document(f"Product {i}"))
+            for i in range(count))
+        update_search_vectors(models.Product.objects.all())
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_hot_queries_use_indexes(self):
+        """ Test the hot endpoints use their indexes without sequential scans """
+        self.seed()
+        out = StringIO()
+
+        call_command("explain_queries", stdout=out)
+
+        self.assertIn("audited queries use their indexes", out.getvalue())
+
+    @patch("store.management.commands.explain_queries.representative_queries")
+    def test_sequential_scans_are_flagged(self, representative_queries):
+        representative_queries.return_value = [
+            ("products in stock", models.Product.objects.filter(stock=1), [])]
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("explain_queries", stdout=out)
+
+        self.assertIn("products in stock: sequential scan on store_product",
+                      out.getvalue())
+
+    @patch("store.management.commands.explain_queries.representative_queries")
+    def test_unused_indexes_are_flagged(self, representative_queries):
+        """ Test a query that falls back to another index is flagged """
+        representative_queries.return_value = [
+            ("products by name", models.Product.objects.order_by("name")[:10],
+             ["store_product_verified_nm_idx"])]
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("explain_queries", stdout=out)
+
+        self.assertIn("products by name: store_product_verified_nm_idx "
+                      "not used", out.getvalue())
@@ -1,9 +1,10 @@
+import hashlib
 import os
 import tempfile
-from unittest.mock import patch
 
 from core import models as core_models
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from rest_framework.test import APIClient
 
@@ -187,14 +188,14 @@ class ModelsTests(TestCase):
         self.assertEqual(str(self.supermarket_product),
                          self.supermarket_product.name)
 
-    @patch("uuid.uuid4")
-    def test_product_file_name_uuid(self, mock_uuid):
+    def test_product_file_name_checksum(self):
         """ Test that image is saved in the correct location """
-        uuid = "test-uuid"
-        mock_uuid.return_value = uuid
-        file_path = models.product_image_file_path(None, "myimage.jpg")
+        image = models.ProductImage(image=SimpleUploadedFile(
+            "myimage.JPG", b"image content"))
+        checksum = hashlib.sha256(b"image content").hexdigest()
+        file_path = models.product_image_file_path(image, "myimage.JPG")
 
-        exp_path = f"uploads/product/{uuid}.jpg"
+        exp_path = f"uploads/product/{checksum[:2]}/{checksum}.jpg"
         self.assertEqual(file_path, exp_path)
 
     def test_wishlist_str_repr(self):
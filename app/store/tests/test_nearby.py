@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from ..geo import bounding_box, haversine
+from . import test_models as smpl
+
+STORES_LIST_URL = reverse("store:store-list")
+TEHRAN = (35.6892, 51.3890)
+
+
+class GeoTests(TestCase):
+
+    def test_haversine(self):
+        """ Test distance of Tehran and Isfahan is about 340 km """
+        self.assertAlmostEqual(
+            haversine(*TEHRAN, 32.6546, 51.6680), 338, delta=3)
+
+    def test_bounding_box_contains_circle(self):
+        min_lat, max_lat, long_ranges = bounding_box(*TEHRAN, 10)
+
+        self.assertAlmostEqual(haversine(*TEHRAN, max_lat, TEHRAN[1]), 10)
+        self.assertAlmostEqual(haversine(*TEHRAN, min_lat, TEHRAN[1]), 10)
+        self.assertEqual(len(long_ranges), 1)
+        self.assertLess(long_ranges[0][0], TEHRAN[1])
+        self.assertGreater(long_ranges[0][1], TEHRAN[1])
+
+    def test_bounding_box_crossing_antimeridian(self):
+        _, _, long_ranges = bounding_box(0, 179.99, 10)
+
+        self.assertEqual(len(long_ranges), 2)
+
+
+class NearbyStoresApiTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.city = smpl.sample_city()
+        self.store_category = smpl.sample_store_category()
+        self.phone = 0
+
+    def sample_store(self, name, lat, long, is_open=True, is_verified=True):
+        self.phone += 1
+        store = smpl.sample_store(
+            smpl.sample_user(phone=f"+9891234567{self.phone:02d}"),
+            self.store_category, self.city, name=name, is_verified=is_verified)
+        models.Store.objects.filter(pk=store.pk).update(
+            lat=lat, long=long, is_open=is_open)
+        return store
+
+    def test_list_nearby_open_stores_nearest_first(self):
+        """ Test only open verified stores in radius are listed by distance """
+        self.sample_store("Far", 35.7200, 51.4200)
+        self.sample_store("Near", 35.6900, 51.3900)
+        self.sample_store("Closed", 35.6892, 51.3890, is_open=False)
+        self.sample_store("Unverified", 35.6892, 51.3890, is_verified=False)
+        self.sample_store("Karaj", 35.8400, 50.9391)
+
+        res = self.client.get(STORES_LIST_URL, {
+            "near": "35.6892,51.3890", "radius": 10})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([store["name"] for store in res.data["results"]],
+                         ["Near", "Far"])
+        self.assertLess(res.data["results"][0]["distance"], 0.2)
+        self.assertAlmostEqual(res.data["results"][1]["distance"],
+                               haversine(*TEHRAN, 35.72, 51.42), places=3)
+
+    def test_distance_is_only_listed_with_near(self):
+        self.sample_store("Near", 35.6900, 51.3900)
+
+        res = self.client.get(STORES_LIST_URL)
+
+        self.assertNotIn("distance", res.data["results"][0])
+
+    def test_invalid_near_parameters(self):
+        for params in [{"near": "35.6"}, {"near": "a,b"}, {"near": "95,10"},
+                       {"near": "35,51", "radius": 500}]:
+            res = self.client.get(STORES_LIST_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_near_rejects_other_orderings(self):
+        """ Test orderings that would replace "nearest first" are rejected """
+        self.sample_store("Near", 35.6900, 51.3900)
+
+        for params, key in [({"ordering": "-score"}, "ordering"),
+                            ({"pagination": "cursor"}, "pagination"),
+                            ({"cursor": "abc"}, "pagination")]:
+            res = self.client.get(STORES_LIST_URL, dict(
+                params, near="35.6892,51.3890"))
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(key, res.data)
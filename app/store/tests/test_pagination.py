@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from . import test_models as smpl
+
+STORES_LIST_URL = reverse("store:store-list")
+SUPERMARKET_PRODUCT_LIST_URL = reverse("store:supermarket-product-list")
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = smpl.sample_user()
+        self.city = smpl.sample_city()
+        self.store_category = smpl.sample_store_category()
+        self.category = smpl.sample_category(
+            self.store_category, is_verified=True)
+        self.store = smpl.sample_store(
+            self.user, self.store_category, self.city, is_verified=True)
+
+    def walk(self, url, params):
+        """ Follows "next" links and returns names of all listed items """
+        names = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            names.extend(item["name"] for item in res.data["results"])
+            if not res.data["next"]:
+                return names, res
+            res = self.client.get(res.data["next"])
+
+    def test_cursor_pagination_lists_every_item_once(self):
+        """ Test walking all pages with duplicated sort keys """
+        for name in ["Milk", "Milk", "Bread", "Milk", "Eggs", "Bread", "Tea"]:
+            smpl.sample_supermarket_product(
+                self.category, self.store, name=name, is_verified=True)
+
+        names, res = self.walk(SUPERMARKET_PRODUCT_LIST_URL, {
+            "pagination": "cursor", "ordering": "name", "limit": 2})
+
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 7)
+        self.assertNotIn("count", res.data)
+
+    def test_cursor_pagination_descending_and_previous(self):
+        """ Test descending ordering and going back with "previous" link """
+        for name in ["a", "b", "c", "d", "e"]:
+            smpl.sample_supermarket_product(
+                self.category, self.store, name=name, is_verified=True)
+
+        res = self.client.get(SUPERMARKET_PRODUCT_LIST_URL, {
+            "pagination": "cursor", "ordering": "-name", "limit": 2})
+        first_page = [item["name"] for item in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        self.assertEqual([item["name"]
+                          for item in res.data["results"]], ["c", "b"])
+
+        res = self.client.get(res.data["previous"])
+
+        self.assertEqual(first_page, ["e", "d"])
+        self.assertEqual([item["name"]
+                          for item in res.data["results"]], first_page)
+        self.assertIsNone(res.data["previous"])
+
+    def test_cursor_pagination_by_nullable_score(self):
+        """ Test ordering stores by score, stores without score come first """
+        for i in range(3):
+            smpl.sample_store(smpl.sample_user(phone=f"+98912345670{i}"),
+                              self.store_category, self.city,
+                              name=f"Store {i}", is_verified=True)
+
+        names, _ = self.walk(STORES_LIST_URL, {
+            "pagination": "cursor", "ordering": "score", "limit": 3})
+
+        self.assertEqual(len(names), 4)
+
+    def test_cursor_pagination_walks_null_scores_both_ways(self):
+        """ Test NULL scores sort last when descending, going forth and back """
+        scores = [None, Decimal("4.5"), None, Decimal("3.0"), Decimal("4.5"), None]
+        for i, score in enumerate(scores):
+            store = smpl.sample_store(
+                smpl.sample_user(phone=f"+98912345671{i}"), self.store_category,
+                self.city, name=f"Store {i}", is_verified=True)
+            models.Store.objects.filter(pk=store.pk).update(store_score=score)
+
+        names, res = self.walk(STORES_LIST_URL, {
+            "pagination": "cursor", "ordering": "-score", "limit": 2})
+        previous_names = []
+        while res.data["previous"]:
+            res = self.client.get(res.data["previous"])
+            previous_names = [item["name"] for item in res.data["results"]] \
+                + previous_names
+
+        expected = ["Store 4", "Store 1", "Store 3", "Store 5", "Store 2",
+                    "Store 0", "Nike"]
+        self.assertEqual(names, expected)
+        self.assertEqual(previous_names, expected[:-1])
+
+    def test_cursor_pages_seek_by_row_comparison(self):
+        """ Test pages seek the (key, id) index of the table of the key """
+        for name in ["a", "b", "c"]:
+            smpl.sample_supermarket_product(
+                self.category, self.store, name=name, is_verified=True)
+        res = self.client.get(SUPERMARKET_PRODUCT_LIST_URL, {
+            "pagination": "cursor", "ordering": "name", "limit": 1})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(res.data["next"])
+
+        self.assertIn('("store_product"."name", "store_product"."id") >',
+                      ctx.captured_queries[0]["sql"])
+
+    def test_cursor_pagination_skips_count_query(self):
+        """ Test no COUNT(*) query is made for cursor pages """
+        smpl.sample_supermarket_product(
+            self.category, self.store, is_verified=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(
+                SUPERMARKET_PRODUCT_LIST_URL, {"pagination": "cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any("COUNT(" in query["sql"]
+                             for query in ctx.captured_queries))
+
+    def test_invalid_cursor(self):
+        """ Test an invalid cursor returns 404 """
+        res = self.client.get(STORES_LIST_URL, {"cursor": "invalid"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_category_products_cursor_pagination(self):
+        """ Test products of a category with cursor pagination """
+        for name in ["a", "b", "c"]:
+            smpl.sample_supermarket_product(
+                self.category, self.store, name=name, is_verified=True)
+
+        names, _ = self.walk(
+            reverse("store:category-products", args=[self.category.id]),
+            {"pagination": "cursor", "ordering": "-score", "limit": 2})
+
+        self.assertEqual(sorted(names), ["a", "b", "c"])
+
+    def test_limit_offset_ordering_by_score(self):
+        """ Test "score" ordering alias works with limit/offset pagination """
+        res = self.client.get(STORES_LIST_URL, {"ordering": "-score"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
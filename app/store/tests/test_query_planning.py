@@ -0,0 +1,146 @@
+from core.query_planning import (collect_columns, collect_related_lookups,
+                                 plan_queryset)
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .. import models, serializers
+from . import test_models as smpl
+
+
+class QueryPlanningTests(TestCase):
+
+    def test_collect_related_lookups_of_product_serializer(self):
+        """ Test nested images are prefetched and pk fields are skipped """
+        select, prefetch = collect_related_lookups(
+            serializers.SupermarketProductSerializer(),
+            models.SupermarketProduct)
+
+        self.assertEqual(select, [])
+        self.assertEqual(prefetch, ["product_images"])
+
+    def test_plan_queryset_keeps_existing_prefetch(self):
+        """ Test a custom Prefetch of the queryset is not overridden """
+        queryset = plan_queryset(
+            models.Category.objects.prefetch_related("sub_categories"),
+            serializers.CategorySerializer)
+
+        self.assertEqual(queryset._prefetch_related_lookups,
+                         ("sub_categories",))
+
+    def test_collect_columns_of_compact_serializer(self):
+        """ Test columns of joined serializers are collected with their path """
+        columns = collect_columns(serializers.ProductCompactSerializer(),
+                                  models.SupermarketProduct)
+
+        self.assertIn("featured_image__image", columns)
+        self.assertIn("featured_image__variants", columns)
+        self.assertNotIn("search_vector", columns)
+
+
+class FieldProjectionTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        category = smpl.sample_category(smpl.sample_store_category())
+        store = smpl.sample_store(smpl.sample_user(), category.store_category,
+                                  smpl.sample_city(), is_verified=True)
+        product = smpl.sample_supermarket_product(category, store,
+                                                  is_verified=True)
+        models.ProductImage.objects.create(
+            product=product, image="uploads/product/sample.jpg")
+
+    def test_only_requested_fields_are_fetched(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(reverse("store:supermarket-product-list"),
+                                  {"fields": "id,name,sale_price"})
+
+        self.assertEqual(set(res.data["results"][0]),
+                         {"id", "name", "sale_price"})
+        # Count and products, images are not prefetched
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn("discount", ctx.captured_queries[1]["sql"])
+
+    def test_excluded_fields_are_not_fetched(self):
+        res = self.client.get(reverse("store:store-list"),
+                              {"exclude": "description,address"})
+
+        store = res.data["results"][0]
+        self.assertNotIn("description", store)
+        self.assertIn("name", store)
+
+    def test_writes_are_not_projected(self):
+        request = Request(APIRequestFactory().post("/?fields=id,name"))
+        serializer = serializers.StoreSerializer(context={"request": request})
+
+        self.assertIn("address", serializer.fields)
+
+
+@override_settings(STORE_RESPONSE_CACHE={"ENABLED": False,
+                                         "CACHE_ALIAS": "default", "TIMEOUT": 0})
+class ListQueryCountTests(TestCase):
+    """ Listing endpoints must run the same number of queries for any page size """
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.city = smpl.sample_city()
+        self.store_category = smpl.sample_store_category()
+        self.category = smpl.sample_category(
+            self.store_category, name="Dairy", is_verified=True)
+        self.created = 0
+
+    def add_items(self, count):
+        """ Creates "count" verified objects of every listed model """
+        for _ in range(count):
+            i = self.created
+            self.created += 1
+            user = smpl.sample_user(phone=f"+9891234560{i:02d}")
+            store = smpl.sample_store(
+                user, self.store_category, self.city, is_verified=True)
+            smpl.sample_sub_category(self.category, self.store_category,
+                                     name=f"Sub {i}", is_verified=True)
+            category = smpl.sample_category(
+                self.store_category, name=f"Category {i}", is_verified=True)
+            smpl.sample_sub_category(category, self.store_category,
+                                     name=f"Sub of {i}", is_verified=True)
+            brand = smpl.sample_brand(
+                name_fa=f"برند {i}", name_en=f"brand {i}", is_verified=True)
+            product = smpl.sample_supermarket_product(
+                self.category, store, brand=brand, is_verified=True)
+            for _ in range(2):
+                models.ProductImage.objects.create(
+                    product=product, image="uploads/product/sample.jpg")
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url):
+        self.add_items(2)
+        few = self.count_queries(url)
+        self.add_items(5)
+        many = self.count_queries(url)
+
+        self.assertEqual(few, many)
+
+    def test_stores_list_query_count(self):
+        self.assertConstantQueries(reverse("store:store-list"))
+
+    def test_categories_list_query_count(self):
+        self.assertConstantQueries(reverse("store:category-list"))
+
+    def test_brands_list_query_count(self):
+        self.assertConstantQueries(reverse("store:brand-list"))
+
+    def test_supermarket_products_list_query_count(self):
+        self.assertConstantQueries(reverse("store:supermarket-product-list"))
+
+    def test_category_products_query_count(self):
+        self.assertConstantQueries(
+            reverse("store:category-products", args=[self.category.id]))
@@ -0,0 +1,138 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from . import test_models as smpl
+
+STORES_LIST_URL = reverse("store:store-list")
+
+
+def rate_store_url(store_id):
+    return reverse("store:store-rate", args=[store_id])
+
+
+def rate_product_url(product_id):
+    return reverse("store:supermarket-product-rate", args=[product_id])
+
+
+class RatingTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = smpl.sample_user()
+        self.other_user = smpl.sample_user(phone="+989123456788")
+        self.client.force_authenticate(self.user)
+        self.store_category = smpl.sample_store_category()
+        self.city = smpl.sample_city()
+        self.store = smpl.sample_store(self.other_user, self.store_category,
+                                       self.city, is_verified=True)
+        self.product = models.SupermarketProduct.objects.create(
+            name="Milk", sale_price=1000, stock=1, discount=10,
+            store=self.store, is_verified=True)
+
+    def test_rate_store(self):
+        """ Test rating a store updates its running aggregates """
+        res = self.client.post(rate_store_url(self.store.id), {"score": 4})
+        models.StoreRating.objects.create(
+            store=self.store, user=self.other_user, score=1)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["store_score"], "4.0")
+        self.assertEqual(res.data["rating_count"], 1)
+        self.assertNotIn("rating_sum", res.data)
+        self.store.refresh_from_db()
+        self.assertEqual((self.store.rating_sum, self.store.rating_count),
+                         (5, 2))
+        self.assertEqual(self.store.store_score, Decimal("2.5"))
+
+    def test_rate_again_and_remove_rating(self):
+        """ Test a user has one rating that can be changed and removed """
+        self.client.post(rate_product_url(self.product.id), {"score": 2})
+        res = self.client.post(rate_product_url(self.product.id), {"score": 5})
+
+        self.assertEqual(res.data["product_score"], "5.0")
+        self.assertEqual(models.ProductRating.objects.count(), 1)
+
+        res = self.client.delete(rate_product_url(self.product.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_sum, self.product.rating_count,
+                          self.product.product_score), (0, 0, None))
+
+    def test_rating_is_applied_without_aggregating(self):
+        """ Test ratings are not read again when a rating is added """
+        for phone in range(10, 15):
+            models.ProductRating.objects.create(
+                product=self.product, score=3,
+                user=smpl.sample_user(phone=f"+9891234567{phone}"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            models.ProductRating.objects.create(
+                product=self.product, user=self.user, score=5)
+
+        self.assertFalse(any("SUM(" in query["sql"].upper()
+                             for query in ctx.captured_queries))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.product_score, Decimal("3.3"))
+
+    def test_invalid_score(self):
+        res = self.client.post(rate_store_url(self.store.id), {"score": 6})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rate_unauthenticated(self):
+        self.client.force_authenticate(None)
+
+        res = self.client.post(rate_store_url(self.store.id), {"score": 3})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_order_stores_by_score(self):
+        """ Test the cached list is updated when a rating changes """
+        other_store = smpl.sample_store(self.user, self.store_category,
+                                        self.city, name="Adidas",
+                                        is_verified=True)
+        self.client.post(rate_store_url(self.store.id), {"score": 2})
+        self.client.post(rate_store_url(other_store.id), {"score": 3})
+        self.client.get(STORES_LIST_URL, {"ordering": "-score"})
+
+        self.client.post(rate_store_url(self.store.id), {"score": 5})
+        res = self.client.get(STORES_LIST_URL, {"ordering": "-score"})
+
+        self.assertEqual([store["name"] for store in res.data["results"]],
+                         ["Nike", "Adidas"])
+
+    def test_reconcile_ratings_command(self):
+        """ Test drifted aggregates are repaired """
+        models.ProductRating.objects.create(
+            product=self.product, user=self.user, score=4)
+        models.StoreRating.objects.create(
+            store=self.store, user=self.user, score=2)
+        models.Product.objects.update(rating_sum=40, product_score=1)
+        models.Store.objects.update(rating_count=0)
+        out = StringIO()
+
+        call_command("reconcile_ratings", stdout=out)
+
+        self.assertIn("stores: 1 repaired", out.getvalue())
+        self.assertIn("products: 1 repaired", out.getvalue())
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_sum, self.product.rating_count,
+                          self.product.product_score), (4, 1, Decimal("4.0")))
+        self.store.refresh_from_db()
+        self.assertEqual(self.store.store_score, Decimal("2.0"))
+
+        out = StringIO()
+        call_command("reconcile_ratings", stdout=out)
+        self.assertIn("products: 0 repaired", out.getvalue())
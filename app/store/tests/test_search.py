@@ -0,0 +1,110 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import models
+from ..search import normalize, search_products
+from . import test_models as smpl
+
+SUPERMARKET_PRODUCT_LIST_URL = reverse("store:supermarket-product-list")
+
+
+class NormalizeTests(TestCase):
+
+    def test_normalize_arabic_characters(self):
+        """ Test Arabic yeh and kaf are replaced by Persian ones """
+        self.assertEqual(normalize("كيك"), "کیک")
+
+    def test_normalize_digits_and_marks(self):
+        """ Test digits, diacritics, tatweel and ZWNJ are normalized """
+        self.assertEqual(normalize("شـیرِ ۱ لیتری  می‌خواهم"),
+                         "شیر 1 لیتری میخواهم")
+
+    def test_normalize_lower_case(self):
+        self.assertEqual(normalize(" Zar  Makaron "), "zar makaron")
+
+
+class ProductSearchTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        store_category = smpl.sample_store_category()
+        self.category = smpl.sample_category(store_category, is_verified=True)
+        self.store = smpl.sample_store(smpl.sample_user(), store_category,
+                                       smpl.sample_city(), is_verified=True)
+        self.brand = smpl.sample_brand(name_fa="زرماکارون",
+                                       name_en="Zar Makaron", is_verified=True)
+
+    def sample_product(self, name, brand=None):
+        return smpl.sample_supermarket_product(
+            self.category, self.store, brand=brand, name=name, is_verified=True)
+
+    def search(self, text):
+        res = self.client.get(SUPERMARKET_PRODUCT_LIST_URL, {"search": text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [product["name"] for product in res.data["results"]]
+
+    def test_search_by_name_prefix(self):
+        """ Test words are matched as prefixes """
+        self.sample_product("ماکارونی رشته ای")
+        self.sample_product("برنج")
+
+        self.assertEqual(self.search("ماکارو"), ["ماکارونی رشته ای"])
+
+    def test_search_by_brand_names(self):
+        """ Test products are found by Persian and English brand names """
+        self.sample_product("ماکارونی", brand=self.brand)
+        self.sample_product("برنج")
+
+        self.assertEqual(self.search("zar"), ["ماکارونی"])
+        self.assertEqual(self.search("زرماکارون"), ["ماکارونی"])
+
+    def test_search_arabic_characters(self):
+        """ Test searching with Arabic keyboard characters """
+        self.sample_product("کیک یزدی")
+
+        self.assertEqual(self.search("كيك"), ["کیک یزدی"])
+
+    def test_search_results_are_ranked(self):
+        """ Test products matching more often are listed first """
+        self.sample_product("پنیر")
+        self.sample_product("پنیر خامه ای پنیر")
+
+        self.assertEqual(self.search("پنیر"), ["پنیر خامه ای پنیر", "پنیر"])
+
+    def test_brand_rename_updates_products(self):
+        """ Test renaming a brand updates search documents of its products """
+        self.sample_product("ماکارونی", brand=self.brand)
+
+        self.brand.name_en = "Tak Makaron"
+        self.brand.save()
+
+        self.assertEqual(self.search("tak"), ["ماکارونی"])
+        self.assertEqual(self.search("zar"), [])
+
+    def test_brand_edit_keeps_products(self):
+        """ Test saving a brand without renaming it leaves its products """
+        self.sample_product("ماکارونی", brand=self.brand)
+        brand = models.Brand.objects.get(id=self.brand.id)
+
+        brand.is_verified = not brand.is_verified
+        with self.assertNumQueries(3):
+            brand.save()
+
+    def test_search_fallback_without_postgres(self):
+        """ Test substring search on databases without full-text search """
+        self.sample_product("ماکارونی", brand=self.brand)
+        self.sample_product("برنج")
+
+        with patch.object(connections["default"], "vendor", "sqlite"):
+            products = search_products(
+                models.SupermarketProduct.objects.all(), "makaron")
+
+            self.assertEqual([product.name for product in products],
+                             ["ماکارونی"])
@@ -0,0 +1,110 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import models
+from .. import slugs as slugs_module
+from ..slugs import allocate_slugs, slugify_name, transliterate
+from . import test_models as smpl
+
+
+class SlugTests(TestCase):
+
+    def setUp(self) -> None:
+        self.store = smpl.sample_store(
+            smpl.sample_user(), smpl.sample_store_category(), smpl.sample_city())
+
+    def product(self, name, model=models.Product, **kwargs):
+        return model(name=name, sale_price=1000, stock=1,
+                     store=self.store, **kwargs)
+
+    def test_transliterate_persian(self):
+        self.assertEqual(transliterate("شیر کم‌چرب"), "shir kmchrb")
+        self.assertEqual(transliterate("ماکارونی"), "makaruni")
+        self.assertEqual(transliterate("ویتامین"), "vitamin")
+        self.assertEqual(slugify_name("ماست یک لیتری"), "mast-yk-litri")
+
+    def test_slugify_name_of_symbols(self):
+        self.assertEqual(slugify_name("!!!"), "product")
+
+    def test_save_allocates_unique_slugs(self):
+        """ Test products with the same name get numbered slugs """
+        slugs = []
+        for _ in range(3):
+            product = self.product("Milk 1L")
+            product.save()
+            slugs.append(product.slug)
+
+        self.assertEqual(slugs, ["milk-1l", "milk-1l-2", "milk-1l-3"])
+
+    def test_slug_is_kept_on_rename(self):
+        product = self.product("Milk")
+        product.save()
+        product.name = "Tea"
+        product.save()
+
+        product.refresh_from_db()
+        self.assertEqual(product.slug, "milk")
+
+    def test_allocate_slugs_with_one_query(self):
+        """ Test taken slugs of all names are read with one query """
+        models.Product.objects.bulk_create(
+            [self.product("Milk"), self.product("Milk 2"), self.product("Milk")])
+
+        with CaptureQueriesContext(connection) as ctx:
+            slugs = allocate_slugs(models.Product.objects.all(),
+                                   ["Milk", "Milk 2", "Milk", "Milk chocolate"])
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(slugs, ["milk-4", "milk-2-2", "milk-5", "milk-chocolate"])
+
+    def test_bulk_create_child_products(self):
+        """ Test bulk_create inserts parent rows of supermarket products """
+        products = models.SupermarketProduct.objects.bulk_create([
+            self.product("شیر", models.SupermarketProduct, in_bulk=True),
+            self.product("شیر", models.SupermarketProduct),
+        ])
+
+        self.assertEqual([product.slug for product in products],
+                         ["shir", "shir-2"])
+        product = models.SupermarketProduct.objects.get(pk=products[0].pk)
+        self.assertTrue(product.in_bulk)
+        self.assertEqual(models.Product.objects.count(), 2)
+
+    def test_slug_taken_by_concurrent_save_is_allocated_again(self):
+        """ Test a slug another save took after it was read is replaced """
+        self.product("Milk").save()
+        # Allocated before the first product was committed
+        stale = [["milk"], ["milk", "milk"]]
+        allocate = slugs_module.allocate_slugs
+
+        def allocate_stale(queryset, names, field_name="slug"):
+            return stale.pop(0) if stale else allocate(
+                queryset, names, field_name)
+
+        with patch.object(slugs_module, "allocate_slugs",
+                          side_effect=allocate_stale):
+            product = self.product("Milk")
+            product.save()
+            products = models.SupermarketProduct.objects.bulk_create([
+                self.product("Milk", models.SupermarketProduct),
+                self.product("Milk", models.SupermarketProduct)])
+
+        self.assertEqual(product.slug, "milk-2")
+        self.assertEqual([product.slug for product in products],
+                         ["milk-3", "milk-4"])
+        self.assertEqual(models.Product.objects.count(), 4)
+
+    def test_benchmark_slugs_command(self):
+        out = StringIO()
+
+        call_command("benchmark_slugs", "--rows", "20", "--names", "2",
+                     stdout=out)
+
+        self.assertIn("autoslug", out.getvalue())
+        self.assertIn("batch", out.getvalue())
+        self.assertFalse(models.Product.objects.exists())
@@ -3,6 +3,7 @@ import os
 import tempfile
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from PIL import Image
@@ -31,6 +32,7 @@ def detail_url(pk, endpoint_name: str = "store", **kwargs):
 class StorePublicApiTests(TestCase):
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
         self.city = smpl.sample_city()
         self.store_category = smpl.sample_store_category()
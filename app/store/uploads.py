@@ -0,0 +1,145 @@
+"""
+Streaming upload of product images.
+
+ImageUploadParser runs ChecksumUploadHandler ahead of Django's handlers,
+it hashes every chunk as it is received and rejects an upload as soon as
+it is larger than PRODUCT_IMAGES["MAX_UPLOAD_SIZE"] or its header shows
+more pixels than allowed, before the rest of the body is buffered.
+The SHA-256 is kept on the uploaded file, product_image_file_path() names
+files by it so an image uploaded twice is stored once.
+"""
+import hashlib
+import io
+import warnings
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image
+from rest_framework import exceptions, parsers, status
+from rest_framework.parsers import DataAndFiles
+
+# Largest part of a file read for its header, JPEGs may carry big EXIF
+# thumbnails before the dimensions
+HEADER_SIZE = 256 * 2 ** 10
+# Room for the multipart boundaries and fields next to the file
+FORM_OVERHEAD = 64 * 2 ** 10
+
+
+class UploadTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Uploaded file is too large."
+    default_code = "upload_too_large"
+
+
+def file_checksum(file):
+    """ SHA-256 of file, from the upload handler when it was streamed """
+    checksum = getattr(file, "sha256", None)
+    if checksum is None:
+        digest = hashlib.sha256()
+        file.seek(0)
+        for chunk in file.chunks():
+            digest.update(chunk)
+        checksum = file.sha256 = digest.hexdigest()
+    return checksum
+
+
+def check_dimensions(width, height):
+    limits = settings.PRODUCT_IMAGES
+    if max(width, height) > limits["MAX_DIMENSION"] \
+            or width * height > limits["MAX_PIXELS"]:
+        raise exceptions.ValidationError({"image": [
+            f"Image of {width}x{height} pixels is too large, at most "
+            f"{limits['MAX_DIMENSION']} pixels a side and "
+            f"{limits['MAX_PIXELS']} pixels are allowed."]})
+
+
+def read_dimensions(header):
+    """ Width and height from the start of an image, None if it is too short """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        try:
+            # Only the header is parsed, pixels are decoded lazily
+            with Image.open(io.BytesIO(header)) as image:
+                return image.size
+        except Image.DecompressionBombError:
+            raise exceptions.ValidationError(
+                {"image": ["Image has too many pixels."]})
+        except Exception:
+            return None
+
+
+class ChecksumUploadHandler(FileUploadHandler):
+    """
+    Hashes files and checks their limits, data is passed on to the
+    next handler which keeps it in memory or in a temporary file
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.PRODUCT_IMAGES["MAX_UPLOAD_SIZE"]
+        self.checksums = {}
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_size + FORM_OVERHEAD:
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.header = bytearray()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            raise UploadTooLarge()
+        self.digest.update(raw_data)
+
+        if self.header is not None:
+            self.header += raw_data
+            dimensions = read_dimensions(bytes(self.header))
+            if dimensions is not None:
+                check_dimensions(*dimensions)
+            if dimensions is not None or len(self.header) >= HEADER_SIZE:
+                # What is not an image is rejected by the serializer
+                self.header = None
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.checksums.setdefault(self.field_name, []).append(
+            self.digest.hexdigest())
+        return None
+
+
+class ImageUploadParser(parsers.MultiPartParser):
+    """ Multipart parser that streams files through ChecksumUploadHandler """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context["request"]
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta["CONTENT_TYPE"] = media_type
+        checksum_handler = ChecksumUploadHandler(request)
+        upload_handlers = [checksum_handler, *request.upload_handlers]
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, upload_handlers,
+                                           encoding)
+            data, files = parser.parse()
+        except MultiPartParserError as exc:
+            raise exceptions.ParseError(
+                f"Multipart form parse error - {exc}")
+        except exceptions.APIException:
+            # Temporary files of the next handlers are removed
+            for handler in upload_handlers:
+                handler.upload_interrupted()
+            raise
+
+        for field_name, checksums in checksum_handler.checksums.items():
+            for file, checksum in zip(files.getlist(field_name), checksums):
+                file.sha256 = checksum
+        return DataAndFiles(data, files)
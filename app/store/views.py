@@ -1,3 +1,6 @@
+from core.authentication import TokenUserAuthentication
+from core.fast_serialization import FastListMixin, list_response
+from core.query_planning import QueryPlanningMixin, plan_queryset
 from django.core.exceptions import ValidationError
 from django.db.models import Prefetch
 from django.http import request, JsonResponse
@@ -6,21 +9,64 @@ from rest_framework import (filters, generics, mixins, permissions, status,
                             viewsets)
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from . import models, serializers
+from . import bulk_import, models, serializers
+from .cache import CachedResponseMixin, cache_response
+from .filters import NearbyFilter, OrderingFilter, ProductSearchFilter
+from .pagination import ListPagination
 from .permissions import IsOwnerOrReadOnly, IsStoreOwnerToUpdate
+from .uploads import ImageUploadParser
 
 
-class StoreViewSet(viewsets.ModelViewSet):
+BULK_IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+}
+
+
+class RatingMixin:
+    """
+    Adds "rate" action to rate the object with "score" from 1 to 5
+    or to remove the rating with DELETE, "rating_model" is the rating
+    model of the object
+    """
+    rating_model = None
+
+    @action(methods=["POST", "DELETE"], detail=True, url_path="rate",
+            url_name="rate", permission_classes=[permissions.IsAuthenticated])
+    def rate(self, request, *args, **kwargs):
+        obj = self.get_object()
+        lookup = {self.rating_model.rated_field: obj, "user": request.user}
+
+        if request.method == "DELETE":
+            # Deleted one by one so aggregates are updated by signals
+            for rating in self.rating_model.objects.filter(**lookup):
+                rating.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = serializers.RatingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.rating_model.objects.update_or_create(
+            defaults=serializer.validated_data, **lookup)
+
+        obj.refresh_from_db()
+        return Response(self.get_serializer(obj).data)
+
+
+class StoreViewSet(CachedResponseMixin, QueryPlanningMixin, RatingMixin, viewsets.ModelViewSet):
     serializer_class = serializers.StoreSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, NearbyFilter, OrderingFilter]
     ordering_fields = ["name", "score", "is_open"]
     order = "score"
     search_fields = ["name"]
+    pagination_class = ListPagination
+    ordering_aliases = {"score": "store_score"}
+    cache_dependencies = [models.Store]
+    rating_model = models.StoreRating
     queryset = models.Store.objects.filter(is_verified=True)
 
     def perform_create(self, serializer):
@@ -42,14 +88,20 @@ class StoreViewSet(viewsets.ModelViewSet):
         return super().get_queryset()
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin):
+class CategoryViewSet(CachedResponseMixin, QueryPlanningMixin, viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin):
     serializer_class = serializers.CategorySerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, OrderingFilter]
 
     search_fields = ["name"]
     ordering_fields = ["name"]
+    pagination_class = ListPagination
+    # used by "products" action
+    ordering_aliases = {"score": "product_score"}
+    # "products" action lists products with their images
+    cache_dependencies = [models.Category, models.Product,
+                          models.SupermarketProduct, models.ProductImage]
     queryset = models.Category.objects.prefetch_related(Prefetch(
         "sub_categories",
         queryset=models.Category.objects.filter(is_verified=True))).filter(is_verified=True, parent_category=None)
@@ -63,16 +115,29 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin):
             return models.Category.objects.prefetch_related(
                 Prefetch("sub_categories",
                          queryset=models.Category.objects.filter(owner=self.request.user))).filter(owner=self.request.user)
-        if self.action == "retrieve":
+        if self.action in ("retrieve", "products"):
             return models.Category.objects.prefetch_related(
                 Prefetch("sub_categories",
                          queryset=models.Category.objects.filter(is_verified=True))).filter(is_verified=True)
         return super().get_queryset()
 
+    @action(methods=["GET"], detail=False, url_path="tree", url_name="tree")
+    @cache_response
+    def tree(self, request, *args, **kwargs):
+        """
+        Returns the whole tree of verified categories
+        """
+        roots = models.Category.objects.filter(is_verified=True).tree()
+        serializer = serializers.CategoryTreeSerializer(
+            roots, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
     @action(methods=["GET"], detail=True, url_path="products", url_name="products")
+    @cache_response
     def products(self, request, *args, **kwargs):
         """
-        Returns all products of this category
+        Returns all products of this category,
+        with "descendants=true" products of all subcategories are included
         """
         context = {
             "request": self.request
@@ -84,36 +149,39 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin):
         # we need to specify which serializer class to be used depends on
         # current category, store_category, e.g if store_category == "Clothing" then ClothingProductSerializer
 
+        if self.request.query_params.get("descendants") == "true":
+            category_filter = {"category__path__startswith": category.path}
+        else:
+            category_filter = {"category": category}
+
         st_category_name = category.store_category.name
         if st_category_name == "Supermarket":
             products = models.SupermarketProduct.objects.filter(
-                category=category, is_verified=True)
+                is_verified=True, **category_filter)
             ProductSerializer = serializers.SupermarketProductSerializer
         else:
             products = models.Product.objects.filter(
-                category=category, is_verified=True)
+                is_verified=True, **category_filter)
             ProductSerializer = serializers.ProductSerializer
 
-        # Implement pagination
-        page = self.paginate_queryset(products)
-        if page is not None:
-            serializer = serializers.SupermarketProductSerializer(
-                page, many=True, context=context)
-            return self.get_paginated_response(serializer.data)
+        if self.request.query_params.get("compact") == "true":
+            ProductSerializer = serializers.ProductCompactSerializer
 
-        serializer = serializers.SupermarketProductSerializer(
-            products, many=True
-        )
-        return Response(serializer.data)
+        product_serializer = ProductSerializer(context=context)
+        products = plan_queryset(products, product_serializer,
+                                 only_rendered=product_serializer.projected)
 
+        return list_response(self, products, product_serializer)
 
-class BrandViewSet(viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin):
+
+class BrandViewSet(CachedResponseMixin, QueryPlanningMixin, viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin):
     serializer_class = serializers.BrandSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, OrderingFilter]
     search_fields = ["name_fa", "name_en"]
     ordering_fields = ["name_fa", "name_en"]
+    cache_dependencies = [models.Brand]
     queryset = models.Brand.objects.filter(is_verified=True)
 
     def perform_create(self, serializer):
@@ -128,16 +196,29 @@ class BrandViewSet(viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin):
         return super().get_queryset()
 
 
-class SupermarketProductViewSet(viewsets.ModelViewSet):
+class SupermarketProductViewSet(CachedResponseMixin, QueryPlanningMixin, FastListMixin, RatingMixin, viewsets.ModelViewSet):
     serializer_class = serializers.SupermarketProductSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly, IsStoreOwnerToUpdate]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["name", "brand__name_fa", "brand__name_en"]
-    ordering_fields = ["name"]
+    # searches name, brand__name_fa and brand__name_en
+    filter_backends = [ProductSearchFilter, OrderingFilter]
+    ordering_fields = ["name", "score"]
+    pagination_class = ListPagination
+    ordering_aliases = {"score": "product_score"}
+    # brand names are searched
+    cache_dependencies = [models.Product, models.SupermarketProduct,
+                          models.ProductImage, models.Brand]
+    rating_model = models.ProductRating
     queryset = models.SupermarketProduct.objects.filter(is_verified=True)
 
+    def get_serializer_class(self):
+        """ "compact=true" lists products with only their featured image """
+        if (self.action == "list"
+                and self.request.query_params.get("compact") == "true"):
+            return serializers.ProductCompactSerializer
+        return super().get_serializer_class()
+
     def create(self, request, *args, **kwargs):
         """
         Current authenticated user must be the owner
@@ -154,19 +235,48 @@ class SupermarketProductViewSet(viewsets.ModelViewSet):
 
         return super().create(request, *args, **kwargs)
 
+    @action(methods=["POST"], detail=False, url_path="bulk", url_name="bulk")
+    def bulk(self, request, *args, **kwargs):
+        """
+        Imports products from a CSV or JSON Lines request body
+        ("text/csv" or "application/x-ndjson") or an uploaded "file"
+        (.csv or .jsonl), the body is read as a stream.
+        Returns number of created products and errors of each failed row
+        """
+        content_type = request.content_type.split(";")[0].strip()
+        if content_type in BULK_IMPORT_CONTENT_TYPES:
+            input_format = BULK_IMPORT_CONTENT_TYPES[content_type]
+            stream = request.stream or []
+        else:
+            stream = request.FILES.get("file")
+            if stream is None:
+                return Response({"file": ["No file was submitted."]},
+                                status=status.HTTP_400_BAD_REQUEST)
+            input_format = stream.name.rsplit(".", 1)[-1].lower()
+            if input_format not in bulk_import.FORMATS:
+                return Response({"file": ["Only .csv and .jsonl files are supported."]},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        importer = bulk_import.BulkProductImporter(request.user)
+        report = importer.run(bulk_import.iter_records(stream, input_format))
+
+        return Response(report, status=status.HTTP_201_CREATED
+                        if report["created"] else status.HTTP_400_BAD_REQUEST)
+
 
-class ProductImageViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, mixins.DestroyModelMixin):
+class ProductImageViewSet(QueryPlanningMixin, viewsets.GenericViewSet, mixins.CreateModelMixin, mixins.DestroyModelMixin):
     """ Endpoint to upload image for a product """
     serializer_class = serializers.ProductImageSerializer
-    authentication_classes = [JWTAuthentication]
+    parser_classes = [ImageUploadParser]
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     queryset = models.ProductImage.objects.all()
 
 
-class WishListItemViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, mixins.DestroyModelMixin):
+class WishListItemViewSet(QueryPlanningMixin, viewsets.GenericViewSet, mixins.CreateModelMixin, mixins.DestroyModelMixin):
     """ Endpoint to add products to the wishlist """
     serializer_class = serializers.WishlistItemSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     queryset = models.WishListItem.objects.all()
 
@@ -0,0 +1,24 @@
+#!/bin/sh
+# Compares the uWSGI profiles of scripts/uwsgi.ini under the same load.
+# Run from the app directory against a seeded database, e.g.
+#   ../scripts/benchmark_uwsgi_profiles.sh balanced cpu io
+# Extra benchmark_serving options can be passed in BENCHMARK_OPTIONS.
+set -e
+INI="$(cd "$(dirname "$0")" && pwd)/uwsgi.ini"
+PORT="${BENCHMARK_PORT:-8100}"
+TARGETS=""
+PIDFILES=""
+[ $# -eq 0 ] && set -- balanced
+
+for PROFILE in "$@"; do
+    WSGI_HTTP_SOCKET="127.0.0.1:$PORT" WSGI_STATS="127.0.0.1:$((PORT + 1000))" \
+        uwsgi --ini "$INI:$PROFILE" --daemonize "/tmp/uwsgi-$PROFILE.log" \
+        --pidfile "/tmp/uwsgi-$PROFILE.pid"
+    PIDFILES="$PIDFILES /tmp/uwsgi-$PROFILE.pid"
+    TARGETS="$TARGETS --target $PROFILE=http://127.0.0.1:$PORT"
+    PORT=$((PORT + 1))
+done
+trap 'for PIDFILE in $PIDFILES; do uwsgi --stop "$PIDFILE"; done' EXIT
+
+sleep 3
+python3 manage.py benchmark_serving $TARGETS $BENCHMARK_OPTIONS
@@ -2,6 +2,16 @@
 
 set -e
 
+python3 manage.py wait_for_db --timeout "${DB_WAIT_TIMEOUT:-60}"
 python3 manage.py collectstatic --noinput
+# Cache table workers share verification codes through, see README
+python3 manage.py createcachetable
 
-uwsgi --socket :8000 --master --enable-threads --module app.wsgi
\ No newline at end of file
+if [ "$SERVING_MODE" = "asgi" ]; then
+    # Async catalogue views, see app/store/async_views.py
+    uvicorn all_commerce.asgi:application --host 0.0.0.0 --port 8000 \
+        --workers "${ASGI_WORKERS:-1}"
+else
+    # Worker model profiles, see scripts/uwsgi.ini
+    uwsgi --ini "/scripts/uwsgi.ini:${WSGI_PROFILE:-balanced}"
+fi